@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# Micro-benchmarks for packet encode/decode and bus transactions.
+#
+#   python benchmarks/bench.py -o before.json
+#   ...hack hack hack...
+#   python benchmarks/bench.py -o after.json --compare before.json
+#
+# Every case reports ops/sec plus p50/p99 latency in nanoseconds.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import pypentair
+from pypentair import ACTIONS, SETTING, Bus, Packet, Pump, Transport, bytelist, getResponse
+from pypentair.simulator import Simulator
+
+pypentair.DEBUG = False
+
+class RecordingTransport(Transport):
+    # Plays a recorded byte stream back in a loop, as if it were on the wire
+    def __init__(self, stream):
+        super().__init__()
+        self.stream     = stream
+        self.position   = 0
+
+    def open(self):
+        self.handle = self
+
+    def close(self):
+        self.handle = None
+
+    @property
+    def in_waiting(self):
+        return len(self.stream) - self.position
+
+    def read(self, size=1):
+        if self.position >= len(self.stream):
+            self.position = 0
+        data = self.stream[self.position:self.position + size]
+        self.position += len(data)
+        return data
+
+    def write(self, data):
+        return len(data)
+
+def measure(function, seconds):
+    samples = []
+    clock   = time.perf_counter_ns
+    end     = clock() + int(seconds * 1e9)
+    while True:
+        start = clock()
+        function()
+        stop = clock()
+        samples.append(stop - start)
+        if stop > end:
+            break
+    samples.sort()
+    total = sum(samples)
+    return {
+        'ops':          len(samples),
+        'ops_per_sec':  len(samples) * 1e9 / total,
+        'p50_ns':       samples[len(samples) // 2],
+        'p99_ns':       samples[min(len(samples) - 1, len(samples) * 99 // 100)],
+    }
+
+def cases():
+    frame       = Packet(dst=0x60, action=ACTIONS['SET'], data=SETTING['TARGET_RPM'] + bytelist(2000)).bytes
+    packet      = Packet(frame)
+    status      = Packet(src=0x60, dst=0x21, action=ACTIONS['PUMP_STATUS'], data=[0x0A, 0, 2, 0, 215, 4, 76, 0, 0, 0, 0, 0, 0, 12, 30])
+    stream      = b''.join([b'\x00\x01', bytes(status.bytes), bytes(frame)] * 64)
+    recording   = Bus(RecordingTransport(stream), timeout=None)   # No fd to select() on; it never runs dry
+
+    yield 'packet_construct',       lambda: Packet(dst=0x60, action=ACTIONS['SET'], data=SETTING['TARGET_RPM'] + bytelist(2000))
+    yield 'packet_construct_bytes', lambda: Packet(frame)
+    yield 'packet_bytes_get',       lambda: packet.bytes
+    yield 'packet_checksum',        lambda: packet.checksum
+    yield 'packet_checkbytes',      lambda: packet.checkbytes
+    yield 'get_response',           lambda: getResponse(recording)
+
+    simulator   = Simulator(addresses=range(0x60, 0x70)).start()
+    pump        = Pump(1, simulator.bus())
+    def pump_ramp_set():
+        pump.ramp = 100
+    yield 'pump_ramp_get',          lambda: pump.ramp
+    yield 'pump_ramp_set',          pump_ramp_set
+    yield 'pump_status',            pump.refresh
+    yield 'pump_status_cached',     lambda: pump.status
+    yield 'pump_speed_rpm_get',     lambda: pump.speed(3).rpm
+    yield 'pump_snapshot',          pump.snapshot
+    simulator.stop()
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline):
+    print()
+    print("{:<24} {:>14} {:>14} {:>8}".format('case', 'baseline op/s', 'op/s', 'change'))
+    for name, result in results['cases'].items():
+        if name not in baseline['cases']:
+            continue
+        before  = baseline['cases'][name]['ops_per_sec']
+        after   = result['ops_per_sec']
+        print("{:<24} {:>14.0f} {:>14.0f} {:>+7.1f}%".format(name, before, after, 100 * (after - before) / before))
+
+def main():
+    parser = argparse.ArgumentParser(description="pypentair micro-benchmarks")
+    parser.add_argument('-o', '--output', help="write results as JSON to this file")
+    parser.add_argument('-c', '--compare', help="JSON results from an earlier run to compare against")
+    parser.add_argument('-t', '--time', type=float, default=0.5, help="seconds to spend on each case")
+    parser.add_argument('-k', '--filter', default='', help="only run cases containing this string")
+    args = parser.parse_args()
+
+    results = {
+        'revision':     revision(),
+        'python':       platform.python_version(),
+        'platform':     platform.platform(),
+        'timestamp':    time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cases':        {},
+    }
+    print("{:<24} {:>14} {:>10} {:>10}".format('case', 'op/s', 'p50 ns', 'p99 ns'))
+    for name, function in cases():
+        if args.filter not in name:
+            continue
+        result = results['cases'][name] = measure(function, args.time)
+        print("{:<24} {:>14.0f} {:>10} {:>10}".format(name, result['ops_per_sec'], result['p50_ns'], result['p99_ns']))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+
+if __name__ == '__main__':
+    main()
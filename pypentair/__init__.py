@@ -1,236 +1,12 @@
 #!/usr/bin/env python3
-DEBUG               = True
+DEBUG               = False  # Print every request and response; see Bus.trace for a cheaper record
 INSPECT_STATUS      = False
 RAISE_PACKET_ERRORS = False
 
-PACKET_FIELDS = {
-    'PACKET_HEADER_0':  0,
-    'PACKET_HEADER_1':  1,
-    'PACKET_HEADER_2':  2,
-    'PAYLOAD_HEADER':   3,
-    'VERSION':          4,
-    'DST':              5,
-    'SRC':              6,
-    'ACTION':           7,
-    'DATA_LENGTH':      8,
-    'DATA':             9,
-}
-
-ADDRESSES = {
-    'BROADCAST':                    0x0F,
-    'SUNTOUCH':                     0x10,
-    'EASYTOUCH':                    0x20,
-    'REMOTE_CONTROLLER':            0x21,
-    'REMOTE_WIRELESS_CONTROLLER':   0x22,
-    'QUICKTOUCH':                   0x48,
-    'INTELLIFLO_PUMP_1':            0x60,
-    'INTELLIFLO_PUMP_2':            0x61,
-    'INTELLIFLO_PUMP_3':            0x62,
-    'INTELLIFLO_PUMP_4':            0x63,
-    'INTELLIFLO_PUMP_5':            0x64,
-    'INTELLIFLO_PUMP_6':            0x65,
-    'INTELLIFLO_PUMP_7':            0x66,
-    'INTELLIFLO_PUMP_8':            0x67,
-    'INTELLIFLO_PUMP_9':            0x68,
-    'INTELLIFLO_PUMP_10':           0x69,
-    'INTELLIFLO_PUMP_11':           0x6A,
-    'INTELLIFLO_PUMP_12':           0x6B,
-    'INTELLIFLO_PUMP_13':           0x6C,
-    'INTELLIFLO_PUMP_14':           0x6D,
-    'INTELLIFLO_PUMP_15':           0x6E,
-    'INTELLIFLO_PUMP_16':           0x6F
-}
-
-SRC = ADDRESSES['REMOTE_CONTROLLER']
-
-BROADCAST_ACTIONS = {
-    'ACK_MESSAGE':                  0x01,
-
-    'CONTROLLER_STATUS':            0x02,
-    'DELAY_CANCEL':                 0x03,
-    'DATE_TIME':                    0x05,
-    'PUMP_STATUS':                  0x07,
-    'HEATER_TEMPERATURE_STATUS':    0x08,
-    'CUSTOM_NAMES':                 0x0A,
-    'CIRCUIT_NAMES':                0x0B,
-    'HEATER_PUMP_STATUS':           0x10,
-    'SCHEDULE_DETAILS':             0x11,
-    'INTELLICHEM':                  0x12,
-    'INTELLIFLO_SPA_SIDE_CONTROL':  0x16,
-    'PUMP_STATUS_2':                0x17, # Differentation with 0x07?
-    'PUMP_CONFIG':                  0x18,
-    'INTELLICHLOR_STATUS':          0x19,
-    'PUMP_CONFIG_EXTENDED':         0x1B,
-    'VALVE_STATUS':                 0x1D,
-    'HIGH_SPEED_VALVE_CIRCUITS':    0x1E,
-    'IS4_IS10':                     0x20,
-    'INTELLIFLO_SPA_SIDE_REMOTE':   0x21,
-    'HEATER_PUMP_STATUS':           0x22,
-    'DELAY_STATUS':                 0x23,
-    'LIGHT_GROUPS':                 0x27,
-    'HEAT_SETTINGS':                0x28,
-
-    'SET_COLOR':                    0x60,
-}
-
-# For STATUS (0x02) through HEAT_SETTINGS (0x28):
-# - Add 0x80 for Setter
-#SET = 0x80
-# - Add 0xC0 for Getter
-#GET = 0xC0
-
-ACTIONS = {
-    'ACK_MESSAGE':      0x00,
-    'SET':              0x01,
-    'GET':              0x02,
-    'GET_TIME':         0x03,
-    'REMOTE_CONTROL':   0x04,
-    'PUMP_SPEED':       0x05,
-    'PUMP_POWER':       0x06,
-    'PUMP_STATUS':      0x07,
-    '__0x08__':         0x08,
-    '__0x09__':         0x09,
-    '__0x0A__':         0x0A,
-    'SET_DATETIME':     0x85, # Need to figure out how these align with the BROADCAST_ACTIONS, GET, and SET
-    'GET_DATETIME':     0xC5,
-    'GET_PUMP_STATUS':  0xC7,
-    'GET_SCHEDULE_DETAILS': 0xD1,
-    'GET_PUMP_CONFIG':  0xD8,
-    'ERROR':            0xFF,
-}
-
-PUMP_STATUS_FIELDS = {
-    'RUN':                  0,
-    'MODE':                 1,
-    'DRIVE_STATE':          2,
-    'WATTS_H':              3,
-    'WATTS_L':              4,
-    'RPM_H':                5,
-    'RPM_L':                6,
-    'GPM':                  7,
-    'PPC':                  8,
-    'UNKNOWN':              9,
-    'ERROR':                10,
-    'REMAINING_TIME_H':     11,
-    'REMAINING_TIME_M':     12,
-    'CLOCK_TIME_H':         13,
-    'CLOCK_TIME_M':         14
-}
-
-PUMP_SPEED = {
-    'SPEED_1':      0x02,
-    'SPEED_2':      0x03,
-    'SPEED_3':      0x04,
-    'SPEED_4':      0x05,
-    'SPEED_5':      0x06,
-    'SPEED_6':      0x07,
-    'SPEED_7':      0x08,
-    'SPEED_8':      0x09,
-    'QUICK_CLEAN':  0x0a,
-    'TIME_OUT':     0x0b,
-}
-
-SPEED_MODES = {
-    'MANUAL':       0,
-    'EGG_TIMER':    1,
-    'SCHEDULE':     2,
-    'DISABLED':     3,
-}
-
-SETTING = {
-    #                       [0x01, 0xC4],   # 100
-    #                       [0x01, 0xFE],   # Changes often, generally in increments of 0x40.
-
-    'ACTUAL_RPM':           [0x02, 0x06],
-    #                       [0x02, 0x0A],   # Always just a bit lower than Watts from PUMP_STATUS
-    #                       [0x02, 0x1A],   # [0x00, 0x00] to [0x51, 0x07] on SVRS alarm, back to 0 on reprime
-    'SVRS_ALARM':           [0x02, 0x1C],   # [0x00, 0x00] to [0xff, 0xff] on SVRS alarm, back to 0 on reprime
-    'CONTRAST':             [0x02, 0xBD],
-    'ADDRESS':              [0x02, 0xC0],
-    'TARGET_RPM':           [0x02, 0xC4],
-    'RAMP':                 [0x02, 0xD1],
-    'PRIME_DELAY':          [0x02, 0xD2],
-    'GPM':                  [0x02, 0xE4],
-
-    #                       [0x03, 0x00],   # 7860
-    #                       [0x03, 0x16],   # 1600
-    'PRIME_SENSITIVITY':    [0x03, 0x17],
-    #                       [0x03, 0x18],   # 50    # Vacuum Flow?
-    #                       [0x03, 0x19],   # 55    # Max Priming Flow?
-    'SVRS_RESTART_TIMER':   [0x03, 0x1A],
-    'SVRS_RESTART_ENABLE':  [0x03, 0x1B],
-    'RUNNING_PROGRAM':      [0x03, 0x21],
-    #                       [0x03, 0x22],   # 0
-    #                       [0x03, 0x23],   # 0
-    #                       [0x03, 0x24],   # 0
-    #                       [0x03, 0x25],   # 0
-    #                       [0x03, 0x26],   # 0
-    'PROGRAM_RPM':          [0x03, 0x27],   # Through [0x03, 0x2A] -- offset by Program #
-    'SET_TIMER':            [0x03, 0x2B],
-    #                       [0x03, 0x2C],   # 2
-    #                       [0x03, 0x2D],   # 1
-    #                       [0x03, 0x2E],   # 0
-    'CELSIUS':              [0x03, 0x30],
-    '24_HOUR':              [0x03, 0x31],
-    #                       [0x03, 0x34],   # 3445
-    #                       [0x03, 0x35],   # 1115
-    #                       [0x03, 0x36],   # 10  Error 25 if I try to set it to anything
-    #                       [0x03, 0x37],   # 1
-    #                       [0x03, 0x38],   # 0
-    #                       [0x03, 0x39],   # 3445
-    #                       [0x03, 0x3A],   # 1115
-    #                       [0x03, 0x3B],   # 10  Error 25 if I try to set it to anything
-    #                       [0x03, 0x3C],   # 2
-    #                       [0x03, 0x3D],   # 0
-    #                       [0x03, 0x3E],   # 0
-    'SPEED_MODE':           [0x03, 0x85],   # Through [0x03, 0x8C] -- offset by Speed #
-    'SPEED_RPM':            [0x03, 0x8D],   # Through [0x03, 0x94] -- offset by Speed #
-    'SCHEDULE_START':       [0x03, 0x95],   # Through [0x03, 0x9C] -- offset by Speed #
-    'SCHEDULE_END':         [0x03, 0x9D],   # Through [0x03, 0xA4] -- offset by Speed #
-    'EGG_TIMER':            [0x03, 0xA5],   # Through [0x03, 0xAC] -- offset by Speed #
-    'TIME_OUT_TIMER':       [0x03, 0xAD],
-    'QUICK_RPM':            [0x03, 0xAE],
-    'QUICK_TIMER':          [0x03, 0xAF],
-    'ANTIFREEZE_ENABLE':    [0x03, 0xB0],
-    'ANTIFREEZE_RPM':       [0x03, 0xB1],
-    'ANTIFREEZE_TEMP':      [0x03, 0xB2],
-    'PRIME_ENABLE':         [0x03, 0xB3],
-    #                       [0x03, 0xB4],   # 3450 Prime RPM?
-    'PRIME_MAX_TIME':       [0x03, 0xB5],
-    'MIN_SPEED':            [0x03, 0xB6],
-    'MAX_SPEED':            [0x03, 0xB7],
-    'PASSWORD_ENABLE':      [0x03, 0xB8],
-    'PASSWORD_TIMEOUT':     [0x03, 0xB9],
-    'PASSWORD':             [0x03, 0xBA],
-    'PROGRAM_RPM_ALT':      [0x03, 0xBB],   # Through [0x03, 0xBE] -- offset by Program #
-    #                       [0x03, 0xC0],   # 1
-    #                       [0x03, 0xC1],   # 1
-    #                       [0x03, 0xC2],   # 1441
-    #                       [0x03, 0xC3],   # 0
-    'SOFT_PRIME_COUNTER':   [0x03, 0xC4],   # Error 11 when trying to set.
-}
-
-PUMP_POWER = {
-    False:  0x04,
-    True:   0x0A,
-}
-
-REMOTE_CONTROL_MODES = {
-    False:  0x00,
-    True:   0xff
-}
-
-WEEKDAYS = {
-    'SUNDAY':       1,
-    'MONDAY':       2,
-    'TUESDAY':      4,
-    'WEDNESDAY':    8,
-    'THURSDAY':     16,
-    'FRIDAY':       32,
-    'SATURDAY':     64,
-}
-
-# SCHEDULE_DAYS are WEEKDAYS + 128 as the most significant bit of the mask is always high
+from .protocol import (
+    PACKET_FIELDS, ADDRESSES, SRC, BROADCAST_ACTIONS, ACTIONS, PUMP_STATUS_FIELDS, PUMP_SPEED,
+    SPEED_MODES, SETTING, PUMP_POWER, REMOTE_CONTROL_MODES, WEEKDAYS, Codes
+)
 
 STYLE = {
     'HEADER':       '\033[95m',
@@ -247,44 +23,99 @@ def bytelist(x):
     return list(x.to_bytes(2, byteorder='big'))
 
 def lookup(dict, val): # Dictionary inversion
-    try:
-        return list(dict.keys())[list(dict.values()).index(val)]
-    except:
-        return val
+    if isinstance(dict, Codes):
+        return dict.name(val)
+    for key, value in dict.items():
+        if value == val:
+            return key
+    return val
 
 def pp(prop):
     return binascii.hexlify(bytearray([prop]))
 
-import serial
-RS485 = serial.Serial(
-        port        = '/dev/ttyUSB0',
-        baudrate    = 9600,
-        parity      = serial.PARITY_NONE,
-        stopbits    = serial.STOPBITS_ONE,
-        bytesize    = serial.EIGHTBITS,
-        timeout     = 1
-        )
-
 import binascii
+import concurrent.futures
+import heapq
+import itertools
+import os
+import queue
+import select
+import threading
 import time
+from concurrent.futures import Future
+
+from .transport import Transport, SerialTransport, SocketTransport, LoopbackTransport, PtyTransport, GatewayTransport
+from .demux import Demultiplexer
+from .scheduler import PRIORITIES, Scheduler
+from . import capture, config, convergence
+from .config import PumpConfig, ProgramConfig, SpeedConfig
+from .cache import TTLS, RegisterCache
+from .capture import Recorder, Capture
+from .metrics import Metrics
+from .trace import Trace
+from .errors import PentairError, ResponseTimeout, ChecksumError, ResponseMismatch, ErrorResponse
+from .retry import Retry
 
 class Packet():
+    # A packet is its wire image: FF 00 FF A5 VER DST SRC ACTION LEN DATA.. CHK_H CHK_L
+    # Everything else is a view onto those bytes, so packets are immutable.
+    __slots__          = ('raw', 'checksum')
+
     header             = [0xFF, 0x00, 0xFF]
     payload_header     = 0xA5
     version            = 0x00
+    preamble           = bytes(header + [payload_header])
 
     def __init__(self, *args, src=ADDRESSES['REMOTE_CONTROLLER'], dst=None, action=None, data=None):
-        if args is not ():
-            self.bytes      = args
+        if args:
+            raw, checksum = Packet.parse(args[0])
         else:
-            self.dst        = dst
-            self.action     = action
-            self.src        = src
-            if isinstance(data, int):
-                self.data   = [data]
-            else:
-                self.data   = data
-
+            if data is None:
+                data = ()
+            elif isinstance(data, int):
+                data = (data,)
+            checksum = Packet.payload_header + Packet.version + dst + src + action + len(data) + sum(data)
+            raw = bytes((*Packet.header, Packet.payload_header, Packet.version, dst, src, action, len(data), *data, checksum >> 8, checksum & 0xFF))
+        object.__setattr__(self, 'raw', raw)
+        object.__setattr__(self, 'checksum', checksum)
+
+    @classmethod
+    def parse(cls, packet):
+        packet = bytes(packet)
+        if packet[0:4] != Packet.preamble:
+            packet = Packet.preamble + bytes([Packet.version]) + packet
+
+        data_end = PACKET_FIELDS['DATA'] + packet[PACKET_FIELDS['DATA_LENGTH']]
+        checksum = sum(packet[PACKET_FIELDS['PAYLOAD_HEADER']:data_end])
+
+        if len(packet) > data_end:
+            if packet[data_end] << 8 | packet[data_end + 1] != checksum:
+                raise ChecksumError("Provided checksum does not match calculated checksum")
+            return packet[:data_end + 2], checksum
+        return packet + checksum.to_bytes(2, byteorder='big'), checksum
+
+    @classmethod
+    def frame(cls, raw, checksum):
+        # For frames that have already been checked, e.g. by a Decoder
+        packet = object.__new__(cls)
+        object.__setattr__(packet, 'raw', raw)
+        object.__setattr__(packet, 'checksum', checksum)
+        return packet
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Packets are immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, Packet) and self.raw == other.raw
+
+    def __hash__(self):
+        return hash(self.raw)
+
+    def __bytes__(self):
+        return self.raw
+
+    def __repr__(self):
+        return "Packet({})".format(list(self.raw))
 
     def inspect(self):
         print("   Destination:\t\t", pp(self.dst), lookup(ADDRESSES, self.dst))
@@ -319,99 +150,140 @@ class Packet():
             print("      CLOCK_TIME_H:\t", data[PUMP_STATUS_FIELDS['CLOCK_TIME_H']])
             print("      CLOCK_TIME_M:\t", data[PUMP_STATUS_FIELDS['CLOCK_TIME_M']])
 
-    def send(self):
-        RS485.write(bytearray(self.bytes))
+    def send(self, bus=None, priority=None, timeout=None):
+        if bus is None:
+            bus = RS485
         if DEBUG: print()
         if DEBUG: print(STYLE['OKGREEN'] + "Request: ", self.bytes, STYLE['ENDC'])
-        response = getResponse()
+        return self.accept(bus.transact(self, priority=priority, timeout=timeout))
+
+    def accept(self, response):
         if DEBUG: print(STYLE['OKBLUE'] + "Response:", response.bytes, STYLE['ENDC'])
         if response.action == self.action:
             return response
         elif response.action == ACTIONS['ERROR']:
             if DEBUG:
-                print(STYLE['FAIL'], "ERROR:", response.bytes[9], STYLE['ENDC'])
+                print(STYLE['FAIL'], "ERROR:", response.raw[PACKET_FIELDS['DATA']], STYLE['ENDC'])
             if RAISE_PACKET_ERRORS:
-                raise ValueError("Received an ERROR {} from the pump".format(response.bytes[9]), response.bytes)
+                raise ErrorResponse("Received an ERROR {} from the pump".format(response.raw[PACKET_FIELDS['DATA']]), response)
             return response
         else:
-            raise ValueError("This packet goes somewhere else -- maybe we need a buffer")
+            raise ResponseMismatch("Sent {} but got {}".format(self, response))
 
     @property
     def bytes(self):
-        return Packet.header + self.payload + self.checkbytes
-
-    @bytes.setter
-    def bytes(self, array):
-        packet = array[0]
-        if packet[0:5] != Packet.header + [Packet.payload_header] + [Packet.version]:
-            packet = Packet.header + [Packet.payload_header] + [Packet.version] + packet
+        return list(self.raw)
 
-        payload_start   = PACKET_FIELDS['PAYLOAD_HEADER']
-        data_length     = packet[PACKET_FIELDS['DATA_LENGTH']]
-        data_end        = payload_start + data_length + PACKET_FIELDS['DATA'] - PACKET_FIELDS['PAYLOAD_HEADER']
-        packet_length   = len(packet)
-
-        payload = packet[payload_start:data_end]
+    @property
+    def dst(self):
+        return self.raw[PACKET_FIELDS['DST']]
 
-        if packet_length > data_length + PACKET_FIELDS['DATA']:
-            read_checksum = 256 * packet[-2] + packet[-1]
-            if read_checksum != sum(payload):
-                raise ValueError("Provided checksum does not match calculated checksum")
-                return False
+    @property
+    def src(self):
+        return self.raw[PACKET_FIELDS['SRC']]
 
-        self.dst        = packet[PACKET_FIELDS['DST']]
-        self.src        = packet[PACKET_FIELDS['SRC']]
-        self.action     = packet[PACKET_FIELDS['ACTION']]
+    @property
+    def action(self):
+        return self.raw[PACKET_FIELDS['ACTION']]
 
-        if data_end > PACKET_FIELDS['DATA']:
-            self.data   = packet[PACKET_FIELDS['DATA']:data_end]
+    @property
+    def data(self):
+        if self.data_length:
+            return list(self.data_view)
         else:
-            self.data   = None
-
-        return self.bytes
+            return None
 
     @property
-    def checksum(self):
-        return sum(self.payload)
+    def data_view(self):
+        return memoryview(self.raw)[PACKET_FIELDS['DATA']:-2]
 
     @property
     def checkbytes(self):
-        return bytelist(self.checksum)
+        return list(self.raw[-2:])
 
     @property
     def data_length(self):
-        if self.data:
-            return len(self.data)
-        else:
-            return 0
+        return self.raw[PACKET_FIELDS['DATA_LENGTH']]
 
     @property
     def idata(self):
-        return(self.data[0]<<8|self.data[1])
+        return(self.raw[PACKET_FIELDS['DATA']]<<8|self.raw[PACKET_FIELDS['DATA'] + 1])
 
     @property
     def payload(self):
-        if self.data_length:
-            return [Packet.payload_header, Packet.version, self.dst, self.src, self.action, self.data_length] + self.data
-        else:
-            return [Packet.payload_header, Packet.version, self.dst, self.src, self.action, self.data_length]
+        return list(self.raw[PACKET_FIELDS['PAYLOAD_HEADER']:-2])
+
+# Pump actions that change what the pump is doing, and so jump the queue
+CONTROL_ACTIONS = [
+    ACTIONS['SET'],
+    ACTIONS['REMOTE_CONTROL'],
+    ACTIONS['PUMP_SPEED'],
+    ACTIONS['PUMP_POWER'],
+    ACTIONS['SET_DATETIME'],
+]
+
+STATUS_MAX_AGE = 1    # Seconds one PUMP_STATUS frame answers power/mode/watts/timer
+RETRY = Retry()     # How hard Pump.send tries; see retry.Retry
 
 class Pump():
-    def __init__(self, index):
+    def __init__(self, index, bus=None, max_age=STATUS_MAX_AGE, retry=None):
         self.__address          = ADDRESSES["INTELLIFLO_PUMP_" + str(index)]
+        self.bus                = bus if bus is not None else RS485
+        self.max_age            = max_age
+        self.retry              = retry if retry is not None else RETRY
         self.__remote_control   = None
         self.__speed            = None
 
-    def send(self, action, data=None):
-
+    def send(self, action, data=None, priority=None, timeout=None):
+        return self.submit(action, data, priority, timeout).result()
+
+    def submit(self, action, data=None, priority=None, timeout=None):
+        # Like send(), but returns a Future for the reply straight away; safe
+        # to call from any thread.  `timeout` caps all the attempts together;
+        # see Pump.retry
+        if priority is None:
+            priority = 'CONTROL' if action in CONTROL_ACTIONS else 'USER'
+        cache = getattr(self.bus, 'cache', None)
+        if cache is not None and action == ACTIONS['GET']:
+            response = cache.get(self.address, data)
+            if response is not None:
+                future = Future()
+                future.set_result(response)
+                return future
 #        self.remote_control = True
-        response = Packet(dst=self.address, action=action, data=data).send()
-        # Should add some error checking and retry logic here -- confirm that
-        # the response packet is for the same action we sent or handle the
-        # error if not.
+        packet = Packet(dst=self.address, action=action, data=data)
+        if DEBUG: print()
+        if DEBUG: print(STYLE['OKGREEN'] + "Request: ", packet.bytes, STYLE['ENDC'])
+        future = Future()
+        future.set_running_or_notify_cancel()
+        def accept(reply):
+            try:
+                response = packet.accept(reply.result())
+                if cache is not None:
+                    self.cache_response(cache, action, data, response)
+                future.set_result(response)
+            except Exception as e:
+                future.set_exception(e)
+        self.bus.submit(packet, priority, timeout, self.retry).add_done_callback(accept)
 #        self.remote_control = False
-
-        return response
+        return future
+
+    def cache_response(self, cache, action, data, response):
+        if response.action == ACTIONS['ERROR']:
+            return
+        if action == ACTIONS['GET']:
+            cache.put(self.address, data, response)
+        elif action == ACTIONS['PUMP_STATUS']:
+            cache.observe(response)
+        elif action == ACTIONS['SET'] and data[0:2] == SETTING['ADDRESS']:
+            # The pump has moved; whatever we knew about either address is stale
+            cache.invalidate(self.address)
+            cache.invalidate(response.idata)
+        elif action == ACTIONS['SET']:
+            # Keep it looking like the GET reply it stands in for
+            cache.write(self.address, data[0:2], Packet(src=response.src, dst=response.dst, action=ACTIONS['GET'], data=response.data))
+        elif action in CONTROL_ACTIONS:
+            cache.control(self.address)
 
     @property
     def address(self):
@@ -419,11 +291,7 @@ class Pump():
 
     @address.setter
     def address(self, address):
-        self.__address = Packet(
-            dst     = self.address,
-            action  = ACTIONS['SET'],
-            data    = SETTING['ADDRESS'] + bytelist(int(address))
-        ).send().idata
+        self.__address = self.send(ACTIONS['SET'], SETTING['ADDRESS'] + bytelist(int(address))).idata
 
     @property
     def ampm(self):
@@ -552,14 +420,29 @@ class Pump():
     @power.setter
     def power(self, state):
         if DEBUG: print("Attempting to set power:", state)
-        for x in range(0,120):
-            response = self.send(ACTIONS['PUMP_POWER'], [PUMP_POWER[state]])
-            if DEBUG: print("Desired power state:", state, "Actual power state:", self.power)
-            if self.power == state:
-                if DEBUG: print("Successfully set power:", state)
-                return
-            time.sleep(1)
-        raise ValueError("Did not achieve desired PUMP_POWER state within 2-minutes.")
+        progress = (lambda status: print("Desired power state:", state, "Actual power state:", status and status['run'] == 0x0A)) if DEBUG else None
+        self.set_power(state, progress=progress).result()
+        if DEBUG: print("Successfully set power:", state)
+
+    def set_power(self, state, timeout=convergence.TIMEOUT, progress=None):
+        # Sends the command once; the Future resolves to the first status
+        # showing the pump got there
+        self.send(ACTIONS['PUMP_POWER'], [PUMP_POWER[state]])
+        future = convergence.converge(
+            lambda: self.latest_status(convergence.MIN_INTERVAL),
+            lambda status: status and (status['run'] == 0x0A) == bool(state),
+            convergence.backoff(),
+            timeout,
+            progress
+            )
+        future.add_done_callback(self.post_mortem)
+        return future
+
+    def post_mortem(self, future):
+        # Show what the bus was doing when a change didn't take
+        trace = getattr(self.bus, 'trace', None)
+        if trace is not None and future.exception() is not None:
+            trace.dump()
 
     @property
     def prime_enable(self):
@@ -644,7 +527,7 @@ class Pump():
                 dst     = self.address,
                 action  = ACTIONS['REMOTE_CONTROL'],
                 data    = [REMOTE_CONTROL_MODES[state]]
-                ).send()
+                ).send(self.bus, 'CONTROL')
         self.__remote_control = state
 
     @property
@@ -662,14 +545,23 @@ class Pump():
     @rpm.setter
     def rpm(self, rpm):
         if DEBUG: print("Requesting RPM change to", rpm)
-        for x in range(0,120):
-            response = self.send(ACTIONS['SET'], SETTING['TARGET_RPM'] + bytelist(rpm))
-            if self.rpm == self.trpm:
-                if DEBUG: print("Successfully set RPM to ", rpm)
-                return
-            if DEBUG: print("Desired RPM:", self.trpm, "Actual RPM:", self.rpm)
-            time.sleep(1)
-        raise ValueError("Failed to achieve {} RPM within 2-minutes.".format(rpm))
+        progress = (lambda status: print("Desired RPM:", rpm, "Actual RPM:", status and status['rpm'])) if DEBUG else None
+        self.set_rpm(rpm, progress=progress).result()
+        if DEBUG: print("Successfully set RPM to ", rpm)
+
+    def set_rpm(self, rpm, timeout=convergence.TIMEOUT, progress=None):
+        # Like set_power, polling faster as the ramp nears the target
+        # The pump answers with the target it actually took, e.g. after clamping
+        target = self.send(ACTIONS['SET'], SETTING['TARGET_RPM'] + bytelist(rpm)).idata
+        future = convergence.converge(
+            lambda: self.latest_status(convergence.MIN_INTERVAL),
+            lambda status: status and status['rpm'] == target,
+            convergence.ramping(target, self.ramp),
+            timeout,
+            progress
+            )
+        future.add_done_callback(self.post_mortem)
+        return future
 
     @property
     def running_speed(self):
@@ -689,6 +581,73 @@ class Pump():
     def soft_prime_counter(self, minutes):
         self.send(ACTIONS['SET'], SETTING['SOFT_PRIME_COUNTER'] + bytelist(minutes))
 
+    def batch(self, action, data, priority='USER', timeout=None):
+        # One `action` per entry in `data`, sent back to back; returns the replies
+        if not data:
+            return []
+        packets = [Packet(dst=self.address, action=action, data=item) for item in data]
+        futures = self.bus.pipeline(packets, priority=priority, timeout=timeout)
+        cache   = getattr(self.bus, 'cache', None)
+        responses = []
+        for item, future in zip(data, futures):
+            response = future.request.accept(future.result())
+            if cache is not None:
+                self.cache_response(cache, action, item, response)
+            responses.append(response)
+        return responses
+
+    def snapshot(self, timeout=None):
+        # Every known register, read back to back in one batch
+        entries = list(config.registers())
+        start   = time.monotonic()
+        responses = self.batch(ACTIONS['GET'], [register for group, index, field, register, decode in entries], timeout=timeout)
+        elapsed = time.monotonic() - start
+        values  = {}
+        for (group, index, field, register, decode), response in zip(entries, responses):
+            values[(group, index, field)] = None if response.action == ACTIONS['ERROR'] else decode(response.idata)
+        return config.build(values, elapsed)
+
+    def configure(self, desired, timeout=None):
+        # Brings the pump in line with `desired` (see config.changes) using as
+        # few writes as possible, then reads them back.  Reports what changed,
+        # what already matched and what didn't take.
+        start   = time.monotonic()
+        entries = list(config.changes(desired))
+        cache   = getattr(self.bus, 'cache', None)
+        current = {}
+        failed  = {}
+        for key, register, decode, raw in entries:
+            response = cache.get(self.address, register) if cache is not None else None
+            if response is not None:
+                current[key] = response.idata
+        reads = [entry for entry in entries if entry[0] not in current]
+        for (key, register, decode, raw), response in zip(reads, self.batch(ACTIONS['GET'], [entry[1] for entry in reads], timeout=timeout)):
+            if response.action == ACTIONS['ERROR']:
+                failed[key] = ValueError("Couldn't read {}: {}".format(key, response))
+            else:
+                current[key] = response.idata
+        writes  = [entry for entry in entries if entry[0] not in failed and current[entry[0]] != entry[3]]
+        written = []
+        for entry, response in zip(writes, self.batch(ACTIONS['SET'], [entry[1] + bytelist(entry[3]) for entry in writes], 'CONTROL', timeout)):
+            if response.action == ACTIONS['ERROR']:
+                failed[entry[0]] = ValueError("Couldn't write {}: {}".format(entry[0], response))
+            else:
+                written.append(entry)
+        changed = {}
+        for (key, register, decode, raw), response in zip(written, self.batch(ACTIONS['GET'], [entry[1] for entry in written], timeout=timeout)):
+            if response.action == ACTIONS['ERROR'] or response.idata != raw:
+                failed[key] = ValueError("{} didn't take: {}".format(key, response))
+            else:
+                changed[key] = (decode(current[key]), decode(raw))
+        return {
+            'changed':      changed,
+            'unchanged':    {key: decode(raw) for key, register, decode, raw in entries if key not in failed and key not in changed},
+            'failed':       failed,
+            'reads':        len(reads),
+            'writes':       len(writes),
+            'elapsed':      time.monotonic() - start,
+        }
+
     def speed(self, index):
         return Speed(self, index)
 
@@ -698,9 +657,24 @@ class Pump():
 
     @property
     def status(self):
-        response = self.send(ACTIONS['PUMP_STATUS'])
-        # We should be able to get rid of this sanity check once we implement
-        # sanity checking in self.send()
+        return self.latest_status(self.max_age)
+
+    def latest_status(self, max_age):
+        # The newest status frame the bus's cache has seen, ours or sniffed,
+        # as long as it's no older than max_age; otherwise a new one.  Any
+        # command to the pump, from whoever sends it, clears it.
+        cache   = getattr(self.bus, 'cache', None)
+        latest  = cache.status(self.address) if cache is not None else None
+        if latest is None or time.monotonic() - latest[0] > max_age:
+            return self.refresh()
+        return Pump.decode_status(latest[1])
+
+    def refresh(self):
+        # Always goes to the pump for a new status frame, which the cache keeps
+        return Pump.decode_status(self.send(ACTIONS['PUMP_STATUS']))
+
+    @staticmethod
+    def decode_status(response):
         if response.action == ACTIONS['PUMP_STATUS']:
             if INSPECT_STATUS:
                 response.inspect()
@@ -842,21 +816,522 @@ def setPumpTimer():
     data.extend([0x00, 0x05])
     sendPump(ACTIONS['SET'], data)
 
-def broadcast(action, data=None):
+def broadcast(action, data=None, bus=None):
+    if bus is None:
+        bus = RS485
     dst = ADDRESSES['BROADCAST']
-    RS485.write(buildPacket(dst, action, data))
-
-def getResponse():
-    pbytes = []
-    while True:
-        for c in RS485.read():
-            pbytes.append(c)
-            if len(pbytes) > 4:
-                pbytes.pop(0)
-            if pbytes == Packet.header + [Packet.payload_header]:
-                pbytes.extend(list(RS485.read(4)))              # Version, DST, SRC, Action
-                data_length = ord(RS485.read())                 # Data Length
-                pbytes.append(data_length)                      #
-                pbytes.extend(list(RS485.read(data_length)))    # Data
-                pbytes.extend(list(RS485.read(2)))              # Checksum
-                return Packet(pbytes)
+    bus.write(Packet(dst=dst, action=action, data=data).raw)
+
+class Decoder():
+    preamble    = Packet.preamble
+
+    def __init__(self):
+        self.buffer     = bytearray()
+        self.frames     = 0     # Good frames handed out
+        self.corrupt    = 0     # Complete frames that failed their checksum
+        self.dropped    = 0     # Frames thrown away, corrupt or otherwise
+        self.skipped    = 0     # Line noise between frames
+
+    def feed(self, data):
+        self.buffer += data
+
+    def decode(self, data):
+        self.feed(data)
+        packet = self.pop()
+        while packet is not None:
+            yield packet
+            packet = self.pop()
+
+    def pop(self):
+        buffer = self.buffer
+        while True:
+            start = buffer.find(Decoder.preamble)
+            if start < 0:
+                # Hang on to anything that could be the start of a preamble
+                junk = max(len(buffer) - len(Decoder.preamble) + 1, 0)
+                self.skipped += junk
+                del buffer[:junk]
+                return None
+            if start:
+                self.skipped += start
+                del buffer[:start]
+            if len(buffer) <= PACKET_FIELDS['DATA_LENGTH']:
+                return None
+            data_end = PACKET_FIELDS['DATA'] + buffer[PACKET_FIELDS['DATA_LENGTH']]
+            if len(buffer) < data_end + 2:
+                return None
+            with memoryview(buffer) as view:
+                checksum = sum(view[PACKET_FIELDS['PAYLOAD_HEADER']:data_end])
+            if checksum == buffer[data_end] << 8 | buffer[data_end + 1]:
+                packet = Packet.frame(bytes(buffer[:data_end + 2]), checksum)
+                del buffer[:data_end + 2]
+                self.frames += 1
+                return packet
+            # Bad checksum -- resync on the next preamble after this one
+            self.corrupt += 1
+            self.dropped += 1
+            del buffer[:len(Decoder.preamble)]
+
+    def reset(self):
+        if self.buffer:
+            self.dropped += 1
+        self.buffer.clear()
+
+TIMEOUT = 1     # Seconds a Bus waits for a reply unless told otherwise
+
+# Reads a Bus answers once for everyone who asks while the first is in flight
+COALESCED_ACTIONS = [
+    ACTIONS['GET'],
+    ACTIONS['PUMP_STATUS'],
+]
+
+class Bus():
+    # One RS-485 segment.  `transport` is a device path or any Transport; the
+    # port isn't touched until the first read or write.
+    def __init__(self, transport='/dev/ttyUSB0', cache=None, recorder=None, metrics=None, trace=True, timeout=TIMEOUT):
+        if isinstance(transport, str):
+            transport = SerialTransport(transport)
+        self.transport  = transport
+        self.timeout    = timeout   # Seconds to wait for any one reply; None waits forever
+        self.decoder    = Decoder()
+        self.demux      = Demultiplexer()
+        self.__reading  = threading.Lock()     # Held by whoever is reading the port
+        self.__writing  = threading.Lock()
+        self.__lock     = threading.Lock()     # Guards the queue and starting the I/O thread
+        self.__queue    = []        # (priority, sequence, Request) waiting to go out
+        self.__retries  = []        # (when, sequence, Request) backing off before another attempt
+        self.__inflight = []        # Requests waiting on replies
+        self.__flights  = {}        # raw -> Request for each coalesced read not yet answered
+        self.coalesced  = 0         # Reads that shared another's transaction
+        self.__sequence = itertools.count()
+        self.__worker   = None      # The I/O thread, once anything has been submitted
+        self.__running  = False
+        self.__idle     = False     # The port hit EOF; don't watch it until we send again
+        self.recorder   = recorder  # A Recorder that gets every frame sent and received
+        self.trace      = Trace() if trace is True else trace or None   # The last few transactions, for post-mortems
+        self.__cache    = None
+        self.cache      = cache     # A RegisterCache shared by every Pump on this bus; see below
+        self.__metrics  = None
+        self.metrics    = metrics   # Metrics counting this bus's traffic
+
+    @property
+    def cache(self):
+        return self.__cache
+
+    @cache.setter
+    def cache(self, cache):
+        # The cache watches every frame on the bus for pump status.  Without
+        # one the bus still keeps that, in a cache that holds no registers.
+        if cache is None:
+            cache = RegisterCache(dict.fromkeys(TTLS, 0), 0)
+        if self.__cache is not None:
+            self.demux.unsubscribe(self.__cache.observe)
+        self.__cache = cache
+        self.demux.subscribe(cache.observe)
+
+    @property
+    def metrics(self):
+        return self.__metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self.__metrics = metrics
+        if metrics is not None:
+            metrics.watch(self)
+
+    def open(self):
+        if not self.transport.is_open:
+            self.transport.open()
+        return self
+
+    def close(self):
+        self.stop()
+        self.transport.close()
+        self.decoder.reset()
+
+    @property
+    def in_waiting(self):
+        return self.open().transport.in_waiting
+
+    def read(self, size=1):
+        return self.open().transport.read(size)
+
+    def write(self, data):
+        if self.recorder is not None:
+            self.recorder.record(capture.TX, data)
+        if self.__metrics is not None:
+            self.__metrics.sent(len(data))
+        with self.__writing:
+            return self.open().transport.write(data)
+
+    def wait(self, timeout):
+        # True once there's something to read, False if `timeout` runs out first
+        return bool(select.select([self.open().transport], [], [], timeout)[0])
+
+    def receive(self, timeout=None):
+        if self.__worker is not None:
+            # The I/O thread owns the port; take the next frame it decodes
+            frames = queue.Queue()
+            self.demux.subscribe(frames.put)
+            try:
+                return frames.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            finally:
+                self.demux.unsubscribe(frames.put)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            packet = self.decoder.pop()
+            if packet is not None:
+                if self.recorder is not None:
+                    self.recorder.record(capture.RX, packet.raw)
+                return packet
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.wait(remaining):
+                    return None
+            data = self.read(self.in_waiting or 1)
+            if self.__metrics is not None:
+                self.__metrics.received(len(data))
+            self.decoder.feed(data)
+
+    def listen(self, timeout=None):
+        # Take the next frame off the wire and hand it to the demux, without
+        # sending anything; returns the frame, or None on timeout
+        if self.__worker is not None:
+            return self.receive(timeout)
+        with self.__reading:
+            packet = self.receive(timeout)
+            if packet is not None:
+                self.demux.feed(packet)
+        return packet
+
+    def subscribe(self, callback):
+        return self.demux.subscribe(callback)
+
+    def unsubscribe(self, callback):
+        self.demux.unsubscribe(callback)
+
+    def transact(self, packet, priority=None, timeout=None):
+        return self.submit(packet, priority, timeout).result()
+
+    def pipeline(self, packets, priority=None, timeout=None, depth=1):
+        # Send `packets`, keeping up to `depth` of them waiting on replies at
+        # once (None for no limit).  Returns a finished Future per packet; see
+        # submit()
+        futures = [self.submit(packet, priority, timeout, depth=depth) for packet in packets]
+        concurrent.futures.wait(futures)
+        return futures
+
+    def submit(self, packet, priority=None, timeout=None, retry=None, depth=1):
+        # Queue `packet` for the I/O thread, which owns the port from the first
+        # submit on, and return a Future for its reply.  The Future fails with
+        # ResponseTimeout (ChecksumError if all that came back was damaged) if
+        # nothing came within `timeout` seconds of sending -- the bus's own
+        # timeout if None.  With a Retry, failed attempts go back in the queue
+        # after its backoff, and `timeout` overrides its deadline instead.
+        # The Future also records when the last attempt was `sent` and its
+        # `latency`.  `depth` is how many requests, this one included, may be
+        # waiting on replies when it goes out.
+        #
+        # A read identical to one already queued or in flight shares its
+        # transaction instead of getting one of its own.  The shared request
+        # takes on the more urgent priority and the more persistent Retry of
+        # the two, and each caller still gets a Future of its own to cancel,
+        # which gives up on its own timeout if that comes first.
+        request = Request(packet, priority, timeout if retry is not None else self.timeout if timeout is None else timeout, retry, depth)
+        if packet.action in CONTROL_ACTIONS:
+            # Whoever sent it, the pump's status and live readings won't hold
+            self.cache.control(packet.dst)
+        if packet.action not in COALESCED_ACTIONS:
+            self.__queue_request(request)
+            return request.future
+        with self.__lock:
+            flight = self.__flights.get(packet.raw)
+            if flight is not None:
+                self.coalesced += 1
+                caller = follow(flight.future)
+                if flight.join(request, caller):
+                    # Still queued, and now more urgent
+                    self.__queue = [(entry[2].priority,) + entry[1:] for entry in self.__queue]
+                    heapq.heapify(self.__queue)
+                if flight.joiners:
+                    os.write(self.__waker, b'\0')   # There may be a sooner deadline to wait for
+                return caller
+            self.__flights[packet.raw] = request
+        self.__queue_request(request)
+        return follow(request.future)
+
+    def __queue_request(self, request):
+        with self.__lock:
+            heapq.heappush(self.__queue, (request.priority, next(self.__sequence), request))
+            if self.__worker is None:
+                self.__start()
+            else:
+                os.write(self.__waker, b'\0')
+
+    def start(self):
+        # Starts the I/O thread now rather than at the first submit, e.g. to
+        # hear other devices before asking anything
+        with self.__lock:
+            if self.__worker is None:
+                self.__start()
+        return self
+
+    def __start(self):
+        self.__running = True
+        self.__wake, self.__waker = os.pipe()
+        self.__worker = threading.Thread(target=self.run, name='pypentair-bus', daemon=True)
+        self.__worker.start()
+
+    def stop(self):
+        # Stops the I/O thread, if there is one; anything still queued fails
+        with self.__lock:
+            worker = self.__worker
+            if worker is None:
+                return
+            self.__running = False
+            os.write(self.__waker, b'\0')
+        worker.join()
+
+    def run(self):
+        # The I/O thread: sends queued requests as the depth allows, decodes
+        # everything that comes in and hands it to the demux, and times out,
+        # retries or finishes each request
+        error = PentairError("The bus was stopped")
+        with self.__reading:
+            try:
+                while self.__running:
+                    self.step()
+            except Exception as e:
+                # Don't leave anyone waiting on a thread that's gone; the
+                # next submit starts a fresh one
+                error = PentairError("The bus's I/O thread failed: {!r}".format(e))
+                error.__cause__ = e
+        with self.__lock:
+            self.__worker = None
+            requests = [entry[2] for entry in self.__queue + self.__retries] + self.__inflight
+            self.__queue, self.__retries, self.__inflight = [], [], []
+            self.__flights.clear()
+            os.close(self.__wake)
+            os.close(self.__waker)
+        for request in requests:
+            if request.attempt is not None:
+                self.demux.cancel(request.attempt)
+            if request.future.done():
+                continue
+            if request.attempts or request.future.set_running_or_notify_cancel():
+                request.future.set_exception(error)
+
+    def step(self):
+        now = time.monotonic()
+        while self.__retries and self.__retries[0][0] <= now:
+            entry = heapq.heappop(self.__retries)
+            with self.__lock:
+                heapq.heappush(self.__queue, (entry[2].priority, entry[1], entry[2]))
+        while True:
+            with self.__lock:
+                if not self.__queue:
+                    break
+                request = self.__queue[0][2]
+                if request.depth is not None and len(self.__inflight) >= request.depth:
+                    break
+                heapq.heappop(self.__queue)
+            if request.attempts == 0 and not request.future.set_running_or_notify_cancel():
+                continue
+            if request.deadline is not None and now >= request.deadline:
+                attempt = Future()
+                attempt.request, attempt.sent = request.packet, now
+                attempt.set_exception(ResponseTimeout("Deadline for {} passed before it could be sent".format(request.packet)))
+                self.finish(request, attempt)
+                continue
+            self.send(request, now)
+
+        wait = self.expire(now)
+        for request in self.__inflight:
+            if request.attempt.deadline is not None and (wait is None or request.attempt.deadline < wait):
+                wait = request.attempt.deadline
+        if self.__retries and (wait is None or self.__retries[0][0] < wait):
+            wait = self.__retries[0][0]
+        watching = [self.__wake] if self.__idle else [self.__wake, self.transport]
+        readable = select.select(watching, [], [], None if wait is None else max(wait - now, 0))[0]
+        if self.__wake in readable:
+            os.read(self.__wake, 4096)
+        if self.transport in readable:
+            try:
+                data = self.read(self.in_waiting or 1)
+            except OSError as e:
+                # The port went away; fail what's waiting on it and don't
+                # spin on it until there's something new to send
+                data = b''
+                for request in self.__inflight:
+                    if not request.attempt.done():
+                        self.demux.cancel(request.attempt)
+                        request.attempt.set_exception(e)
+            if not data:
+                self.__idle = True
+            if self.__metrics is not None:
+                self.__metrics.received(len(data))
+            for packet in self.decoder.decode(data):
+                if self.recorder is not None:
+                    self.recorder.record(capture.RX, packet.raw)
+                self.demux.feed(packet)
+
+        now = time.monotonic()
+        inflight = []
+        for request in self.__inflight:
+            attempt = request.attempt
+            if not attempt.done() and attempt.deadline is not None and now >= attempt.deadline:
+                self.demux.cancel(attempt)
+                if self.decoder.corrupt > attempt.corrupt:
+                    attempt.set_exception(ChecksumError("No good reply to {} within {}s, but a corrupt frame came in".format(request.packet, now - attempt.sent)))
+                else:
+                    attempt.set_exception(ResponseTimeout("No reply to {} within {:.3f}s".format(request.packet, now - attempt.sent)))
+                retry = request.retry
+                if retry is not None and isinstance(attempt.exception(), retry.retry_on) and request.attempts < retry.attempts:
+                    delay = retry.delay(request.attempts - 1)
+                    if request.deadline is None or now + delay < request.deadline:
+                        if self.__metrics is not None:
+                            self.__metrics.retry(request.packet)
+                        heapq.heappush(self.__retries, (now + delay, next(self.__sequence), request))
+                        continue
+            if attempt.done():
+                self.finish(request, attempt)
+            else:
+                inflight.append(request)
+        self.__inflight = inflight
+
+    def send(self, request, now):
+        attempt = self.demux.expect(request.packet)
+        attempt.sent = now
+        attempt.corrupt = self.decoder.corrupt
+        timeout = request.timeout
+        if request.deadline is not None:
+            timeout = request.deadline - now if timeout is None else min(timeout, request.deadline - now)
+        attempt.deadline = None if timeout is None else now + timeout
+        with self.__lock:
+            request.attempt = attempt
+            for joiner in request.joiners:
+                if joiner[1] is not None and joiner[2] is None:
+                    joiner[2] = now + joiner[1]
+        request.attempts += 1
+        try:
+            self.write(request.packet.raw)
+            self.__idle = False
+        except OSError as e:
+            self.demux.cancel(attempt)
+            attempt.set_exception(e)
+        self.__inflight.append(request)
+
+    def expire(self, now):
+        # Fails coalesced callers whose own timeout is up, leaving the shared
+        # request to the rest; returns when the next one is due
+        due     = None
+        expired = []
+        with self.__lock:
+            for request in self.__flights.values():
+                joiners = []
+                for joiner in request.joiners:
+                    if joiner[0].done():
+                        continue
+                    if joiner[2] is not None and now >= joiner[2]:
+                        expired.append((joiner[0], request.packet))
+                        continue
+                    if joiner[2] is not None and (due is None or joiner[2] < due):
+                        due = joiner[2]
+                    joiners.append(joiner)
+                request.joiners = joiners
+        for caller, packet in expired:
+            if caller.set_running_or_notify_cancel():
+                caller.set_exception(ResponseTimeout("No reply to {} within the caller's own timeout".format(packet)))
+        return due
+
+    def finish(self, request, attempt):
+        # Counts and traces the last attempt, then hands its outcome on
+        error = attempt.exception()
+        if error is None:
+            attempt.latency = time.monotonic() - attempt.sent
+        if self.__metrics is not None:
+            self.__metrics.transaction(attempt)
+        if self.trace is not None:
+            self.trace.record(attempt)
+            failed = error is not None or attempt.result().action == ACTIONS['ERROR']
+            # BACKGROUND polls and bare probes fail as a matter of course
+            if failed and request.retry is not None and request.priority != PRIORITIES['BACKGROUND']:
+                self.trace.failed()
+        future = request.future
+        future.sent = attempt.sent
+        with self.__lock:
+            if self.__flights.get(request.packet.raw) is request:
+                del self.__flights[request.packet.raw]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.latency = attempt.latency
+            future.set_result(attempt.result())
+
+def follow(future):
+    # A Future of the caller's own that finishes with `future`; cancelling it
+    # leaves `future` alone
+    caller = Future()
+    caller.request = future.request
+    def finish(future):
+        if caller.done() or not caller.set_running_or_notify_cancel():
+            return
+        caller.sent = getattr(future, 'sent', None)
+        if future.exception() is not None:
+            caller.set_exception(future.exception())
+        else:
+            caller.latency = future.latency
+            caller.set_result(future.result())
+    future.add_done_callback(finish)
+    return caller
+
+class Request():
+    # One submitted packet on its way through a Bus's I/O thread
+    def __init__(self, packet, priority, timeout, retry, depth):
+        self.packet     = packet
+        self.priority   = PRIORITIES.get('USER' if priority is None else priority, priority)
+        self.retry      = retry
+        self.timeout    = retry.timeout if retry is not None else timeout   # Seconds per attempt
+        deadline        = timeout if timeout is not None or retry is None else retry.deadline
+        self.deadline   = None if retry is None or deadline is None else time.monotonic() + deadline
+        self.depth      = depth
+        self.attempts   = 0
+        self.attempt    = None  # The demux Future for the latest attempt
+        self.future     = Future()
+        self.future.request = packet
+        self.joiners    = []    # [caller, timeout, deadline] for each coalesced caller that may give up sooner
+
+    def join(self, other, caller):
+        # `other` is an identical read sharing this one's transaction, and
+        # `caller` its Future; make sure it gets at least what it asked for,
+        # and no more.  True if that made this request more urgent.
+        if other.retry is not None and other.deadline is not None:
+            self.joiners.append([caller, None, other.deadline])
+        elif other.retry is None and other.timeout is not None:
+            # One attempt's worth: from the one in flight, else the next
+            sent = self.attempt.sent if self.attempt is not None and not self.attempt.done() else None
+            self.joiners.append([caller, other.timeout, None if sent is None else sent + other.timeout])
+        if other.retry is not None:
+            if self.retry is None or other.retry.attempts > self.retry.attempts:
+                self.retry = other.retry
+            if self.timeout is not None and (other.timeout is None or other.timeout > self.timeout):
+                self.timeout = other.timeout
+            if self.deadline is not None and (other.deadline is None or other.deadline > self.deadline):
+                self.deadline = other.deadline
+        if other.priority < self.priority:
+            self.priority = other.priority
+            return self.attempts == 0
+        return False
+
+RS485 = Bus()
+
+def getResponse(bus=None, timeout=None):
+    if bus is None:
+        bus = RS485
+    timeout = bus.timeout if timeout is None else timeout
+    packet = bus.receive(timeout)
+    if packet is None:
+        raise ResponseTimeout("Nothing received within {}s".format(timeout))
+    return packet
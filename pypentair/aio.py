@@ -0,0 +1,382 @@
+import asyncio
+
+import pypentair
+from . import (
+    ACTIONS, ADDRESSES, PUMP_POWER, PUMP_SPEED, REMOTE_CONTROL_MODES,
+    SETTING, SPEED_MODES, WEEKDAYS, Decoder, Demultiplexer, Packet, Pump, ResponseTimeout, SerialTransport, bytelist, lookup
+)
+from . import convergence
+
+# The same Pump/Program/Speed surface as the blocking API, for asyncio:
+#
+#   bus  = AsyncBus('/dev/ttyUSB0')
+#   pump = AsyncPump(1, bus)
+#   await pump.set_power(True)
+#   rpm  = await pump.get_rpm()
+#
+# Reads are driven by the event loop watching the port's file descriptor, so
+# nothing ever blocks waiting on the wire.
+
+class AsyncBus():
+    def __init__(self, transport='/dev/ttyUSB0', timeout=None):
+        if isinstance(transport, str):
+            transport = SerialTransport(transport)
+        self.transport  = transport
+        self.timeout    = timeout if timeout is not None else transport.timeout
+        self.decoder    = Decoder()
+        self.demux      = Demultiplexer()
+        self.__loop     = None
+        self.__lock     = None
+
+    def open(self):
+        if self.__loop is None:
+            if not self.transport.is_open:
+                self.transport.open()
+            self.__loop = asyncio.get_running_loop()
+            self.__lock = asyncio.Lock()
+            self.__loop.add_reader(self.transport.fileno(), self.__readable)
+        return self
+
+    def close(self):
+        if self.__loop is not None:
+            self.__loop.remove_reader(self.transport.fileno())
+            self.__loop = None
+        self.transport.close()
+        self.decoder.reset()
+
+    def __readable(self):
+        data = self.transport.read(self.transport.in_waiting or 1)
+        for packet in self.decoder.decode(data):
+            self.demux.feed(packet)
+
+    def subscribe(self, callback):
+        return self.demux.subscribe(callback)
+
+    def unsubscribe(self, callback):
+        self.demux.unsubscribe(callback)
+
+    async def transact(self, packet):
+        self.open()
+        async with self.__lock:
+            future = self.demux.expect(packet)
+            try:
+                self.transport.write(packet.raw)
+                response = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except asyncio.TimeoutError:
+                raise ResponseTimeout("No reply to {} within {}s".format(packet, self.timeout)) from None
+            finally:
+                self.demux.cancel(future)
+        return packet.accept(response)
+
+class AsyncPump():
+    def __init__(self, index, bus):
+        self.address            = ADDRESSES["INTELLIFLO_PUMP_" + str(index)]
+        self.bus                = bus
+        self.remote_control     = None
+        self.running_speed      = None
+
+    async def send(self, action, data=None):
+        return await self.bus.transact(Packet(dst=self.address, action=action, data=data))
+
+    async def get(self, setting):
+        return (await self.send(ACTIONS['GET'], setting)).idata
+
+    async def set(self, setting, value):
+        return await self.send(ACTIONS['SET'], setting + bytelist(value))
+
+    @property
+    def id(self):
+        return self.address - 95
+
+    async def set_address(self, address):
+        self.address = (await self.set(SETTING['ADDRESS'], int(address))).idata
+
+    async def set_id(self, id):
+        await self.set_address(id + 95)
+
+    async def get_ampm(self):
+        return not await self.get(SETTING['24_HOUR'])
+
+    async def set_ampm(self, state):
+        await self.set(SETTING['24_HOUR'], not state)
+
+    async def get_antifreeze_enable(self):
+        return await self.get(SETTING['ANTIFREEZE_ENABLE'])
+
+    async def set_antifreeze_enable(self, state):
+        await self.set(SETTING['ANTIFREEZE_ENABLE'], state)
+
+    async def get_antifreeze_rpm(self):
+        return await self.get(SETTING['ANTIFREEZE_RPM'])
+
+    async def set_antifreeze_rpm(self, rpm):
+        await self.set(SETTING['ANTIFREEZE_RPM'], rpm)
+
+    async def get_antifreeze_temp(self):
+        return await self.get(SETTING['ANTIFREEZE_TEMP'])
+
+    async def set_antifreeze_temp(self, temp):
+        await self.set(SETTING['ANTIFREEZE_TEMP'], temp)
+
+    async def get_celsius(self):
+        return await self.get(SETTING['CELSIUS'])
+
+    async def set_celsius(self, state):
+        await self.set(SETTING['CELSIUS'], state)
+
+    async def get_contrast(self):
+        return await self.get(SETTING['CONTRAST'])
+
+    async def set_contrast(self, state):
+        await self.set(SETTING['CONTRAST'], state)
+
+    async def get_datetime(self):
+        return await self.send(0x03)
+
+    async def set_datetime(self, data):
+        return await self.send(ACTIONS['SET_DATETIME'], [data['hour'], data['minute'], WEEKDAYS[data['dow']], data['dom'], data['month'], data['year'], data['dst'], data['auto_dst']])
+
+    async def get_fahrenheit(self):
+        return not await self.get_celsius()
+
+    async def set_fahrenheit(self, state):
+        await self.set_celsius(not state)
+
+    async def get_max_speed(self):
+        return await self.get(SETTING['MAX_SPEED'])
+
+    async def set_max_speed(self, rpm):
+        await self.set(SETTING['MAX_SPEED'], rpm)
+
+    async def get_min_speed(self):
+        return await self.get(SETTING['MIN_SPEED'])
+
+    async def set_min_speed(self, rpm):
+        await self.set(SETTING['MIN_SPEED'], rpm)
+
+    async def get_mode(self):
+        return (await self.get_status())['mode']
+
+    async def get_password_enable(self):
+        return await self.get(SETTING['PASSWORD_ENABLE'])
+
+    async def set_password_enable(self, state):
+        await self.set(SETTING['PASSWORD_ENABLE'], state)
+
+    async def get_password_timeout(self):
+        return await self.get(SETTING['PASSWORD_TIMEOUT'])
+
+    async def set_password_timeout(self, timeout):
+        await self.set(SETTING['PASSWORD_TIMEOUT'], timeout)
+
+    async def get_password(self):
+        return await self.get(SETTING['PASSWORD'])
+
+    async def set_password(self, password):
+        await self.set(SETTING['PASSWORD'], password)
+
+    async def get_power(self):
+        return (await self.get_status())['run'] == 0x0A
+
+    async def set_power(self, state, timeout=convergence.TIMEOUT, progress=None):
+        if pypentair.DEBUG: print("Attempting to set power:", state)
+        await self.send(ACTIONS['PUMP_POWER'], [PUMP_POWER[state]])
+        await convergence.converge_async(
+            self.get_status,
+            lambda status: status and (status['run'] == 0x0A) == bool(state),
+            convergence.backoff(),
+            timeout,
+            progress
+            )
+        if pypentair.DEBUG: print("Successfully set power:", state)
+
+    async def get_prime_enable(self):
+        return await self.get(SETTING['PRIME_ENABLE'])
+
+    async def set_prime_enable(self, state):
+        await self.set(SETTING['PRIME_ENABLE'], state)
+
+    async def get_prime_delay(self):
+        return await self.get(SETTING['PRIME_DELAY'])
+
+    async def set_prime_delay(self, minutes):
+        await self.set(SETTING['PRIME_DELAY'], minutes)
+
+    async def get_prime_max_time(self):
+        return await self.get(SETTING['PRIME_MAX_TIME'])
+
+    async def set_prime_max_time(self, minutes):
+        await self.set(SETTING['PRIME_MAX_TIME'], minutes)
+
+    async def get_prime_sensitivity(self):
+        return await self.get(SETTING['PRIME_SENSITIVITY'])
+
+    async def set_prime_sensitivity(self, sensitivity):
+        await self.set(SETTING['PRIME_SENSITIVITY'], sensitivity)
+
+    async def get_quick_rpm(self):
+        return await self.get(SETTING['QUICK_RPM'])
+
+    async def set_quick_rpm(self, rpm):
+        await self.set(SETTING['QUICK_RPM'], rpm)
+
+    async def get_quick_timer(self):
+        minutes = await self.get(SETTING['QUICK_TIMER'])
+        return [int(minutes/60), minutes % 60]
+
+    async def set_quick_timer(self, time):
+        await self.set(SETTING['QUICK_TIMER'], 60 * time[0] + time[1])
+
+    async def get_running_program(self):
+        return int(await self.get(SETTING['RUNNING_PROGRAM'])/8)
+
+    async def set_running_program(self, index):
+        await self.send(ACTIONS['SET'], SETTING['RUNNING_PROGRAM'] + [index*8])
+
+    def program(self, index):
+        return AsyncProgram(self, index)
+
+    @property
+    def programs(self):
+        return [self.program(index) for index in range(1,5)]
+
+    async def get_ramp(self):
+        return await self.get(SETTING['RAMP'])
+
+    async def set_ramp(self, rpm):
+        await self.set(SETTING['RAMP'], rpm)
+
+    async def set_remote_control(self, state):
+        await self.send(ACTIONS['REMOTE_CONTROL'], [REMOTE_CONTROL_MODES[state]])
+        self.remote_control = state
+
+    async def get_rpm(self):
+        return await self.get(SETTING['ACTUAL_RPM'])
+
+    async def get_trpm(self):
+        return await self.get(SETTING['TARGET_RPM'])
+
+    async def set_trpm(self, rpm):
+        await self.set(SETTING['TARGET_RPM'], rpm)
+
+    async def set_rpm(self, rpm, timeout=convergence.TIMEOUT, progress=None):
+        if pypentair.DEBUG: print("Requesting RPM change to", rpm)
+        target = (await self.set(SETTING['TARGET_RPM'], rpm)).idata
+        await convergence.converge_async(
+            self.get_status,
+            lambda status: status and status['rpm'] == target,
+            convergence.ramping(target, await self.get_ramp()),
+            timeout,
+            progress
+            )
+        if pypentair.DEBUG: print("Successfully set RPM to ", rpm)
+
+    async def set_running_speed(self, speed):
+        await self.send(ACTIONS['PUMP_SPEED'], [PUMP_SPEED[speed]])
+        self.running_speed = speed
+
+    async def get_soft_prime_counter(self):
+        return await self.get(SETTING['SOFT_PRIME_COUNTER'])
+
+    async def set_soft_prime_counter(self, minutes):
+        await self.set(SETTING['SOFT_PRIME_COUNTER'], minutes)
+
+    def speed(self, index):
+        return AsyncSpeed(self, index)
+
+    @property
+    def speeds(self):
+        return [self.speed(index) for index in range(1,9)]
+
+    async def get_status(self):
+        return Pump.decode_status(await self.send(ACTIONS['PUMP_STATUS']))
+
+    async def get_svrs_alarm(self):
+        return await self.get(SETTING['SVRS_ALARM'])
+
+    async def get_svrs_restart_enable(self):
+        return await self.get(SETTING['SVRS_RESTART_ENABLE'])
+
+    async def set_svrs_restart_enable(self, state):
+        await self.set(SETTING['SVRS_RESTART_ENABLE'], state)
+
+    async def get_svrs_restart_timer(self):
+        return await self.get(SETTING['SVRS_RESTART_TIMER'])
+
+    async def set_svrs_restart_timer(self, seconds):
+        await self.set(SETTING['SVRS_RESTART_TIMER'], seconds)
+
+    async def get_time(self):
+        return list((await self.send(ACTIONS['GET_TIME'])).data)
+
+    async def get_timer(self):
+        return (await self.get_status())['timer']
+
+    async def get_time_out_timer(self):
+        minutes = await self.get(SETTING['TIME_OUT_TIMER'])
+        return [int(minutes/60), minutes % 60]
+
+    async def set_time_out_timer(self, time):
+        await self.set(SETTING['TIME_OUT_TIMER'], 60 * time[0] + time[1])
+
+    async def get_watts(self):
+        return (await self.get_status())['watts']
+
+class AsyncProgram():
+    def __init__(self, pump, index):
+        self.pump   = pump
+        self.index  = index
+
+    def my(self, list):
+        return [list[0], list[1] + self.index - 1]
+
+    async def get_rpm(self):
+        return await self.pump.get(self.my(SETTING['PROGRAM_RPM']))
+
+    async def set_rpm(self, rpm):
+        await self.pump.set(self.my(SETTING['PROGRAM_RPM']), rpm)
+
+class AsyncSpeed():
+    def __init__(self, pump, index):
+        self.pump   = pump
+        self.index  = index
+
+    def my(self, list):
+        return [list[0], list[1] + self.index - 1]
+
+    async def get_mode(self):
+        return lookup(SPEED_MODES, await self.pump.get(self.my(SETTING['SPEED_MODE'])))
+
+    async def set_mode(self, mode):
+        if mode in SPEED_MODES:
+            mode = SPEED_MODES[mode]
+        else:
+            mode = int(mode)
+        await self.pump.set(self.my(SETTING['SPEED_MODE']), mode)
+
+    async def get_rpm(self):
+        return await self.pump.get(self.my(SETTING['SPEED_RPM']))
+
+    async def set_rpm(self, rpm):
+        await self.pump.set(self.my(SETTING['SPEED_RPM']), rpm)
+
+    async def get_schedule_start(self):
+        minutes = await self.pump.get(self.my(SETTING['SCHEDULE_START']))
+        return [int(minutes/60), minutes % 60]
+
+    async def set_schedule_start(self, time):
+        await self.pump.set(self.my(SETTING['SCHEDULE_START']), 60 * time[0] + time[1])
+
+    async def get_schedule_end(self):
+        minutes = await self.pump.get(self.my(SETTING['SCHEDULE_END']))
+        return [int(minutes/60), minutes % 60]
+
+    async def set_schedule_end(self, time):
+        await self.pump.set(self.my(SETTING['SCHEDULE_END']), 60 * time[0] + time[1])
+
+    async def get_egg_timer(self):
+        minutes = await self.pump.get(self.my(SETTING['EGG_TIMER']))
+        return [int(minutes/60), minutes % 60]
+
+    async def set_egg_timer(self, time):
+        await self.pump.set(self.my(SETTING['EGG_TIMER']), 60 * time[0] + time[1])
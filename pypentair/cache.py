@@ -0,0 +1,104 @@
+import threading
+import time
+
+from . import config
+from .protocol import ACTIONS, PUMP_STATUS_FIELDS, SETTING
+
+# Remembers GET replies for SETTING registers so repeat reads don't go over
+# the wire.  Attach one to a bus and every Pump on that bus shares it:
+#
+#   bus = Bus('/dev/ttyUSB0', cache=RegisterCache())
+#
+# How long a reply stays good depends on the register: configuration the pump
+# only changes when told to lasts for hours, live readings not at all.
+#
+# It also keeps the latest PUMP_STATUS frame from each pump, whoever asked for
+# it, so a Pump can answer power/mode/watts/timer from someone else's poll.
+
+TTLS = {
+    'ACTUAL_RPM':           0,
+    'GPM':                  0,
+    'SVRS_ALARM':           0,
+    'SOFT_PRIME_COUNTER':   0,
+    'TARGET_RPM':           1,
+    'RUNNING_PROGRAM':      1,
+    'SET_TIMER':            1,
+}
+
+STATIC = 3600   # Every other configuration register; anything unknown isn't cached
+
+class RegisterCache():
+    def __init__(self, ttls=None, default=STATIC):
+        ttls = dict(TTLS, **(ttls or {}))
+        self.ttls       = {}    # register -> seconds
+        for indexes, registers in [([1], config.PUMP_REGISTERS), (config.PROGRAMS, config.PROGRAM_REGISTERS), (config.SPEEDS, config.SPEED_REGISTERS)]:
+            for index in indexes:
+                for field, key, decode in registers:
+                    self.ttls[tuple(config.register(key, index))] = ttls.get(key, default)
+        self.live       = set(tuple(SETTING[key]) for key in TTLS)     # What a command can change
+        self.entries    = {}    # (address, register) -> (expiry, response)
+        self.statuses   = {}    # address -> (received, PUMP_STATUS reply)
+        self.hits       = 0
+        self.misses     = 0
+        self.writes     = 0
+        self.__lock     = threading.Lock()
+
+    def ttl(self, register):
+        return self.ttls.get(tuple(register), 0)
+
+    def get(self, address, register):
+        key = (address, tuple(register))
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, address, register, response):
+        ttl = self.ttl(register)
+        if ttl > 0:
+            with self.__lock:
+                self.entries[(address, tuple(register))] = (time.monotonic() + ttl, response)
+
+    def write(self, address, register, response):
+        # A SET reply carries the register's new value, so it's as good as a GET
+        self.writes += 1
+        self.put(address, register, response)
+
+    def observe(self, packet):
+        # Subscribed to the bus, so this sees every frame, not just our replies
+        if packet.action == ACTIONS['PUMP_STATUS'] and packet.data_length == len(PUMP_STATUS_FIELDS):
+            self.statuses[packet.src] = (time.monotonic(), packet)
+
+    def status(self, address):
+        # (received, reply) for the latest status frame from `address`, if any
+        return self.statuses.get(address)
+
+    def invalidate(self, address=None, register=None):
+        with self.__lock:
+            for key in list(self.entries):
+                if (address is None or key[0] == address) and (register is None or key[1] == tuple(register)):
+                    del self.entries[key]
+            if register is None:
+                for key in list(self.statuses):
+                    if address is None or key == address:
+                        del self.statuses[key]
+
+    def control(self, address):
+        # A command changes what the pump is doing, not how it's set up, so
+        # only its status and live registers go
+        with self.__lock:
+            for key in list(self.entries):
+                if key[0] == address and key[1] in self.live:
+                    del self.entries[key]
+            self.statuses.pop(address, None)
+
+    def stats(self):
+        return {
+            'entries':  len(self.entries),
+            'statuses': len(self.statuses),
+            'hits':     self.hits,
+            'misses':   self.misses,
+            'writes':   self.writes,
+        }
@@ -0,0 +1,136 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+# Records every frame a Bus sends or receives to a compact binary file, for
+# looking at later instead of scraping DEBUG output:
+#
+#   bus = Bus('/dev/ttyUSB0', recorder=Recorder('pool.cap'))
+#   ...
+#   with Capture('pool.cap') as capture:
+#       for timestamp, direction, frame in capture:
+#           print(timestamp, direction, Packet(frame))
+#
+# A file is MAGIC followed by records, each a RECORD header -- monotonic
+# nanoseconds, direction, length -- and then the frame's bytes.  When a file
+# reaches max_bytes it becomes <path>.1, the older ones shift along, and
+# anything past `backups` is deleted.
+
+MAGIC   = b'PENTCAP1'
+RECORD  = struct.Struct('<QBH')
+RX      = 0
+TX      = 1
+
+class Recorder():
+    def __init__(self, path, max_bytes=64 * 2**20, backups=4):
+        self.path       = path
+        self.max_bytes  = max_bytes
+        self.backups    = backups
+        self.size       = 0
+        self.frames     = 0
+        self.rotations  = 0
+        self.__file     = None
+        self.__lock     = threading.Lock()
+
+    def open(self):
+        self.__file = open(self.path, 'ab')
+        if self.__file.tell() == 0:
+            self.__file.write(MAGIC)
+        self.size = self.__file.tell()
+
+    def record(self, direction, data):
+        length = RECORD.size + len(data)
+        with self.__lock:
+            if self.__file is None:
+                self.open()
+            if self.size + length > self.max_bytes and self.size > len(MAGIC):
+                self.rotate()
+            self.__file.write(RECORD.pack(time.monotonic_ns(), direction, len(data)))
+            self.__file.write(data)
+            self.size   += length
+            self.frames += 1
+
+    def rotate(self):
+        self.__file.close()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists('{}.{}'.format(self.path, index)):
+                os.replace('{}.{}'.format(self.path, index), '{}.{}'.format(self.path, index + 1))
+        if self.backups:
+            os.replace(self.path, self.path + '.1')
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self.open()
+
+    def flush(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Capture():
+    # Reads one capture file through mmap; frames come out as memoryviews into
+    # the mapping rather than copies
+    def __init__(self, path):
+        self.path   = path
+        self.__file = open(path, 'rb')
+        self.__map  = None
+        if os.fstat(self.__file.fileno()).st_size > 0:
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__view = memoryview(self.__map if self.__map is not None else b'')
+        if len(self.__view) > 0 and self.__view[0:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("{} isn't a capture file".format(path))
+
+    def __iter__(self):
+        # (timestamp in ns, RX or TX, frame) for each record; a record cut
+        # short, e.g. by a crash mid-write, ends the iteration
+        view    = self.__view
+        offset  = len(MAGIC)
+        end     = len(view)
+        while offset + RECORD.size <= end:
+            timestamp, direction, length = RECORD.unpack_from(view, offset)
+            offset += RECORD.size
+            if offset + length > end:
+                return
+            yield timestamp, direction, view[offset:offset + length]
+            offset += length
+
+    def close(self):
+        self.__view.release()
+        if self.__map is not None:
+            try:
+                self.__map.close()
+            except BufferError:
+                # Someone still holds a frame, e.g. a for loop's last value;
+                # the mapping goes away with the last of them instead
+                pass
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def files(path):
+    # A capture and its rotated backups, oldest first
+    backups = []
+    index = 1
+    while os.path.exists('{}.{}'.format(path, index)):
+        backups.insert(0, '{}.{}'.format(path, index))
+        index += 1
+    return backups + ([path] if os.path.exists(path) else [])
@@ -0,0 +1,151 @@
+import collections
+
+from .protocol import SETTING, SPEED_MODES
+
+# Every known SETTING register, grouped the way Pump, Program and Speed expose
+# them.  Each entry is (field, SETTING key, decoder) where the decoder turns
+# the register's raw 16-bit value into what the matching property returns.
+
+def hours_minutes(minutes):
+    return (int(minutes/60), minutes % 60)
+
+def minutes(time):
+    return 60 * time[0] + time[1]
+
+PUMP_REGISTERS = [
+    ('address',             'ADDRESS',              int),
+    ('ampm',                '24_HOUR',              lambda value: not value),
+    ('antifreeze_enable',   'ANTIFREEZE_ENABLE',    int),
+    ('antifreeze_rpm',      'ANTIFREEZE_RPM',       int),
+    ('antifreeze_temp',     'ANTIFREEZE_TEMP',      int),
+    ('celsius',             'CELSIUS',              int),
+    ('contrast',            'CONTRAST',             int),
+    ('gpm',                 'GPM',                  int),
+    ('max_speed',           'MAX_SPEED',            int),
+    ('min_speed',           'MIN_SPEED',            int),
+    ('password_enable',     'PASSWORD_ENABLE',      int),
+    ('password_timeout',    'PASSWORD_TIMEOUT',     int),
+    ('password',            'PASSWORD',             int),
+    ('prime_enable',        'PRIME_ENABLE',         int),
+    ('prime_delay',         'PRIME_DELAY',          int),
+    ('prime_max_time',      'PRIME_MAX_TIME',       int),
+    ('prime_sensitivity',   'PRIME_SENSITIVITY',    int),
+    ('quick_rpm',           'QUICK_RPM',            int),
+    ('quick_timer',         'QUICK_TIMER',          hours_minutes),
+    ('ramp',                'RAMP',                 int),
+    ('rpm',                 'ACTUAL_RPM',           int),
+    ('running_program',     'RUNNING_PROGRAM',      lambda value: int(value/8)),
+    ('set_timer',           'SET_TIMER',            int),
+    ('soft_prime_counter',  'SOFT_PRIME_COUNTER',   int),
+    ('svrs_alarm',          'SVRS_ALARM',           int),
+    ('svrs_restart_enable', 'SVRS_RESTART_ENABLE',  int),
+    ('svrs_restart_timer',  'SVRS_RESTART_TIMER',   int),
+    ('time_out_timer',      'TIME_OUT_TIMER',       hours_minutes),
+    ('trpm',                'TARGET_RPM',           int),
+]
+
+PROGRAM_REGISTERS = [
+    ('rpm',                 'PROGRAM_RPM',          int),
+    ('rpm_alt',             'PROGRAM_RPM_ALT',      int),
+]
+
+SPEED_REGISTERS = [
+    ('mode',                'SPEED_MODE',           SPEED_MODES.name),
+    ('rpm',                 'SPEED_RPM',            int),
+    ('schedule_start',      'SCHEDULE_START',       hours_minutes),
+    ('schedule_end',        'SCHEDULE_END',         hours_minutes),
+    ('egg_timer',           'EGG_TIMER',            hours_minutes),
+]
+
+# What Pump.configure may write, and how to turn a field's value back into the
+# register's raw value.  Live readings, runtime state and the address aren't
+# configuration, so they're left out.
+ENCODERS = {
+    '24_HOUR':              lambda state: int(not state),
+    'ANTIFREEZE_ENABLE':    int,
+    'ANTIFREEZE_RPM':       int,
+    'ANTIFREEZE_TEMP':      int,
+    'CELSIUS':              int,
+    'CONTRAST':             int,
+    'MAX_SPEED':            int,
+    'MIN_SPEED':            int,
+    'PASSWORD_ENABLE':      int,
+    'PASSWORD_TIMEOUT':     int,
+    'PASSWORD':             int,
+    'PRIME_ENABLE':         int,
+    'PRIME_DELAY':          int,
+    'PRIME_MAX_TIME':       int,
+    'PRIME_SENSITIVITY':    int,
+    'QUICK_RPM':            int,
+    'QUICK_TIMER':          minutes,
+    'RAMP':                 int,
+    'SVRS_RESTART_ENABLE':  int,
+    'SVRS_RESTART_TIMER':   int,
+    'TIME_OUT_TIMER':       minutes,
+    'PROGRAM_RPM':          int,
+    'PROGRAM_RPM_ALT':      int,
+    'SPEED_MODE':           lambda mode: SPEED_MODES[mode] if mode in SPEED_MODES else int(mode),
+    'SPEED_RPM':            int,
+    'SCHEDULE_START':       minutes,
+    'SCHEDULE_END':         minutes,
+    'EGG_TIMER':            minutes,
+}
+
+PROGRAMS    = range(1, 5)
+SPEEDS      = range(1, 9)
+
+PumpConfig      = collections.namedtuple('PumpConfig', [field for field, key, decode in PUMP_REGISTERS] + ['programs', 'speeds', 'elapsed'])
+ProgramConfig   = collections.namedtuple('ProgramConfig', ['index'] + [field for field, key, decode in PROGRAM_REGISTERS])
+SpeedConfig     = collections.namedtuple('SpeedConfig', ['index'] + [field for field, key, decode in SPEED_REGISTERS])
+
+def register(key, index=1):
+    return [SETTING[key][0], SETTING[key][1] + index - 1]
+
+def registers():
+    # (group, index, field, register, decoder) for every register in a snapshot
+    for field, key, decode in PUMP_REGISTERS:
+        yield None, None, field, register(key), decode
+    for index in PROGRAMS:
+        for field, key, decode in PROGRAM_REGISTERS:
+            yield 'programs', index, field, register(key, index), decode
+    for index in SPEEDS:
+        for field, key, decode in SPEED_REGISTERS:
+            yield 'speeds', index, field, register(key, index), decode
+
+def build(values, elapsed):
+    # `values` maps (group, index, field) to decoded register values
+    def group(config, indexes, fields, name):
+        return tuple(config(index, *[values[(name, index, field)] for field, key, decode in fields]) for index in indexes)
+    return PumpConfig(
+        *[values[(None, None, field)] for field, key, decode in PUMP_REGISTERS],
+        programs    = group(ProgramConfig, PROGRAMS, PROGRAM_REGISTERS, 'programs'),
+        speeds      = group(SpeedConfig, SPEEDS, SPEED_REGISTERS, 'speeds'),
+        elapsed     = elapsed
+        )
+
+def changes(desired):
+    # (key, register, decoder, raw value) for everything in `desired`, a dict
+    # shaped like a PumpConfig: {'ramp': 150, 'speeds': {3: {'rpm': 2000}}}.
+    # Keys are (group, index, field), the same as build() takes.
+    groups = {
+        'programs': (PROGRAMS, PROGRAM_REGISTERS),
+        'speeds':   (SPEEDS, SPEED_REGISTERS),
+    }
+    def fields(group, index, values, table):
+        known = {field: (key, decode) for field, key, decode in table}
+        for field, value in values.items():
+            if field not in known:
+                raise ValueError("Unknown field: {}".format(field))
+            key, decode = known[field]
+            if key not in ENCODERS:
+                raise ValueError("{} can't be configured".format(field))
+            yield (group, index, field), register(key, index or 1), decode, ENCODERS[key](value)
+    for field, value in desired.items():
+        if field in groups:
+            indexes, table = groups[field]
+            for index, values in value.items():
+                if index not in indexes:
+                    raise ValueError("No such {}: {}".format(field[:-1], index))
+                yield from fields(field, index, values, table)
+        else:
+            yield from fields(None, None, {field: value}, PUMP_REGISTERS)
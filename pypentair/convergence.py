@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# Waits for a pump to get where it was told to go.  The command goes out once;
+# after that we only watch status, polling often when the pump is about to
+# arrive and rarely while it's still a long way off.
+#
+#   future = converge(pump.refresh, lambda status: status['rpm'] == 2000, ramping(2000, 200))
+#   future.result()             # The status that showed it got there
+#   future.value, future.polls  # Progress so far, readable at any time
+
+MIN_INTERVAL    = 0.05  # Seconds; no point asking faster than the pump answers
+MAX_INTERVAL    = 1
+TIMEOUT         = 120
+
+def backoff(interval=MIN_INTERVAL):
+    # For changes we can't predict, like the drive starting: ask quickly at
+    # first, then less and less often
+    def next_interval(status):
+        nonlocal interval
+        current, interval = interval, min(interval * 2, MAX_INTERVAL)
+        return current
+    return next_interval
+
+def ramping(target, rate):
+    # About twice in whatever time the ramp (RPM per second) still needs
+    if not rate:
+        return backoff()
+    def next_interval(status):
+        if not status:
+            return MIN_INTERVAL
+        return min(max(abs(target - status['rpm']) / rate / 2, MIN_INTERVAL), MAX_INTERVAL)
+    return next_interval
+
+def converge(poll, reached, interval=None, timeout=TIMEOUT, progress=None):
+    # Calls poll() until reached() is happy with what it returns, on a thread
+    # of its own.  The Future fails with ValueError if the deadline passes.
+    interval = interval or backoff()
+    future = Future()
+    future.value = None
+    future.polls = 0
+    def run():
+        deadline = time.monotonic() + timeout
+        future.set_running_or_notify_cancel()
+        try:
+            while True:
+                future.value = poll()
+                future.polls += 1
+                if progress is not None:
+                    progress(future.value)
+                if reached(future.value):
+                    future.set_result(future.value)
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ValueError("Not there after {}s; last saw {}".format(timeout, future.value))
+                time.sleep(min(interval(future.value), remaining))
+        except Exception as e:
+            future.set_exception(e)
+    threading.Thread(target=run, name='pypentair-converge', daemon=True).start()
+    return future
+
+async def converge_async(poll, reached, interval=None, timeout=TIMEOUT, progress=None):
+    # The same, for a coroutine poll(); returns the status that got there.
+    # asyncio is only imported here, so blocking users never load it.
+    import asyncio
+    interval = interval or backoff()
+    deadline = time.monotonic() + timeout
+    while True:
+        value = await poll()
+        if progress is not None:
+            progress(value)
+        if reached(value):
+            return value
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ValueError("Not there after {}s; last saw {}".format(timeout, value))
+        await asyncio.sleep(min(interval(value), remaining))
@@ -0,0 +1,91 @@
+import collections
+import threading
+from concurrent.futures import Future
+
+from .protocol import ACTIONS
+
+# Sorts decoded frames on a shared bus.  A reply goes to whoever is waiting on
+# its (src, dst, action); anything else -- controller broadcasts, other
+# masters' traffic, our own echo -- lands in a bounded backlog.  Subscribers
+# see every frame either way.
+
+class Demultiplexer():
+    def __init__(self, backlog=256):
+        self.pending        = {}    # (src, dst, action) of the expected reply -> [Future, ...]
+        self.subscribers    = []
+        self.backlog        = collections.deque(maxlen=backlog)
+        self.matched        = 0
+        self.unmatched      = 0
+        self.errors         = 0     # Subscriber calls that raised
+        self.__lock         = threading.Lock()
+
+    def expect(self, request):
+        future = Future()
+        future.request = request
+        future.set_running_or_notify_cancel()
+        key = (request.dst, request.src, request.action)
+        with self.__lock:
+            self.pending.setdefault(key, []).append(future)
+        return future
+
+    def cancel(self, future):
+        # Stop waiting, e.g. after a timeout; a late reply goes to the backlog
+        request = future.request
+        key = (request.dst, request.src, request.action)
+        with self.__lock:
+            waiters = self.pending.get(key, [])
+            if future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self.pending[key]
+
+    def subscribe(self, callback):
+        # Copy on write, so feed() can walk the list while other threads
+        # come and go
+        with self.__lock:
+            self.subscribers = self.subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        with self.__lock:
+            subscribers = list(self.subscribers)
+            subscribers.remove(callback)
+            self.subscribers = subscribers
+
+    def feed(self, packet):
+        for subscriber in self.subscribers:
+            try:
+                subscriber(packet)
+            except Exception:
+                # One broken subscriber mustn't cost anyone else their frames,
+                # or the reply that follows
+                self.errors += 1
+        future = self.__claim(packet)
+        if future is None:
+            self.unmatched += 1
+            self.backlog.append(packet)
+        else:
+            self.matched += 1
+            future.set_result(packet)
+
+    def expecting(self, packet):
+        # Whether `packet` would answer someone waiting on a reply
+        key = (packet.src, packet.dst, packet.action)
+        with self.__lock:
+            if key in self.pending:
+                return True
+            return packet.action == ACTIONS['ERROR'] and any(k[0:2] == key[0:2] for k in self.pending)
+
+    def __claim(self, packet):
+        key = (packet.src, packet.dst, packet.action)
+        with self.__lock:
+            if key not in self.pending and packet.action == ACTIONS['ERROR']:
+                # An error answers whatever we last asked that device
+                key = next((k for k in self.pending if k[0:2] == key[0:2]), None)
+            waiters = self.pending.get(key)
+            if not waiters:
+                return None
+            future = waiters.pop(0)
+            if not waiters:
+                del self.pending[key]
+        return future
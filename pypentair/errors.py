@@ -0,0 +1,25 @@
+# Everything pypentair raises about the bus derives from PentairError, and
+# also from the builtin that used to be raised in its place, so existing
+# `except ValueError` and `except TimeoutError` handlers still work.
+
+class PentairError(Exception):
+    pass
+
+class ResponseTimeout(PentairError, TimeoutError):
+    # Nothing came back before the deadline
+    pass
+
+class ChecksumError(PentairError, ValueError):
+    # A frame, quite possibly our reply, arrived damaged
+    pass
+
+class ResponseMismatch(PentairError, ValueError):
+    # Something answered, but not what we asked
+    pass
+
+class ErrorResponse(PentairError, ValueError):
+    # The pump answered with ACTIONS['ERROR']
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response   = response
+        self.code       = response.data[0] if response.data else None
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import ACTIONS, ADDRESSES, Packet, Pump, ResponseMismatch
+
+# Polls PUMP_STATUS from every pump on every bus at once: one worker per bus,
+# with each bus's requests pipelined and a short timeout per pump, so a sweep
+# takes as long as the slowest bus rather than the sum of all the pumps.
+#
+#   fleet = Fleet({'pool': Bus('/dev/ttyUSB0'), 'spa': Bus('/dev/ttyUSB1')})
+#   for (bus, index), result in fleet.poll_all().items():
+#       print(bus, index, result['status'], result['latency'], result['error'])
+
+INDEXES = range(1, 17)
+
+class Fleet():
+    # `pumps` maps bus names to the pump indexes on that bus; buses without an
+    # entry are assumed to be fully populated.
+    def __init__(self, buses, pumps=None, timeout=0.25, depth=1):
+        self.buses      = buses
+        self.pumps      = {name: list((pumps or {}).get(name, INDEXES)) for name in buses}
+        self.timeout    = timeout   # Seconds to wait for any one pump
+        self.depth      = depth     # Requests in flight at once on each bus
+        self.elapsed    = None      # How long the last sweep took
+        self.__pool     = ThreadPoolExecutor(max_workers=len(buses), thread_name_prefix='pypentair-fleet')
+
+    def poll(self, name):
+        bus     = self.buses[name]
+        indexes = self.pumps[name]
+        packets = [Packet(dst=ADDRESSES['INTELLIFLO_PUMP_' + str(index)], action=ACTIONS['PUMP_STATUS']) for index in indexes]
+        results = {}
+        try:
+            futures = bus.pipeline(packets, priority='BACKGROUND', timeout=self.timeout, depth=self.depth)
+        except Exception as e:
+            return {(name, index): {'status': None, 'latency': None, 'error': e} for index in indexes}
+        for index, future in zip(indexes, futures):
+            error = future.exception()
+            if error is None:
+                status = Pump.decode_status(future.result())
+                if status is False:
+                    error = ResponseMismatch("Pump answered with {}".format(future.result()))
+            results[(name, index)] = {
+                'status':   None if error else status,
+                'latency':  getattr(future, 'latency', None),
+                'error':    error,
+            }
+        return results
+
+    def poll_all(self):
+        start   = time.monotonic()
+        results = {}
+        for result in self.__pool.map(self.poll, self.buses):
+            results.update(result)
+        self.elapsed = time.monotonic() - start
+        return results
+
+    def close(self):
+        self.__pool.shutdown()
+
+def poll_all(buses, pumps=None, timeout=0.25, depth=1):
+    fleet = Fleet(buses, pumps, timeout, depth)
+    try:
+        return fleet.poll_all()
+    finally:
+        fleet.close()
@@ -0,0 +1,284 @@
+import argparse
+import errno
+import os
+import queue
+import socket
+import socketserver
+import stat
+import threading
+
+import pypentair
+from . import CONTROL_ACTIONS, PRIORITIES, Bus, Packet
+from .sniffer import PUMPS
+from .transport import GATEWAY_FRAME, GATEWAY_HEADER, GATEWAY_PRIORITY, GATEWAY_SUBSCRIBE
+
+# Owns the one Bus on a port and shares it with any number of local clients
+# over TCP or a Unix socket, so every tool, cron job and dashboard doesn't
+# have to live in the same process:
+#
+#   python -m pypentair.gateway /dev/ttyUSB0 --listen /tmp/pypentair.sock
+#
+# and then, anywhere else:
+#
+#   bus = Bus(GatewayTransport('/tmp/pypentair.sock'))
+#   Pump(1, bus).rpm
+#
+# Requests from every client go through the gateway's Bus one at a time, most
+# urgent first (see GatewayTransport's `priority`), and identical reads share
+# one transaction.  Frames nobody will answer -- broadcasts, or anything not
+# for a pump -- just go out on the wire.  A client that subscribes also hears
+# everything else on the wire -- controller broadcasts, other masters -- but
+# never anyone else's replies.  Each client has its own outbox, so one that
+# stops reading is cut off rather than stalling the bus.
+
+ADDRESS = ('127.0.0.1', 4815)
+BACKLOG = 1024      # Frames a client can fall behind by before it's cut off
+
+def address(text):
+    # host:port for TCP, anything else is a Unix socket path
+    host, colon, port = text.rpartition(':')
+    if colon and port.isdigit() and '/' not in text:
+        return (host or '127.0.0.1', int(port))
+    return text
+
+def stale(path):
+    # True if `path` is a Unix socket that nothing is listening on any more
+    if not stat.S_ISSOCK(os.stat(path).st_mode):
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        return True
+    finally:
+        probe.close()
+    return False
+
+class Client():
+    def __init__(self, connection, backlog=BACKLOG):
+        self.connection = connection
+        self.outbox     = queue.Queue(backlog)
+        self.closed     = False
+        self.priority   = 'USER'    # For anything that isn't a control command
+        threading.Thread(target=self.drain, name='pypentair-gateway-client', daemon=True).start()
+
+    def send(self, frame):
+        # From the bus's I/O thread, so it never blocks.  False if that was
+        # one frame too many and the client has been cut off.
+        if self.closed:
+            return True
+        try:
+            self.outbox.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.close()
+            return False
+
+    def drain(self):
+        while not self.closed:
+            frame = self.outbox.get()
+            if frame is None:
+                return
+            try:
+                self.connection.sendall(GATEWAY_HEADER.pack(GATEWAY_FRAME, len(frame)) + frame)
+            except OSError:
+                self.close()
+
+    def close(self):
+        # Wakes both the drain thread and Gateway.serve, which finish up
+        self.closed = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.outbox.put_nowait(None)
+        except queue.Full:
+            pass
+
+class Gateway():
+    def __init__(self, bus, address=ADDRESS, backlog=BACKLOG):
+        self.bus            = bus
+        self.address        = address   # Where we listen; a port of 0 is filled in by start()
+        self.backlog        = backlog
+        self.clients        = []
+        self.subscribers    = []        # Copy on write, like the demux's
+        self.requests       = 0
+        self.replies        = 0
+        self.forwarded      = 0         # Frames sent without waiting for a reply
+        self.failures       = 0         # Requests the bus couldn't get an answer to
+        self.corrupt        = 0         # Client frames that failed their checksum
+        self.broadcasts     = 0         # Frames fanned out to subscribers
+        self.cut_off        = 0         # Clients dropped for falling too far behind
+        self.__lock         = threading.Lock()
+        self.__server       = None
+        self.__socket       = None      # (device, inode) of the Unix socket we made
+
+    def start(self):
+        gateway = self
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                gateway.serve(self.request)
+        if isinstance(self.address, tuple):
+            server = socketserver.ThreadingTCPServer(self.address, Handler, bind_and_activate=False)
+            server.allow_reuse_address = True
+        else:
+            if os.path.exists(self.address):
+                if not stale(self.address):
+                    raise OSError(errno.EADDRINUSE, "Already in use, or not a socket", self.address)
+                os.remove(self.address)     # Left over from a gateway that died
+            server = socketserver.ThreadingUnixStreamServer(self.address, Handler, bind_and_activate=False)
+        server.daemon_threads = True
+        try:
+            server.server_bind()
+            server.server_activate()
+        except OSError:
+            server.server_close()
+            raise
+        self.address = server.server_address
+        self.__server = server
+        if not isinstance(self.address, tuple):
+            info = os.stat(self.address)
+            self.__socket = (info.st_dev, info.st_ino)
+        self.bus.subscribe(self.hear)
+        self.bus.start()
+        threading.Thread(target=server.serve_forever, name='pypentair-gateway', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.__server is None:
+            return
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__server = None
+        self.bus.unsubscribe(self.hear)
+        for client in list(self.clients):
+            client.close()
+        if self.__socket is not None:
+            # Unless someone has since replaced it with their own
+            try:
+                info = os.stat(self.address)
+                if (info.st_dev, info.st_ino) == self.__socket:
+                    os.remove(self.address)
+            except FileNotFoundError:
+                pass
+            self.__socket = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve(self, connection):
+        # One client, on its own thread, for as long as it stays connected
+        if isinstance(self.address, tuple):
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = Client(connection, self.backlog)
+        self.clients.append(client)
+        try:
+            while True:
+                header = self.receive(connection, GATEWAY_HEADER.size)
+                if header is None:
+                    return
+                kind, length = GATEWAY_HEADER.unpack(header)
+                body = self.receive(connection, length)
+                if body is None:
+                    return
+                if kind == GATEWAY_SUBSCRIBE:
+                    with self.__lock:
+                        self.subscribers = self.subscribers + [client]
+                elif kind == GATEWAY_PRIORITY:
+                    name = body.decode(errors='replace')
+                    if name in PRIORITIES:
+                        client.priority = name
+                elif kind == GATEWAY_FRAME:
+                    self.request(client, body)
+        finally:
+            with self.__lock:
+                self.subscribers = [subscriber for subscriber in self.subscribers if subscriber is not client]
+            self.clients.remove(client)
+            client.close()
+
+    def receive(self, connection, size):
+        # Exactly `size` bytes, or None once the client hangs up
+        data = bytearray()
+        while len(data) < size:
+            try:
+                chunk = connection.recv(size - len(data))
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def request(self, client, frame):
+        try:
+            packet = Packet(frame)
+        except ValueError:
+            self.corrupt += 1
+            return
+        if packet.dst not in PUMPS:
+            # Nothing will come back, so there's nothing to wait for
+            self.forwarded += 1
+            try:
+                self.bus.write(packet.raw)
+            except OSError:
+                self.failures += 1
+            return
+        self.requests += 1
+        priority = 'CONTROL' if packet.action in CONTROL_ACTIONS else client.priority
+        def reply(future):
+            # Nothing goes back on a failure; the client's own Bus times out
+            # and retries as it would on the wire
+            if future.cancelled() or future.exception() is not None:
+                self.failures += 1
+                return
+            self.replies += 1
+            self.send(client, future.result().raw)
+        self.bus.submit(packet, priority).add_done_callback(reply)
+
+    def hear(self, packet):
+        # Everything the gateway's bus hears, bar the replies it's waiting on
+        subscribers = self.subscribers
+        if not subscribers or self.bus.demux.expecting(packet):
+            return
+        self.broadcasts += 1
+        for client in subscribers:
+            self.send(client, packet.raw)
+
+    def send(self, client, frame):
+        if not client.send(frame):
+            self.cut_off += 1
+
+    def stats(self):
+        return {
+            'clients':      len(self.clients),
+            'subscribers':  len(self.subscribers),
+            'requests':     self.requests,
+            'replies':      self.replies,
+            'forwarded':    self.forwarded,
+            'failures':     self.failures,
+            'corrupt':      self.corrupt,
+            'broadcasts':   self.broadcasts,
+            'cut_off':      self.cut_off,
+            'coalesced':    self.bus.coalesced,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Share one pypentair bus with many local clients")
+    parser.add_argument('port', nargs='?', default='/dev/ttyUSB0', help="serial port the pumps are on")
+    parser.add_argument('-l', '--listen', type=address, default=ADDRESS, help="host:port or Unix socket path to listen on (default {}:{})".format(*ADDRESS))
+    args = parser.parse_args()
+    pypentair.DEBUG = False
+    with Gateway(Bus(args.port), args.listen) as gateway:
+        print("Listening on", gateway.address, flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    print(gateway.stats())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import bisect
+import threading
+
+from .protocol import ACTIONS, ADDRESSES
+
+# Counts what happens on a bus: how long each kind of transaction takes, how
+# many time out or come back as errors, how many bytes go each way and how
+# many frames fail their checksum.  Nothing is counted unless a bus has one:
+#
+#   metrics = Metrics()
+#   bus     = Bus('/dev/ttyUSB0', metrics=metrics)
+#   metrics.stats()                 # Pull it, or
+#   metrics.serve(9105)             # let Prometheus scrape it
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)   # Seconds
+
+class Histogram():
+    def __init__(self, buckets=BUCKETS):
+        self.buckets    = buckets
+        self.counts     = [0] * (len(buckets) + 1)     # The last is everything past the top bucket
+        self.count      = 0
+        self.sum        = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # The upper bound of the bucket holding the q'th observation
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+class Metrics():
+    def __init__(self, buckets=BUCKETS):
+        self.buckets        = buckets
+        self.latency        = {}    # (address, action) -> Histogram
+        self.timeouts       = {}    # (address, action) -> count
+        self.errors         = {}    # (address, error code) -> count
+        self.retries        = {}    # (address, action) -> count
+        self.bytes_sent     = 0
+        self.bytes_received = 0
+        self.buses          = []
+        self.__lock         = threading.Lock()
+
+    def watch(self, bus):
+        # For the counters a bus's Decoder already keeps
+        if bus not in self.buses:
+            self.buses.append(bus)
+
+    def transaction(self, future):
+        # Bus.finish calls this for every request it completes, however it was
+        # submitted, with the Future of its last attempt
+        key = (future.request.dst, future.request.action)
+        error = future.exception()
+        with self.__lock:
+            if isinstance(error, TimeoutError):
+                self.timeouts[key] = self.timeouts.get(key, 0) + 1
+            if error is not None:
+                return
+            if key not in self.latency:
+                self.latency[key] = Histogram(self.buckets)
+            self.latency[key].observe(future.latency)
+            response = future.result()
+            if response.action == ACTIONS['ERROR']:
+                code = (response.src, response.data[0] if response.data else None)
+                self.errors[code] = self.errors.get(code, 0) + 1
+
+    def retry(self, request):
+        key = (request.dst, request.action)
+        with self.__lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def sent(self, size):
+        self.bytes_sent += size
+
+    def received(self, size):
+        self.bytes_received += size
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'transactions':     {key: {
+                                        'count':    histogram.count,
+                                        'mean':     histogram.sum / histogram.count,
+                                        'p50':      histogram.quantile(0.5),
+                                        'p99':      histogram.quantile(0.99),
+                                    } for key, histogram in self.latency.items()},
+                'timeouts':         dict(self.timeouts),
+                'errors':           dict(self.errors),
+                'retries':          dict(self.retries),
+                'bytes_sent':       self.bytes_sent,
+                'bytes_received':   self.bytes_received,
+                'checksum_failures': sum(bus.decoder.corrupt for bus in self.buses),
+                'dropped_frames':   sum(bus.decoder.dropped for bus in self.buses),
+                'coalesced':        sum(getattr(bus, 'coalesced', 0) for bus in self.buses),
+            }
+
+    def render(self):
+        # Prometheus text exposition format
+        def labels(address, action=None, code=None):
+            pairs = [('address', ADDRESSES.name(address))]
+            if action is not None:
+                pairs.append(('action', ACTIONS.name(action)))
+            if code is not None:
+                pairs.append(('code', code))
+            return ','.join('{}="{}"'.format(name, value) for name, value in pairs)
+        lines = []
+        def metric(name, kind, help, samples):
+            lines.append('# HELP {} {}'.format(name, help))
+            lines.append('# TYPE {} {}'.format(name, kind))
+            lines.extend(samples)
+        with self.__lock:
+            samples = []
+            for (address, action), histogram in sorted(self.latency.items()):
+                label = labels(address, action)
+                seen = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    seen += count
+                    samples.append('pypentair_transaction_seconds_bucket{{{},le="{}"}} {}'.format(label, bound, seen))
+                samples.append('pypentair_transaction_seconds_sum{{{}}} {}'.format(label, histogram.sum))
+                samples.append('pypentair_transaction_seconds_count{{{}}} {}'.format(label, histogram.count))
+            metric('pypentair_transaction_seconds', 'histogram', 'Time from request to reply.', samples)
+            metric('pypentair_timeouts_total', 'counter', 'Requests that got no reply in time.',
+                ['pypentair_timeouts_total{{{}}} {}'.format(labels(*key), count) for key, count in sorted(self.timeouts.items())])
+            metric('pypentair_retries_total', 'counter', 'Requests sent again after a failure.',
+                ['pypentair_retries_total{{{}}} {}'.format(labels(*key), count) for key, count in sorted(self.retries.items())])
+            metric('pypentair_error_replies_total', 'counter', 'ERROR replies, by error code.',
+                ['pypentair_error_replies_total{{{}}} {}'.format(labels(address, code=code), count) for (address, code), count in sorted(self.errors.items(), key=str)])
+        metric('pypentair_bytes_total', 'counter', 'Bytes on the wire.', [
+            'pypentair_bytes_total{{direction="sent"}} {}'.format(self.bytes_sent),
+            'pypentair_bytes_total{{direction="received"}} {}'.format(self.bytes_received),
+            ])
+        metric('pypentair_checksum_failures_total', 'counter', 'Frames dropped for a bad checksum.', [
+            'pypentair_checksum_failures_total {}'.format(sum(bus.decoder.corrupt for bus in self.buses)),
+            ])
+        metric('pypentair_coalesced_total', 'counter', 'Reads answered by a transaction already in flight.', [
+            'pypentair_coalesced_total {}'.format(sum(getattr(bus, 'coalesced', 0) for bus in self.buses)),
+            ])
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9105, address='127.0.0.1'):
+        # Serves render() over HTTP on a daemon thread; returns the server,
+        # whose shutdown() stops it.  http.server is only imported here, as it
+        # drags in half the standard library.
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        server = ThreadingHTTPServer((address, port), Handler)
+        threading.Thread(target=server.serve_forever, name='pypentair-metrics', daemon=True).start()
+        return server
@@ -0,0 +1,255 @@
+# The IntelliFlo/EasyTouch wire protocol, as far as we've worked it out.
+#
+# Code tables are Codes: ordinary NAME -> code dicts that can also be read
+# backwards in constant time.  The reverse tables are built once, here, at
+# import and cover every code listed, even where one name has two codes.
+
+class Codes(dict):
+    def __init__(self, pairs):
+        super().__init__(pairs)
+        self.table  = [None] * 256      # code -> name, for dispatch on a raw byte
+        self.codes  = {}                # name -> every code carrying that name
+        for name, code in pairs:
+            self.table[code] = name
+            self.codes.setdefault(name, []).append(code)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def name(self, code):
+        # Unknown codes come back as-is, same as lookup() always did
+        if isinstance(code, int) and 0 <= code < len(self.table):
+            return self.table[code] or code
+        return code
+
+PACKET_FIELDS = {
+    'PACKET_HEADER_0':  0,
+    'PACKET_HEADER_1':  1,
+    'PACKET_HEADER_2':  2,
+    'PAYLOAD_HEADER':   3,
+    'VERSION':          4,
+    'DST':              5,
+    'SRC':              6,
+    'ACTION':           7,
+    'DATA_LENGTH':      8,
+    'DATA':             9,
+}
+
+ADDRESSES = Codes([
+    ('BROADCAST',                    0x0F),
+    ('SUNTOUCH',                     0x10),
+    ('EASYTOUCH',                    0x20),
+    ('REMOTE_CONTROLLER',            0x21),
+    ('REMOTE_WIRELESS_CONTROLLER',   0x22),
+    ('QUICKTOUCH',                   0x48),
+    ('INTELLIFLO_PUMP_1',            0x60),
+    ('INTELLIFLO_PUMP_2',            0x61),
+    ('INTELLIFLO_PUMP_3',            0x62),
+    ('INTELLIFLO_PUMP_4',            0x63),
+    ('INTELLIFLO_PUMP_5',            0x64),
+    ('INTELLIFLO_PUMP_6',            0x65),
+    ('INTELLIFLO_PUMP_7',            0x66),
+    ('INTELLIFLO_PUMP_8',            0x67),
+    ('INTELLIFLO_PUMP_9',            0x68),
+    ('INTELLIFLO_PUMP_10',           0x69),
+    ('INTELLIFLO_PUMP_11',           0x6A),
+    ('INTELLIFLO_PUMP_12',           0x6B),
+    ('INTELLIFLO_PUMP_13',           0x6C),
+    ('INTELLIFLO_PUMP_14',           0x6D),
+    ('INTELLIFLO_PUMP_15',           0x6E),
+    ('INTELLIFLO_PUMP_16',           0x6F),
+])
+
+SRC = ADDRESSES['REMOTE_CONTROLLER']
+
+BROADCAST_ACTIONS = Codes([
+    ('ACK_MESSAGE',                  0x01),
+
+    ('CONTROLLER_STATUS',            0x02),
+    ('DELAY_CANCEL',                 0x03),
+    ('DATE_TIME',                    0x05),
+    ('PUMP_STATUS',                  0x07),
+    ('HEATER_TEMPERATURE_STATUS',    0x08),
+    ('CUSTOM_NAMES',                 0x0A),
+    ('CIRCUIT_NAMES',                0x0B),
+    ('HEATER_PUMP_STATUS',           0x10),
+    ('SCHEDULE_DETAILS',             0x11),
+    ('INTELLICHEM',                  0x12),
+    ('INTELLIFLO_SPA_SIDE_CONTROL',  0x16),
+    ('PUMP_STATUS_2',                0x17), # Differentation with 0x07?
+    ('PUMP_CONFIG',                  0x18),
+    ('INTELLICHLOR_STATUS',          0x19),
+    ('PUMP_CONFIG_EXTENDED',         0x1B),
+    ('VALVE_STATUS',                 0x1D),
+    ('HIGH_SPEED_VALVE_CIRCUITS',    0x1E),
+    ('IS4_IS10',                     0x20),
+    ('INTELLIFLO_SPA_SIDE_REMOTE',   0x21),
+    ('HEATER_PUMP_STATUS',           0x22),
+    ('DELAY_STATUS',                 0x23),
+    ('LIGHT_GROUPS',                 0x27),
+    ('HEAT_SETTINGS',                0x28),
+
+    ('SET_COLOR',                    0x60),
+])
+
+# For STATUS (0x02) through HEAT_SETTINGS (0x28):
+# - Add 0x80 for Setter
+#SET = 0x80
+# - Add 0xC0 for Getter
+#GET = 0xC0
+
+ACTIONS = Codes([
+    ('ACK_MESSAGE',      0x00),
+    ('SET',              0x01),
+    ('GET',              0x02),
+    ('GET_TIME',         0x03),
+    ('REMOTE_CONTROL',   0x04),
+    ('PUMP_SPEED',       0x05),
+    ('PUMP_POWER',       0x06),
+    ('PUMP_STATUS',      0x07),
+    ('__0x08__',         0x08),
+    ('__0x09__',         0x09),
+    ('__0x0A__',         0x0A),
+    ('SET_DATETIME',     0x85), # Need to figure out how these align with the BROADCAST_ACTIONS, GET, and SET
+    ('GET_DATETIME',     0xC5),
+    ('GET_PUMP_STATUS',  0xC7),
+    ('GET_SCHEDULE_DETAILS', 0xD1),
+    ('GET_PUMP_CONFIG',  0xD8),
+    ('ERROR',            0xFF),
+])
+
+PUMP_STATUS_FIELDS = {
+    'RUN':                  0,
+    'MODE':                 1,
+    'DRIVE_STATE':          2,
+    'WATTS_H':              3,
+    'WATTS_L':              4,
+    'RPM_H':                5,
+    'RPM_L':                6,
+    'GPM':                  7,
+    'PPC':                  8,
+    'UNKNOWN':              9,
+    'ERROR':                10,
+    'REMAINING_TIME_H':     11,
+    'REMAINING_TIME_M':     12,
+    'CLOCK_TIME_H':         13,
+    'CLOCK_TIME_M':         14
+}
+
+PUMP_SPEED = Codes([
+    ('SPEED_1',      0x02),
+    ('SPEED_2',      0x03),
+    ('SPEED_3',      0x04),
+    ('SPEED_4',      0x05),
+    ('SPEED_5',      0x06),
+    ('SPEED_6',      0x07),
+    ('SPEED_7',      0x08),
+    ('SPEED_8',      0x09),
+    ('QUICK_CLEAN',  0x0a),
+    ('TIME_OUT',     0x0b),
+])
+
+SPEED_MODES = Codes([
+    ('MANUAL',       0),
+    ('EGG_TIMER',    1),
+    ('SCHEDULE',     2),
+    ('DISABLED',     3),
+])
+
+SETTING = {
+    #                       [0x01, 0xC4],   # 100
+    #                       [0x01, 0xFE],   # Changes often, generally in increments of 0x40.
+
+    'ACTUAL_RPM':           [0x02, 0x06],
+    #                       [0x02, 0x0A],   # Always just a bit lower than Watts from PUMP_STATUS
+    #                       [0x02, 0x1A],   # [0x00, 0x00] to [0x51, 0x07] on SVRS alarm, back to 0 on reprime
+    'SVRS_ALARM':           [0x02, 0x1C],   # [0x00, 0x00] to [0xff, 0xff] on SVRS alarm, back to 0 on reprime
+    'CONTRAST':             [0x02, 0xBD],
+    'ADDRESS':              [0x02, 0xC0],
+    'TARGET_RPM':           [0x02, 0xC4],
+    'RAMP':                 [0x02, 0xD1],
+    'PRIME_DELAY':          [0x02, 0xD2],
+    'GPM':                  [0x02, 0xE4],
+
+    #                       [0x03, 0x00],   # 7860
+    #                       [0x03, 0x16],   # 1600
+    'PRIME_SENSITIVITY':    [0x03, 0x17],
+    #                       [0x03, 0x18],   # 50    # Vacuum Flow?
+    #                       [0x03, 0x19],   # 55    # Max Priming Flow?
+    'SVRS_RESTART_TIMER':   [0x03, 0x1A],
+    'SVRS_RESTART_ENABLE':  [0x03, 0x1B],
+    'RUNNING_PROGRAM':      [0x03, 0x21],
+    #                       [0x03, 0x22],   # 0
+    #                       [0x03, 0x23],   # 0
+    #                       [0x03, 0x24],   # 0
+    #                       [0x03, 0x25],   # 0
+    #                       [0x03, 0x26],   # 0
+    'PROGRAM_RPM':          [0x03, 0x27],   # Through [0x03, 0x2A] -- offset by Program #
+    'SET_TIMER':            [0x03, 0x2B],
+    #                       [0x03, 0x2C],   # 2
+    #                       [0x03, 0x2D],   # 1
+    #                       [0x03, 0x2E],   # 0
+    'CELSIUS':              [0x03, 0x30],
+    '24_HOUR':              [0x03, 0x31],
+    #                       [0x03, 0x34],   # 3445
+    #                       [0x03, 0x35],   # 1115
+    #                       [0x03, 0x36],   # 10  Error 25 if I try to set it to anything
+    #                       [0x03, 0x37],   # 1
+    #                       [0x03, 0x38],   # 0
+    #                       [0x03, 0x39],   # 3445
+    #                       [0x03, 0x3A],   # 1115
+    #                       [0x03, 0x3B],   # 10  Error 25 if I try to set it to anything
+    #                       [0x03, 0x3C],   # 2
+    #                       [0x03, 0x3D],   # 0
+    #                       [0x03, 0x3E],   # 0
+    'SPEED_MODE':           [0x03, 0x85],   # Through [0x03, 0x8C] -- offset by Speed #
+    'SPEED_RPM':            [0x03, 0x8D],   # Through [0x03, 0x94] -- offset by Speed #
+    'SCHEDULE_START':       [0x03, 0x95],   # Through [0x03, 0x9C] -- offset by Speed #
+    'SCHEDULE_END':         [0x03, 0x9D],   # Through [0x03, 0xA4] -- offset by Speed #
+    'EGG_TIMER':            [0x03, 0xA5],   # Through [0x03, 0xAC] -- offset by Speed #
+    'TIME_OUT_TIMER':       [0x03, 0xAD],
+    'QUICK_RPM':            [0x03, 0xAE],
+    'QUICK_TIMER':          [0x03, 0xAF],
+    'ANTIFREEZE_ENABLE':    [0x03, 0xB0],
+    'ANTIFREEZE_RPM':       [0x03, 0xB1],
+    'ANTIFREEZE_TEMP':      [0x03, 0xB2],
+    'PRIME_ENABLE':         [0x03, 0xB3],
+    #                       [0x03, 0xB4],   # 3450 Prime RPM?
+    'PRIME_MAX_TIME':       [0x03, 0xB5],
+    'MIN_SPEED':            [0x03, 0xB6],
+    'MAX_SPEED':            [0x03, 0xB7],
+    'PASSWORD_ENABLE':      [0x03, 0xB8],
+    'PASSWORD_TIMEOUT':     [0x03, 0xB9],
+    'PASSWORD':             [0x03, 0xBA],
+    'PROGRAM_RPM_ALT':      [0x03, 0xBB],   # Through [0x03, 0xBE] -- offset by Program #
+    #                       [0x03, 0xC0],   # 1
+    #                       [0x03, 0xC1],   # 1
+    #                       [0x03, 0xC2],   # 1441
+    #                       [0x03, 0xC3],   # 0
+    'SOFT_PRIME_COUNTER':   [0x03, 0xC4],   # Error 11 when trying to set.
+}
+
+PUMP_POWER = {
+    False:  0x04,
+    True:   0x0A,
+}
+
+REMOTE_CONTROL_MODES = {
+    False:  0x00,
+    True:   0xff
+}
+
+WEEKDAYS = {
+    'SUNDAY':       1,
+    'MONDAY':       2,
+    'TUESDAY':      4,
+    'WEDNESDAY':    8,
+    'THURSDAY':     16,
+    'FRIDAY':       32,
+    'SATURDAY':     64,
+}
+
+# SCHEDULE_DAYS are WEEKDAYS + 128 as the most significant bit of the mask is always high
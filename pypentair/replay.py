@@ -0,0 +1,129 @@
+import argparse
+import itertools
+import time
+
+import pypentair
+from . import Decoder
+from .capture import MAGIC, RX, TX, Capture
+from .sniffer import Sniffer
+from .transport import PtyTransport
+
+# Plays recorded traffic -- capture files or raw serial dumps -- back through
+# the same Decoder a Bus uses, in real time, N times faster, or as fast as it
+# will go:
+#
+#   replay  = Replay('pool.cap', speed=10)
+#   sniffer = Sniffer(None)
+#   replay.run(sniffer.feed)
+#
+# or as a device on a pty, for client code to talk to:
+#
+#   python -m pypentair.replay pool.cap --pty
+
+BAUDRATE    = 9600
+BYTE_NS     = 10 * 10**9 // BAUDRATE    # Start, eight data and stop bits
+CHUNK       = 32                        # Bytes of a raw dump to play at a time
+
+def records(path):
+    # (timestamp in ns, RX or TX, bytes) from a capture file, or from a raw
+    # dump timed as if it were coming off the wire at BAUDRATE
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            for offset in itertools.count(0, CHUNK):
+                data = f.read(CHUNK)
+                if not data:
+                    return
+                yield offset * BYTE_NS, RX, data
+    with Capture(path) as capture:
+        for timestamp, direction, frame in capture:
+            yield timestamp, direction, bytes(frame)
+
+class Replay():
+    def __init__(self, paths, speed=1, directions=(RX, TX)):
+        self.paths      = [paths] if isinstance(paths, str) else list(paths)
+        self.speed      = speed         # 1 for real time, 10 for ten times faster, None for flat out
+        self.directions = directions
+        self.decoder    = Decoder()
+        self.records    = 0
+        self.frames     = 0
+        self.late       = 0             # Worst lag behind the recording's timing, in seconds
+        self.elapsed    = None
+
+    def play(self):
+        # Records from every file in order, each released when it's due
+        start = time.monotonic()
+        first = None
+        for path in self.paths:
+            for timestamp, direction, data in records(path):
+                if direction not in self.directions:
+                    continue
+                if self.speed:
+                    first = timestamp if first is None else first
+                    lag = time.monotonic() - start - (timestamp - first) / 1e9 / self.speed
+                    if lag < 0:
+                        time.sleep(-lag)
+                    else:
+                        self.late = max(self.late, lag)
+                self.records += 1
+                yield timestamp, direction, data
+        self.elapsed = time.monotonic() - start
+
+    def packets(self):
+        # (timestamp, direction, Packet) for every good frame played
+        for timestamp, direction, data in self.play():
+            for packet in self.decoder.decode(data):
+                self.frames += 1
+                yield timestamp, direction, packet
+
+    def run(self, *consumers):
+        # Hands every frame to each consumer, e.g. Sniffer.feed
+        for timestamp, direction, packet in self.packets():
+            for consumer in consumers:
+                consumer(packet)
+        return self.stats()
+
+    def serve(self, transport=None):
+        # Plays what the devices said out of a pty (or any Transport), so
+        # client code hears it as if it were on the wire
+        transport = transport if transport is not None else PtyTransport()
+        transport.open()
+        for timestamp, direction, data in self.play():
+            if direction == RX:
+                transport.write(data)
+        return self.stats()
+
+    def stats(self):
+        return {
+            'records':  self.records,
+            'frames':   self.frames,
+            'corrupt':  self.decoder.corrupt,
+            'dropped':  self.decoder.dropped,
+            'late':     self.late,
+            'elapsed':  self.elapsed,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured pypentair bus traffic")
+    parser.add_argument('paths', nargs='+', help="capture files or raw serial dumps, oldest first")
+    parser.add_argument('-s', '--speed', type=float, default=1, help="times faster than real time; 0 for as fast as possible")
+    parser.add_argument('-p', '--pty', action='store_true', help="play the devices' side back on a pty instead of decoding it")
+    args = parser.parse_args()
+    pypentair.DEBUG = False
+    replay = Replay(args.paths, speed=args.speed or None)
+    if args.pty:
+        pty = PtyTransport()
+        print("Playing on", pty.name, flush=True)
+        stats = replay.serve(pty)
+    else:
+        sniffer = Sniffer(None)
+        for timestamp, direction, packet in replay.packets():
+            sniffer.feed(packet)
+            print(timestamp, 'TX' if direction == TX else 'RX', packet)
+        stats = replay.stats()
+        for address, state in sorted(sniffer.states.items()):
+            print(state.name, state.frames, 'frames', state.status or '')
+    print(stats)
+
+if __name__ == '__main__':
+    main()
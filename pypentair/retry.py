@@ -0,0 +1,48 @@
+import random
+import time
+
+from .errors import ChecksumError, ResponseMismatch, ResponseTimeout
+
+# How hard Pump.send tries before giving up.  Each attempt gets `timeout`
+# seconds; between attempts we back off exponentially, with jitter so two
+# masters that collided don't collide again; and the whole thing never takes
+# longer than `deadline`.
+#
+#   Pump(1, retry=Retry(attempts=5, deadline=5))
+#   Pump(1, retry=Retry(attempts=1))     # No retries
+
+class Retry():
+    def __init__(self, attempts=3, timeout=0.5, deadline=2, backoff=0.05, cap=0.5, jitter=0.5,
+            retry_on=(ResponseTimeout, ResponseMismatch, ChecksumError)):
+        self.attempts   = attempts
+        self.timeout    = timeout   # Seconds per attempt
+        self.deadline   = deadline  # Seconds for all of them, or None
+        self.backoff    = backoff   # Seconds before the first retry, doubling after that
+        self.cap        = cap       # Longest wait between attempts
+        self.jitter     = jitter    # Each wait is scaled by 1 +/- this much at random
+        self.retry_on   = retry_on
+
+    def delay(self, retry):
+        return min(self.cap, self.backoff * 2**retry) * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run(self, attempt, deadline=None, on_retry=None):
+        # Calls attempt(timeout) until it returns, raises something not in
+        # retry_on, or we're out of attempts or time; `deadline` overrides
+        # the policy's own, in seconds from now
+        deadline = self.deadline if deadline is None else deadline
+        end = None if deadline is None else time.monotonic() + deadline
+        retry = 0
+        while True:
+            timeout = self.timeout
+            if end is not None:
+                timeout = min(timeout, end - time.monotonic()) if timeout is not None else end - time.monotonic()
+            try:
+                return attempt(timeout)
+            except self.retry_on as e:
+                retry += 1
+                delay = self.delay(retry - 1)
+                if retry >= self.attempts or (end is not None and time.monotonic() + delay >= end):
+                    raise
+                if on_retry is not None:
+                    on_retry(e)
+                time.sleep(delay)
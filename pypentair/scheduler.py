@@ -0,0 +1,140 @@
+import collections
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from .errors import ResponseTimeout
+
+# Owns a bus and runs its transactions one at a time, most urgent first.  A
+# Scheduler can stand in anywhere a Bus is expected:
+#
+#   scheduler = Scheduler(Bus('/dev/ttyUSB0'))
+#   Pump(1, scheduler).power = False                # jumps the queue
+#   scheduler.submit(packet, 'BACKGROUND', timeout=5)
+
+PRIORITIES = {
+    'CONTROL':      0,      # Anything that changes what the pump is doing
+    'USER':         1,      # Reads someone is waiting on
+    'BACKGROUND':   2,      # Polling that can wait for an idle bus
+}
+
+class Job():
+    def __init__(self, work, priority, deadline):
+        self.work       = work      # Called with the seconds left before the deadline
+        self.priority   = PRIORITIES.get(priority, priority)
+        self.deadline   = deadline
+        self.queued     = time.monotonic()
+        self.future     = Future()
+
+class Scheduler():
+    def __init__(self, bus, history=1024):
+        self.bus            = bus
+        self.queue          = []
+        self.submitted      = 0
+        self.completed      = 0
+        self.failed         = 0
+        self.cancelled      = 0
+        self.expired        = 0
+        self.waits          = collections.deque(maxlen=history)    # Seconds spent queued, most recent last
+        self.__sequence     = itertools.count()
+        self.__ready        = threading.Condition()
+        self.__thread       = None
+
+    @property
+    def cache(self):
+        return getattr(self.bus, 'cache', None)
+
+    @property
+    def trace(self):
+        return getattr(self.bus, 'trace', None)
+
+    @property
+    def depth(self):
+        return len(self.queue)
+
+    def submit(self, packet, priority='USER', timeout=None, retry=None):
+        # With a Retry, `timeout` caps the attempts together rather than the
+        # time in the queue
+        if retry is None:
+            return self.queue_job(lambda remaining: self.bus.transact(packet, priority, remaining), priority, timeout)
+        metrics = getattr(self.bus, 'metrics', None)
+        return self.queue_job(lambda remaining: retry.run(
+            lambda remaining: self.bus.transact(packet, priority, remaining),
+            timeout,
+            None if metrics is None else lambda error: metrics.retry(packet)
+            ), priority)
+
+    def queue_job(self, work, priority, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        job = Job(work, priority, deadline)
+        with self.__ready:
+            heapq.heappush(self.queue, (job.priority, next(self.__sequence), job))
+            self.submitted += 1
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.run, name='pypentair-scheduler', daemon=True)
+                self.__thread.start()
+            self.__ready.notify()
+        return job.future
+
+    def transact(self, packet, priority='USER', timeout=None):
+        return self.submit(packet, priority, timeout).result()
+
+    def pipeline(self, packets, priority='BACKGROUND', timeout=None, depth=1):
+        # A job per `depth` packets (the whole batch if None), so anything
+        # more urgent only waits for the frames already on their way
+        packets = list(packets)
+        size = depth or len(packets) or 1
+        jobs = [
+            self.queue_job(lambda remaining, chunk=packets[start:start + size]: self.bus.pipeline(chunk, priority, remaining, depth), priority, timeout)
+            for start in range(0, len(packets), size)
+            ]
+        return [future for job in jobs for future in job.result()]
+
+    def write(self, data):
+        return self.bus.write(data)
+
+    def subscribe(self, callback):
+        return self.bus.subscribe(callback)
+
+    def unsubscribe(self, callback):
+        self.bus.unsubscribe(callback)
+
+    def run(self):
+        while True:
+            with self.__ready:
+                while not self.queue:
+                    self.__ready.wait()
+                job = heapq.heappop(self.queue)[2]
+            if not job.future.set_running_or_notify_cancel():
+                self.cancelled += 1
+                continue
+            now = time.monotonic()
+            self.waits.append(now - job.queued)
+            if job.deadline is not None and now > job.deadline:
+                self.expired += 1
+                job.future.set_exception(ResponseTimeout("Deadline passed after {:.3f}s in the queue".format(now - job.queued)))
+                continue
+            try:
+                job.future.set_result(job.work(None if job.deadline is None else job.deadline - now))
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                job.future.set_exception(e)
+
+    def stats(self):
+        waits = sorted(self.waits)
+        def percentile(p):
+            return waits[min(len(waits) - 1, len(waits) * p // 100)] if waits else None
+        return {
+            'depth':        self.depth,
+            'submitted':    self.submitted,
+            'completed':    self.completed,
+            'failed':       self.failed,
+            'cancelled':    self.cancelled,
+            'expired':      self.expired,
+            'wait_p50':     percentile(50),
+            'wait_p99':     percentile(99),
+            'wait_max':     waits[-1] if waits else None,
+        }
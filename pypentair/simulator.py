@@ -0,0 +1,230 @@
+import threading
+import time
+
+from . import ACTIONS, ADDRESSES, PUMP_POWER, PUMP_STATUS_FIELDS, SETTING, Bus, Decoder, Packet, bytelist
+from .transport import LoopbackTransport, PtyTransport
+
+# A stand-in for one or more IntelliFlo pumps.  It answers the same frames a
+# real pump does, over any Transport, so the client code can be exercised
+# without hardware:
+#
+#   with Simulator(addresses=range(0x60, 0x70)) as simulator:
+#       Pump(1, simulator.bus()).rpm = 2000
+
+ERRORS = {
+    'READ_ONLY':        11,     # Seen when setting SOFT_PRIME_COUNTER
+    'UNKNOWN_ACTION':   19,
+    'BAD_REGISTER':     25,     # Seen when setting unmapped registers
+}
+
+# Registers that cover a range, offset by Program # or Speed #
+INDEXED = {
+    'PROGRAM_RPM':      4,
+    'PROGRAM_RPM_ALT':  4,
+    'SPEED_MODE':       8,
+    'SPEED_RPM':        8,
+    'SCHEDULE_START':   8,
+    'SCHEDULE_END':     8,
+    'EGG_TIMER':        8,
+}
+
+READ_ONLY = ['ACTUAL_RPM', 'SVRS_ALARM', 'GPM', 'SOFT_PRIME_COUNTER']
+
+DEFAULTS = {
+    'ADDRESS':              0x60,
+    'CONTRAST':             3,
+    'TARGET_RPM':           1100,
+    'RAMP':                 200,
+    'PRIME_DELAY':          20,
+    'SVRS_ALARM':           0,
+    'GPM':                  0,
+    'PRIME_SENSITIVITY':    3,
+    'SVRS_RESTART_TIMER':   120,
+    'SVRS_RESTART_ENABLE':  1,
+    'RUNNING_PROGRAM':      0,
+    'PROGRAM_RPM':          1100,
+    'SET_TIMER':            0,
+    'CELSIUS':              0,
+    '24_HOUR':              1,
+    'SPEED_MODE':           0,
+    'SPEED_RPM':            1100,
+    'SCHEDULE_START':       0,
+    'SCHEDULE_END':         0,
+    'EGG_TIMER':            5,
+    'TIME_OUT_TIMER':       180,
+    'QUICK_RPM':            2000,
+    'QUICK_TIMER':          10,
+    'ANTIFREEZE_ENABLE':    1,
+    'ANTIFREEZE_RPM':       1100,
+    'ANTIFREEZE_TEMP':      40,
+    'PRIME_ENABLE':         1,
+    'PRIME_MAX_TIME':       11,
+    'MIN_SPEED':            1100,
+    'MAX_SPEED':            3450,
+    'PASSWORD_ENABLE':      0,
+    'PASSWORD_TIMEOUT':     10,
+    'PASSWORD':             1234,
+    'PROGRAM_RPM_ALT':      1100,
+    'SOFT_PRIME_COUNTER':   10,
+}
+
+def register(name, index=1):
+    return (SETTING[name][0], SETTING[name][1] + index - 1)
+
+class SimulatedPump():
+    def __init__(self, address, ramp=None):
+        self.address    = address
+        self.ramp       = ramp      # RPM per second, or None to jump straight to the target
+        self.run        = True
+        self.mode       = 0
+        self.remote_control = False
+        self.registers  = {}
+        for name, value in DEFAULTS.items():
+            for index in range(1, INDEXED.get(name, 1) + 1):
+                self.registers[register(name, index)] = value
+        self.registers[register('ADDRESS')] = address
+        self.__from     = self.goal
+        self.__since    = time.monotonic()
+
+    @property
+    def goal(self):
+        return self.registers[register('TARGET_RPM')] if self.run else 0
+
+    @property
+    def rpm(self):
+        if self.ramp is None:
+            return self.goal
+        step = int((time.monotonic() - self.__since) * self.ramp)
+        if self.__from < self.goal:
+            return min(self.__from + step, self.goal)
+        return max(self.__from - step, self.goal)
+
+    def __retarget(self, change):
+        rpm = self.rpm
+        change()
+        self.__from     = rpm
+        self.__since    = time.monotonic()
+
+    @property
+    def watts(self):
+        # Same best-fit curve the hardware tests check against
+        rpm = self.rpm
+        return int(0.0004*(rpm**2) - 0.8*rpm + 611) if rpm else 0
+
+    @property
+    def status(self):
+        data = [0] * len(PUMP_STATUS_FIELDS)
+        now = time.localtime()
+        data[PUMP_STATUS_FIELDS['RUN']]         = PUMP_POWER[self.run]
+        data[PUMP_STATUS_FIELDS['MODE']]        = self.mode
+        data[PUMP_STATUS_FIELDS['DRIVE_STATE']] = 2 if self.run else 0
+        data[PUMP_STATUS_FIELDS['WATTS_H']], data[PUMP_STATUS_FIELDS['WATTS_L']] = bytelist(self.watts)
+        data[PUMP_STATUS_FIELDS['RPM_H']], data[PUMP_STATUS_FIELDS['RPM_L']] = bytelist(self.rpm)
+        data[PUMP_STATUS_FIELDS['CLOCK_TIME_H']]    = now.tm_hour
+        data[PUMP_STATUS_FIELDS['CLOCK_TIME_M']]    = now.tm_min
+        return data
+
+    def get(self, key):
+        if key == register('ACTUAL_RPM'):
+            return self.rpm
+        return self.registers[key]
+
+    def set(self, key, value):
+        if key == register('TARGET_RPM'):
+            self.__retarget(lambda: self.registers.__setitem__(key, value))
+        else:
+            self.registers[key] = value
+        return self.get(key)
+
+    def handle(self, packet):
+        action  = packet.action
+        data    = packet.data or []
+        if action == ACTIONS['GET'] or action == ACTIONS['SET']:
+            key = tuple(data[0:2])
+            if key not in self.registers and key != register('ACTUAL_RPM'):
+                return ACTIONS['ERROR'], [ERRORS['BAD_REGISTER']]
+            if action == ACTIONS['GET']:
+                return action, bytelist(self.get(key))
+            if key in [register(name) for name in READ_ONLY]:
+                return ACTIONS['ERROR'], [ERRORS['READ_ONLY']]
+            value = data[2] if len(data) == 3 else data[2] << 8 | data[3]
+            return action, bytelist(self.set(key, value))
+        elif action == ACTIONS['GET_TIME']:
+            now = time.localtime()
+            return action, [now.tm_hour, now.tm_min]
+        elif action == ACTIONS['REMOTE_CONTROL']:
+            self.remote_control = bool(data[0])
+            return action, data
+        elif action == ACTIONS['PUMP_SPEED']:
+            return action, data
+        elif action == ACTIONS['PUMP_POWER']:
+            self.__retarget(lambda: setattr(self, 'run', data[0] == PUMP_POWER[True]))
+            return action, data
+        elif action == ACTIONS['PUMP_STATUS']:
+            return action, self.status
+        return ACTIONS['ERROR'], [ERRORS['UNKNOWN_ACTION']]
+
+class Simulator():
+    def __init__(self, transport=None, addresses=(ADDRESSES['INTELLIFLO_PUMP_1'],), ramp=None, latency=0):
+        self.transport  = transport if transport is not None else LoopbackTransport()
+        self.transport.timeout = 0.05
+        self.pumps      = {address: SimulatedPump(address, ramp) for address in addresses}
+        self.latency    = latency   # Seconds between request and reply
+        self.decoder    = Decoder()
+        self.requests   = 0
+        self.replies    = 0
+        self.__thread   = None
+        self.__running  = False
+
+    def bus(self):
+        # A client-side Bus wired to this simulator
+        if isinstance(self.transport, LoopbackTransport):
+            return Bus(self.transport.peer)
+        if isinstance(self.transport, PtyTransport):
+            return Bus(self.transport.name)
+        raise ValueError("Don't know how to reach a simulator on {}".format(self.transport))
+
+    def handle(self, packet):
+        pump = self.pumps.get(packet.dst)
+        if pump is None:
+            return None
+        self.requests += 1
+        action, data = pump.handle(packet)
+        if pump.address != pump.get(register('ADDRESS')):
+            # Answer from the old address, then move
+            del self.pumps[pump.address]
+            pump.address = pump.get(register('ADDRESS'))
+            self.pumps[pump.address] = pump
+        return Packet(src=packet.dst, dst=packet.src, action=action, data=data)
+
+    def serve(self):
+        while self.__running:
+            data = self.transport.read(self.transport.in_waiting or 1)
+            for packet in self.decoder.decode(data):
+                reply = self.handle(packet)
+                if reply is None:
+                    continue
+                if self.latency:
+                    time.sleep(self.latency)
+                self.transport.write(reply.raw)
+                self.replies += 1
+
+    def start(self):
+        self.transport.open()
+        self.__running  = True
+        self.__thread   = threading.Thread(target=self.serve, name='pypentair-simulator', daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__running = False
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        self.transport.close()
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from . import ACTIONS, ADDRESSES, BROADCAST_ACTIONS, PUMP_STATUS_FIELDS, SETTING, Packet, Pump
+
+# Listens to a bus someone else is driving -- usually an EasyTouch or SunTouch
+# that already polls the pumps -- and keeps what it hears, without ever
+# transmitting.  Give the bus a RegisterCache and every Pump on it answers
+# from the controller's traffic instead of asking again:
+#
+#   bus     = Bus('/dev/ttyUSB0', cache=RegisterCache())
+#   sniffer = Sniffer(bus).start()
+#   sniffer.states[0x60].status['rpm']
+#   Pump(1, bus).watts          # No request if the controller asked recently
+
+PUMPS = range(ADDRESSES['INTELLIFLO_PUMP_1'], ADDRESSES['INTELLIFLO_PUMP_16'] + 1)
+
+class State():
+    # Everything heard from one address
+    def __init__(self, address):
+        self.address    = address
+        self.name       = ADDRESSES.name(address)
+        self.frames     = 0
+        self.seen       = None  # time.monotonic() of the last frame
+        self.status     = None  # Last decoded PUMP_STATUS
+        self.registers  = {}    # register -> raw value, from other masters' GET/SET replies
+        self.broadcasts = {}    # BROADCAST_ACTIONS name -> last data
+
+class Sniffer():
+    def __init__(self, bus, cache=None):
+        self.bus        = bus
+        self.cache      = cache if cache is not None else getattr(bus, 'cache', None)
+        self.states     = {}    # address -> State
+        self.frames     = 0
+        self.__asked    = {}    # (device, master) -> (action, register) awaiting a reply
+        self.__remote   = {}    # pump -> last REMOTE_CONTROL data sent to it
+        self.__thread   = None
+        self.__running  = False
+
+    def state(self, address):
+        if address not in self.states:
+            self.states[address] = State(address)
+        return self.states[address]
+
+    def feed(self, packet):
+        self.frames += 1
+        state = self.state(packet.src)
+        state.frames += 1
+        state.seen = time.monotonic()
+        action = packet.action
+        if packet.dst == ADDRESSES['BROADCAST']:
+            state.broadcasts[BROADCAST_ACTIONS.name(action)] = packet.data
+        elif action == ACTIONS['PUMP_STATUS'] and packet.data_length == len(PUMP_STATUS_FIELDS):
+            state.status = Pump.decode_status(packet)
+            if self.cache is not None:
+                self.cache.observe(packet)
+        elif action in (ACTIONS['GET'], ACTIONS['SET']) and packet.src not in PUMPS:
+            # A request; remember which register so we know what the reply means
+            self.__asked[(packet.dst, packet.src)] = (action, tuple((packet.data or [])[0:2]))
+        elif action in (ACTIONS['GET'], ACTIONS['SET']):
+            asked = self.__asked.pop((packet.src, packet.dst), None)
+            if asked is not None and asked[0] == action:
+                self.__learn(state, packet, *asked)
+        elif action == ACTIONS['ERROR']:
+            self.__asked.pop((packet.src, packet.dst), None)
+        elif action == ACTIONS['REMOTE_CONTROL'] and packet.src not in PUMPS:
+            # Controllers repeat this every few seconds; only a change counts
+            if self.__remote.get(packet.dst) != packet.data:
+                self.__remote[packet.dst] = packet.data
+                self.__control(packet.dst)
+        elif action in (ACTIONS['PUMP_SPEED'], ACTIONS['PUMP_POWER']) and packet.src not in PUMPS:
+            self.__control(packet.dst)
+
+    def __control(self, address):
+        # Someone else is driving this pump; its status and live readings may
+        # not hold, but its configuration does
+        if self.cache is not None:
+            self.cache.control(address)
+
+    def __learn(self, state, reply, action, register):
+        state.registers[register] = reply.idata
+        if self.cache is None:
+            return
+        if register == tuple(SETTING['ADDRESS']):
+            self.cache.invalidate(reply.src)
+        elif action == ACTIONS['GET']:
+            self.cache.put(reply.src, register, reply)
+        else:
+            self.cache.write(reply.src, register, Packet(src=reply.src, dst=reply.dst, action=ACTIONS['GET'], data=reply.data))
+
+    def listen(self):
+        while self.__running:
+            self.bus.listen(0.1)
+
+    def start(self):
+        self.bus.subscribe(self.feed)
+        self.__running  = True
+        self.__thread   = threading.Thread(target=self.listen, name='pypentair-sniffer', daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__running = False
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+            self.bus.unsubscribe(self.feed)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        return {
+            'frames':       self.frames,
+            'addresses':    len(self.states),
+            'pending':      len(self.__asked),
+        }
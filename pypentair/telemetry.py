@@ -0,0 +1,133 @@
+import array
+import itertools
+import time
+
+from . import ACTIONS, PUMP_STATUS_FIELDS, Pump
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Keeps the last `capacity` status frames from every pump in fixed-size arrays,
+# so a daemon can chart power draw for months without growing:
+#
+#   telemetry = Telemetry(bus)
+#   ...
+#   series = telemetry.series[0x60]
+#   starts, lows, highs, means = series.downsample(300)     # 5-minute buckets
+#   series.kwh()
+#
+# With numpy installed, columns come back as arrays viewing the buffers and the
+# arithmetic is vectorized; without it, the same results come back as lists.
+
+COLUMNS = [
+    ('timestamp',   'd'),   # time.time()
+    ('run',         'B'),
+    ('mode',        'B'),
+    ('watts',       'H'),
+    ('rpm',         'H'),
+    ('timer',       'H'),   # Minutes left
+]
+
+CAPACITY    = 86400     # A day of one-second samples
+MAX_GAP     = 60        # Seconds between samples beyond which we don't guess what happened
+
+class Series():
+    def __init__(self, capacity=CAPACITY):
+        self.capacity   = capacity
+        self.columns    = {name: array.array(code, bytes(array.array(code).itemsize * capacity)) for name, code in COLUMNS}
+        self.head       = 0     # Where the next sample goes
+        self.count      = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, status):
+        head = self.head
+        columns = self.columns
+        columns['timestamp'][head]  = timestamp
+        columns['run'][head]        = status['run']
+        columns['mode'][head]       = status['mode']
+        columns['watts'][head]      = status['watts']
+        columns['rpm'][head]        = status['rpm']
+        columns['timer'][head]      = 60 * status['timer'][0] + status['timer'][1]
+        self.head = (head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def column(self, name):
+        # Oldest first
+        data = self.columns[name]
+        if numpy is not None:
+            view = numpy.frombuffer(data, dtype=data.typecode)
+            if self.count < self.capacity:
+                return view[:self.count]
+            return numpy.concatenate((view[self.head:], view[:self.head]))
+        if self.count < self.capacity:
+            return data[:self.count].tolist()
+        return data[self.head:].tolist() + data[:self.head].tolist()
+
+    def downsample(self, seconds, name='watts'):
+        # (bucket starts, mins, maxes, means) of `name` over `seconds`-wide buckets
+        timestamps  = self.column('timestamp')
+        values      = self.column(name)
+        if numpy is not None:
+            buckets = numpy.floor_divide(timestamps, seconds)
+            starts  = numpy.flatnonzero(numpy.diff(buckets, prepend=numpy.nan))
+            counts  = numpy.diff(numpy.append(starts, len(values)))
+            return (
+                buckets[starts] * seconds,
+                numpy.minimum.reduceat(values, starts) if len(values) else values,
+                numpy.maximum.reduceat(values, starts) if len(values) else values,
+                numpy.add.reduceat(values.astype('d'), starts) / counts if len(values) else values.astype('d'),
+                )
+        starts, lows, highs, means = [], [], [], []
+        for bucket, group in itertools.groupby(zip(timestamps, values), key=lambda sample: sample[0] // seconds):
+            group = [value for timestamp, value in group]
+            starts.append(bucket * seconds)
+            lows.append(min(group))
+            highs.append(max(group))
+            means.append(sum(group) / len(group))
+        return starts, lows, highs, means
+
+    def kwh(self, since=None, max_gap=MAX_GAP):
+        # Energy from the watts column, joining consecutive samples with
+        # straight lines and skipping any gap longer than max_gap
+        timestamps  = self.column('timestamp')
+        watts       = self.column('watts')
+        if numpy is not None:
+            if since is not None:
+                keep        = timestamps >= since
+                timestamps  = timestamps[keep]
+                watts       = watts[keep]
+            gaps    = numpy.diff(timestamps)
+            steps   = (watts[1:] + watts[:-1].astype('d')) / 2 * gaps
+            return float(steps[gaps <= max_gap].sum()) / 3.6e6
+        joules = 0
+        samples = [(t, w) for t, w in zip(timestamps, watts) if since is None or t >= since]
+        for (t0, w0), (t1, w1) in zip(samples, samples[1:]):
+            if t1 - t0 <= max_gap:
+                joules += (w0 + w1) / 2 * (t1 - t0)
+        return joules / 3.6e6
+
+class Telemetry():
+    # A Series per pump, filled from every status frame on the bus, whoever
+    # asked for it
+    def __init__(self, bus=None, capacity=CAPACITY):
+        self.bus        = bus
+        self.capacity   = capacity
+        self.series     = {}    # address -> Series
+        if bus is not None:
+            bus.subscribe(self.feed)
+
+    def feed(self, packet, timestamp=None):
+        if packet.action != ACTIONS['PUMP_STATUS'] or packet.data_length != len(PUMP_STATUS_FIELDS):
+            return
+        if packet.src not in self.series:
+            self.series[packet.src] = Series(self.capacity)
+        self.series[packet.src].append(time.time() if timestamp is None else timestamp, Pump.decode_status(packet))
+
+    def close(self):
+        if self.bus is not None:
+            self.bus.unsubscribe(self.feed)
+            self.bus = None
@@ -0,0 +1,87 @@
+import itertools
+import sys
+import threading
+import time
+
+from .protocol import ACTIONS, ADDRESSES, PACKET_FIELDS
+
+# The last `size` transactions on a bus, kept as raw bytes so recording one
+# costs a tuple and a list store -- no lock, no formatting.  They're only
+# decoded when something goes wrong, or when asked:
+#
+#   bus.trace.dump()                # Everything since the last dump
+#   for entry in bus.trace.entries(): ...
+#
+# A Bus dumps its trace to stderr by itself whenever a request that's meant to
+# succeed -- one with a Retry, not a BACKGROUND poll or a bare probe -- times
+# out or gets an ERROR back.  That happens on a thread of its own, at most once
+# every `interval` seconds; pass `on_failure` to do something else instead.
+
+SIZE            = 256
+DUMP_INTERVAL   = 5     # Seconds
+
+class Trace():
+    def __init__(self, size=SIZE, output=None, on_failure=None, interval=DUMP_INTERVAL):
+        self.size       = size
+        self.output     = output    # Where dump() writes; stderr if None
+        self.on_failure = on_failure    # Called with the trace on a failure, from the bus's I/O thread
+        self.interval   = interval
+        self.last_dump  = None
+        self.slots      = [None] * size
+        self.dumped     = -1        # Sequence number of the last entry dumped
+        self.__sequence = itertools.count()     # next() is atomic, so writers never collide
+
+    def record(self, future):
+        # One entry per request the bus finishes; Bus.finish hands over the
+        # last attempt, so a retried request is recorded once
+        error = future.exception()
+        sequence = next(self.__sequence)
+        self.slots[sequence % self.size] = (
+            sequence,
+            future.sent,
+            future.request.raw,
+            getattr(future, 'latency', None),
+            None if error is not None else future.result().raw,
+            error,
+            )
+
+    def failed(self):
+        # Called from the bus's I/O thread, so the dump happens elsewhere
+        if self.on_failure is not None:
+            self.on_failure(self)
+            return
+        now = time.monotonic()
+        if self.last_dump is not None and now - self.last_dump < self.interval:
+            return
+        self.last_dump = now
+        threading.Thread(target=self.dump, name='pypentair-trace', daemon=True).start()
+
+    def entries(self, since=-1):
+        # (sequence, sent, request, latency, response, error), oldest first
+        return sorted(entry for entry in self.slots if entry is not None and entry[0] > since)
+
+    def format(self, entry):
+        sequence, sent, request, latency, response, error = entry
+        line = '{:>8} {:>14.6f}  {}'.format(sequence, sent, describe(request))
+        if error is not None:
+            return line + '  !! {!r}'.format(error)
+        return line + '  ->  {}  ({:.1f} ms)'.format(describe(response), latency * 1000)
+
+    def dump(self, output=None):
+        entries = self.entries(self.dumped)
+        if entries:
+            self.dumped = entries[-1][0]
+        output = output or self.output or sys.stderr
+        for entry in entries:
+            print(self.format(entry), file=output)
+        return entries
+
+def describe(raw):
+    # e.g. INTELLIFLO_PUMP_1 <- REMOTE_CONTROLLER GET [2, 209]
+    data = list(raw[PACKET_FIELDS['DATA']:-2])
+    return '{} <- {} {} {}'.format(
+        ADDRESSES.name(raw[PACKET_FIELDS['DST']]),
+        ADDRESSES.name(raw[PACKET_FIELDS['SRC']]),
+        ACTIONS.name(raw[PACKET_FIELDS['ACTION']]),
+        data
+        )
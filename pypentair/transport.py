@@ -0,0 +1,232 @@
+import fcntl
+import os
+import select
+import socket
+import struct
+import termios
+import time
+import tty
+
+# Everything a Bus needs from the wire: open(), close(), read(), write(),
+# in_waiting and fileno().  Nothing is opened until the first open() call, so
+# building a transport is free.
+
+class Transport():
+    def __init__(self, timeout=1):
+        self.timeout    = timeout
+        self.handle     = None
+
+    @property
+    def is_open(self):
+        return self.handle is not None
+
+    def open(self):
+        raise NotImplementedError
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def fileno(self):
+        return self.handle.fileno()
+
+    @property
+    def in_waiting(self):
+        buf = fcntl.ioctl(self.fileno(), termios.FIONREAD, b'\x00\x00\x00\x00')
+        return struct.unpack('i', buf)[0]
+
+    def read(self, size=1):
+        # Same contract as serial.Serial.read(): block until we have `size`
+        # bytes or `timeout` seconds have passed, whichever comes first.
+        data        = bytearray()
+        deadline    = None if self.timeout is None else time.monotonic() + self.timeout
+        while len(data) < size:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            if not select.select([self.fileno()], [], [], remaining)[0]:
+                break
+            chunk = self._recv(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return bytes(data)
+
+    def write(self, data):
+        self._send(data)
+        return len(data)
+
+    def _recv(self, size):
+        return os.read(self.fileno(), size)
+
+    def _send(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fileno(), view):]
+
+class SerialTransport(Transport):
+    def __init__(self, port='/dev/ttyUSB0', baudrate=9600, timeout=1):
+        super().__init__(timeout)
+        self.port       = port
+        self.baudrate   = baudrate
+
+    def open(self):
+        if self.handle is None:
+            import serial
+            self.handle = serial.Serial(
+                port        = self.port,
+                baudrate    = self.baudrate,
+                parity      = serial.PARITY_NONE,
+                stopbits    = serial.STOPBITS_ONE,
+                bytesize    = serial.EIGHTBITS,
+                timeout     = self.timeout
+                )
+
+    @property
+    def in_waiting(self):
+        return self.handle.in_waiting
+
+    def read(self, size=1):
+        return self.handle.read(size)
+
+    def write(self, data):
+        return self.handle.write(data)
+
+class SocketTransport(Transport):
+    # `address` is a (host, port) tuple for TCP or a path for a Unix socket
+    def __init__(self, address=None, timeout=1):
+        super().__init__(timeout)
+        self.address    = address
+
+    def open(self):
+        if self.handle is None:
+            if isinstance(self.address, tuple):
+                self.handle = socket.create_connection(self.address)
+                self.handle.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            else:
+                self.handle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.handle.connect(self.address)
+
+    def _recv(self, size):
+        return self.handle.recv(size)
+
+    def _send(self, data):
+        self.handle.sendall(data)
+
+# Between a Gateway and its clients, each message is a GATEWAY_HEADER -- kind
+# and length -- and then that many bytes
+GATEWAY_HEADER      = struct.Struct('>BH')
+GATEWAY_FRAME       = 0     # One frame: a request to send, or what the gateway heard
+GATEWAY_SUBSCRIBE   = 1     # Send me everything you hear that isn't someone's reply
+GATEWAY_PRIORITY    = 2     # The name of the priority my requests go out at
+
+class GatewayTransport(SocketTransport):
+    # A Bus on the far side of a gateway.Gateway: each write is a frame for
+    # it to send, and reads return the replies -- and, with `subscribe`,
+    # everything else on its wire -- as if they'd come straight off the port.
+    # Requests go out at `priority` (USER if None); control commands always
+    # go out as CONTROL.
+    def __init__(self, address=None, subscribe=False, timeout=1, priority=None):
+        super().__init__(address, timeout)
+        self.subscribe  = subscribe
+        self.priority   = priority
+        self.received   = bytearray()   # Off the socket, not yet unwrapped
+        self.frames     = bytearray()   # Unwrapped, not yet read
+
+    def open(self):
+        if self.handle is None:
+            super().open()
+            if self.subscribe:
+                self._send(GATEWAY_HEADER.pack(GATEWAY_SUBSCRIBE, 0))
+            if self.priority is not None:
+                name = self.priority.encode()
+                self._send(GATEWAY_HEADER.pack(GATEWAY_PRIORITY, len(name)) + name)
+
+    def close(self):
+        super().close()
+        self.received.clear()
+        self.frames.clear()
+
+    @property
+    def in_waiting(self):
+        # Exact, unlike the socket's count: takes in what's there, and waits
+        # out the rest of any message that's only partly arrived
+        waiting = super().in_waiting
+        if waiting:
+            self.unwrap(self.handle.recv(waiting))
+        while self.received and select.select([self.fileno()], [], [], self.timeout)[0]:
+            chunk = self.handle.recv(4096)
+            if not chunk:
+                break
+            self.unwrap(chunk)
+        return len(self.frames)
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while len(self.frames) < size:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            if not select.select([self.fileno()], [], [], remaining)[0]:
+                break
+            chunk = self.handle.recv(4096)
+            if not chunk:
+                break
+            self.unwrap(chunk)
+        data = bytes(self.frames[:size])
+        del self.frames[:size]
+        return data
+
+    def write(self, data):
+        self._send(GATEWAY_HEADER.pack(GATEWAY_FRAME, len(data)) + bytes(data))
+        return len(data)
+
+    def unwrap(self, chunk):
+        received = self.received
+        received += chunk
+        while len(received) >= GATEWAY_HEADER.size:
+            kind, length = GATEWAY_HEADER.unpack_from(received)
+            if len(received) < GATEWAY_HEADER.size + length:
+                return
+            if kind == GATEWAY_FRAME:
+                self.frames += received[GATEWAY_HEADER.size:GATEWAY_HEADER.size + length]
+            del received[:GATEWAY_HEADER.size + length]
+
+class LoopbackTransport(SocketTransport):
+    # Two in-memory ends of one wire.  Whatever is written to one end can be
+    # read from its peer, e.g. by a simulator standing in for the pumps.
+    def __init__(self, peer=None, timeout=1):
+        super().__init__(None, timeout)
+        self.peer = peer if peer is not None else LoopbackTransport(self, timeout)
+
+    def open(self):
+        if self.handle is None:
+            self.handle, self.peer.handle = socket.socketpair()
+
+class PtyTransport(Transport):
+    # The device end of a pseudo-terminal.  Client code opens `name` as if it
+    # were a real serial port, e.g. with SerialTransport(pty.name).
+    def __init__(self, timeout=1):
+        super().__init__(timeout)
+        self.slave      = None
+
+    @property
+    def name(self):
+        self.open()
+        return os.ttyname(self.slave)
+
+    def open(self):
+        if self.handle is None:
+            master, self.slave = os.openpty()
+            tty.setraw(self.slave)
+            self.handle = master
+
+    def close(self):
+        if self.handle is not None:
+            os.close(self.handle)
+            os.close(self.slave)
+            self.handle = self.slave = None
+
+    def fileno(self):
+        return self.handle
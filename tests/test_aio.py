@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from pypentair import Pump
+from pypentair.aio import AsyncBus, AsyncPump
+from pypentair.simulator import Simulator
+
+class TestAsyncPump(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.simulator = Simulator(addresses=range(0x60, 0x70)).start()
+        self.bus = AsyncBus(self.simulator.transport.peer)
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    async def asyncTearDown(self):
+        self.bus.close()
+
+    async def test_register(self):
+        pump = AsyncPump(1, self.bus)
+        await pump.set_ramp(100)
+        self.assertEqual(await pump.get_ramp(), 100)
+        await pump.set_quick_timer([1, 30])
+        self.assertEqual(await pump.get_quick_timer(), [1, 30])
+
+    async def test_power_and_rpm(self):
+        pump = AsyncPump(1, self.bus)
+        await pump.set_power(False)
+        self.assertEqual(await pump.get_power(), False)
+        await pump.set_power(True)
+        await pump.set_rpm(2500)
+        self.assertEqual(await pump.get_rpm(), 2500)
+
+    async def test_speed_and_program(self):
+        pump = AsyncPump(1, self.bus)
+        await pump.speed(5).set_mode('SCHEDULE')
+        self.assertEqual(await pump.speed(5).get_mode(), 'SCHEDULE')
+        await pump.program(2).set_rpm(2200)
+        self.assertEqual(await pump.program(2).get_rpm(), 2200)
+
+    async def test_concurrent_callers(self):
+        pumps = [AsyncPump(index, self.bus) for index in range(1, 17)]
+        statuses = await asyncio.gather(*[pump.get_status() for pump in pumps for x in range(10)])
+        self.assertEqual(len(statuses), 160)
+        self.assertTrue(all(status['rpm'] == 1100 for status in statuses))
+
+    async def test_soft_prime_counter(self):
+        pump = AsyncPump(1, self.bus)
+        await pump.set_soft_prime_counter(3)      # The pump refuses, as a real one does
+        self.assertEqual(await pump.get_soft_prime_counter(), 10)
+
+    def test_covers_every_property(self):
+        for name, attribute in vars(Pump).items():
+            if isinstance(attribute, property) and name not in ('address', 'remote_control', 'running_speed'):
+                with self.subTest(name):
+                    self.assertTrue(hasattr(AsyncPump, name) or hasattr(AsyncPump, 'get_' + name))
+                    if attribute.fset is not None:
+                        self.assertTrue(hasattr(AsyncPump, 'set_' + name))
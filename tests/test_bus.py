@@ -0,0 +1,172 @@
+import threading
+import time
+import unittest
+from pypentair import ACTIONS, SETTING, Bus, bytelist, LoopbackTransport, Packet, PentairError, PtyTransport, ResponseTimeout, SerialTransport, Pump
+from pypentair.simulator import Simulator
+
+DST             = 0x60
+SRC             = 0x21
+GET_PUMP_STATUS = 0x07
+
+STATUS_REQUEST  = bytes([0xFF, 0x00, 0xFF, 0xA5, 0x00, DST, SRC, GET_PUMP_STATUS, 0, 1, 45])
+RAMP_REPLY      = Packet(src=DST, dst=SRC, action=0x02, data=[0x00, 0x64])
+
+class TestBusMethods(unittest.TestCase):
+
+    def test_construction_is_lazy(self):
+        bus = Bus('/dev/does-not-exist')
+        self.assertIsInstance(bus.transport, SerialTransport)
+        self.assertFalse(bus.transport.is_open)
+        Pump(1, bus)
+        self.assertFalse(bus.transport.is_open)
+
+    def test_loopback_write(self):
+        transport = LoopbackTransport()
+        bus = Bus(transport)
+        bus.write(STATUS_REQUEST)
+        self.assertEqual(transport.peer.read(len(STATUS_REQUEST)), STATUS_REQUEST)
+        bus.close()
+
+    def test_loopback_receive(self):
+        transport = LoopbackTransport()
+        bus = Bus(transport).open()
+        transport.peer.write(b'\x00' + STATUS_REQUEST)
+        self.assertEqual(bus.receive().bytes, list(STATUS_REQUEST))
+        bus.close()
+
+    def test_packet_send(self):
+        transport = LoopbackTransport()
+        bus = Bus(transport).open()
+        transport.peer.write(bytearray(RAMP_REPLY.bytes))
+        response = Packet(dst=DST, action=0x02, data=[0x02, 0xD1]).send(bus)
+        self.assertEqual(response.idata, 100)
+        bus.close()
+
+    def test_pump_uses_its_bus(self):
+        transport = LoopbackTransport()
+        bus = Bus(transport).open()
+        transport.peer.write(bytearray(RAMP_REPLY.bytes))
+        self.assertEqual(Pump(1, bus).ramp, 100)
+        bus.close()
+
+    def test_pty(self):
+        pty = PtyTransport()
+        bus = Bus(pty.name)
+        bus.write(STATUS_REQUEST)
+        pty.open()
+        self.assertEqual(pty.read(len(STATUS_REQUEST)), STATUS_REQUEST)
+        pty.write(STATUS_REQUEST)
+        self.assertEqual(bus.receive().action, GET_PUMP_STATUS)
+        bus.close()
+        pty.close()
+
+class TestBusWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Simulator(addresses=range(0x60, 0x64)).start()
+        self.bus = self.simulator.bus()
+
+    def tearDown(self):
+        self.bus.close()
+        self.simulator.stop()
+
+    def test_threads_share_a_bus(self):
+        for index in range(1, 5):
+            Pump(index, self.bus).ramp = index * 10
+        errors = []
+        def hammer(index):
+            try:
+                for _ in range(20):
+                    self.assertEqual(Pump(index, self.bus).ramp, index * 10)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=hammer, args=(index % 4 + 1,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.simulator.decoder.corrupt, 0)
+        self.assertEqual(self.bus.decoder.corrupt, 0)
+
+    def test_submit(self):
+        futures = [Pump(index, self.bus).submit(ACTIONS['GET'], SETTING['MAX_SPEED']) for index in range(1, 5)]
+        self.assertEqual([future.result(timeout=1).idata for future in futures], [3450] * 4)
+        self.assertTrue(all(future.latency > 0 for future in self.bus.pipeline([Packet(dst=0x60, action=ACTIONS['PUMP_STATUS'])])))
+        with self.assertRaises(ResponseTimeout):
+            self.bus.submit(Packet(dst=0x6F, action=ACTIONS['PUMP_STATUS']), timeout=0.05).result(timeout=1)
+
+    def test_listen_alongside_requests(self):
+        heard = []
+        listener = threading.Thread(target=lambda: heard.append(self.bus.listen(1)))
+        Pump(1, self.bus).ramp
+        listener.start()
+        while not self.bus.demux.subscribers:
+            time.sleep(0.001)   # Wait until the listener is waiting on a frame
+        Pump(2, self.bus).ramp
+        listener.join()
+        self.assertEqual(heard[0].src, 0x61)
+
+    def test_coalescing(self):
+        self.simulator.latency = 0.1
+        requests = self.simulator.requests
+        futures = [Pump(1, self.bus).submit(ACTIONS['PUMP_STATUS']) for _ in range(10)]
+        futures.append(Pump(1, self.bus).submit(ACTIONS['GET'], SETTING['MAX_SPEED']))
+        responses = [future.result(timeout=1) for future in futures]
+        self.assertTrue(all(response is responses[0] for response in responses[:10]))
+        self.assertEqual(self.simulator.requests - requests, 2)
+        self.assertEqual(self.bus.coalesced, 9)
+        Pump(1, self.bus).refresh()
+        self.assertEqual(self.simulator.requests - requests, 3)
+
+    def test_coalesced_callers_cancel_alone(self):
+        self.simulator.latency = 0.05
+        first = self.bus.submit(Packet(dst=0x60, action=ACTIONS['PUMP_STATUS']))
+        second = self.bus.submit(Packet(dst=0x60, action=ACTIONS['PUMP_STATUS']))
+        self.assertTrue(first.cancel())
+        self.assertEqual(second.result(timeout=1).src, 0x60)
+
+    def test_coalescing_raises_priority(self):
+        self.simulator.latency = 0.05
+        Pump(1, self.bus).submit(ACTIONS['SET'], SETTING['RAMP'] + bytelist(100))
+        low = self.bus.submit(Packet(dst=0x61, action=ACTIONS['PUMP_STATUS']), 'BACKGROUND')
+        self.bus.submit(Packet(dst=0x62, action=ACTIONS['PUMP_STATUS']), 'BACKGROUND')
+        urgent = self.bus.submit(Packet(dst=0x62, action=ACTIONS['PUMP_STATUS']), 'USER')
+        urgent.result(timeout=1)
+        low.result(timeout=1)
+        self.assertLess(urgent.sent, low.sent)     # Went out ahead of the BACKGROUND read queued before it
+
+    def test_coalesced_callers_time_out_alone(self):
+        packet = Packet(dst=0x6F, action=ACTIONS['PUMP_STATUS'])   # Nobody answers
+        patient = self.bus.submit(packet, timeout=0.5)
+        hasty = self.bus.submit(packet, timeout=0.05)
+        with self.assertRaises(ResponseTimeout):
+            hasty.result(timeout=0.3)
+        self.assertFalse(patient.done())
+        self.assertEqual(self.bus.coalesced, 1)
+        with self.assertRaises(ResponseTimeout):
+            patient.result(timeout=1)
+
+    def test_raising_subscriber(self):
+        def broken(packet):
+            raise RuntimeError("broken subscriber")
+        self.bus.subscribe(broken)
+        self.assertEqual(Pump(1, self.bus).max_speed, 3450)
+        self.assertEqual(self.bus.demux.errors, 1)
+        self.bus.unsubscribe(broken)
+
+    def test_worker_failure(self):
+        self.assertEqual(Pump(1, self.bus).max_speed, 3450)
+        feed = self.bus.demux.feed
+        def broken(packet):
+            self.bus.demux.feed = feed
+            raise RuntimeError("broken demux")
+        self.bus.demux.feed = broken
+        with self.assertRaisesRegex(PentairError, 'I/O thread failed'):
+            self.bus.transact(Packet(dst=0x60, action=ACTIONS['PUMP_STATUS']))
+        self.assertEqual(Pump(1, self.bus).send(ACTIONS['GET'], SETTING['MAX_SPEED']).idata, 3450)
+
+    def test_stop(self):
+        self.assertEqual(Pump(1, self.bus).max_speed, 3450)
+        self.bus.stop()
+        self.assertEqual(Pump(1, self.bus).max_speed, 3450)
@@ -0,0 +1,134 @@
+import time
+import unittest
+from pypentair import ACTIONS, SETTING, Packet, Pump, RegisterCache
+from pypentair.simulator import Simulator
+
+class TestRegisterCache(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Simulator(addresses=[0x60, 0x61]).start()
+        self.cache = RegisterCache()
+        self.bus = self.simulator.bus()
+        self.bus.cache = self.cache
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_ttls(self):
+        self.assertEqual(self.cache.ttl(SETTING['ACTUAL_RPM']), 0)
+        self.assertEqual(self.cache.ttl(SETTING['CONTRAST']), 3600)
+        self.assertEqual(self.cache.ttl([0x03, 0x8D + 7]), 3600)     # SPEED_RPM for Speed 8
+        self.assertEqual(self.cache.ttl([0x01, 0xFE]), 0)          # Not a register we know
+        self.assertEqual(RegisterCache(ttls={'CONTRAST': 5}).ttl(SETTING['CONTRAST']), 5)
+
+    def test_repeat_reads_hit(self):
+        self.assertEqual(Pump(1, self.bus).max_speed, 3450)
+        requests = self.simulator.requests
+        self.assertEqual(Pump(1, self.bus).max_speed, 3450)
+        self.assertEqual(Pump(1, self.bus).fahrenheit, True)
+        self.assertEqual(Pump(1, self.bus).celsius, 0)
+        self.assertEqual(self.simulator.requests, requests + 1)
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_live_registers_are_not_cached(self):
+        Pump(1, self.bus).rpm
+        Pump(1, self.bus).rpm
+        self.assertEqual(self.cache.stats()['hits'], 0)
+        self.assertEqual(self.simulator.requests, 2)
+
+    def test_set_writes_through(self):
+        Pump(1, self.bus).contrast = 2
+        requests = self.simulator.requests
+        self.assertEqual(Pump(1, self.bus).contrast, 2)
+        self.assertEqual(self.simulator.requests, requests)
+        self.assertEqual(self.cache.get(0x60, SETTING['CONTRAST']).action, ACTIONS['GET'])
+
+    def test_expiry(self):
+        self.cache.ttls[tuple(SETTING['RAMP'])] = 0.01
+        Pump(1, self.bus).ramp
+        time.sleep(0.02)
+        Pump(1, self.bus).ramp
+        self.assertEqual(self.simulator.requests, 2)
+
+    def test_address_change_invalidates(self):
+        Pump(1, self.bus).ramp
+        Pump(2, self.bus).ramp
+        Pump(1, self.bus).address = 0x61
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_control_keeps_configuration(self):
+        pump = Pump(1, self.bus)
+        pump.contrast
+        pump.trpm
+        pump.send(ACTIONS['PUMP_POWER'], [0x0A])
+        self.assertIsNotNone(self.cache.get(0x60, SETTING['CONTRAST']))
+        self.assertIsNone(self.cache.get(0x60, SETTING['TARGET_RPM']))
+
+    def test_errors_are_not_cached(self):
+        Pump(1, self.bus).send(ACTIONS['GET'], [0x03, 0x36])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_snapshot_fills_cache(self):
+        Pump(1, self.bus).snapshot()
+        requests = self.simulator.requests
+        self.assertEqual(Pump(1, self.bus).speed(8).rpm, 1100)
+        self.assertEqual(self.simulator.requests, requests)
+
+class TestStatusWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Simulator(addresses=[0x60, 0x61]).start()
+        self.bus = self.simulator.bus()
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_one_frame_serves_every_field(self):
+        pump = Pump(1, self.bus)
+        pump.power, pump.mode, pump.watts, pump.timer
+        self.assertEqual(self.simulator.requests, 1)
+
+    def test_refresh(self):
+        pump = Pump(1, self.bus)
+        pump.status
+        pump.refresh()
+        pump.status
+        self.assertEqual(self.simulator.requests, 2)
+
+    def test_max_age(self):
+        pump = Pump(1, self.bus, max_age=0.01)
+        pump.watts
+        time.sleep(0.02)
+        pump.watts
+        self.assertEqual(self.simulator.requests, 2)
+        pump = Pump(1, self.bus, max_age=0)
+        pump.watts
+        pump.watts
+        self.assertEqual(self.simulator.requests, 4)
+
+    def test_control_invalidates(self):
+        pump = Pump(1, self.bus)
+        self.assertTrue(pump.power)
+        Pump(1, self.bus).send(ACTIONS['PUMP_POWER'], [0x04])
+        self.assertFalse(pump.power)    # Someone else's command still clears the window
+        pump.send(ACTIONS['PUMP_POWER'], [0x0A])
+        self.assertTrue(pump.power)
+        self.assertEqual(self.simulator.requests, 5)
+
+    def test_shared_through_cache(self):
+        self.bus.cache = RegisterCache()
+        Pump(1, self.bus).watts
+        Pump(1, self.bus).mode
+        Pump(2, self.bus).mode
+        self.assertEqual(self.simulator.requests, 2)
+
+    def test_sniffed_status(self):
+        self.bus.cache = RegisterCache()
+        # Someone else's poll, as it would come off the wire
+        self.bus.demux.feed(Packet(src=0x60, dst=0x10, action=ACTIONS['PUMP_STATUS'], data=[0x0A, 0, 0, 0x01, 0x2C, 0x0B, 0xB8, 0, 0, 0, 0, 0, 5, 12, 30]))
+        self.assertEqual(Pump(1, self.bus).watts, 300)
+        self.assertEqual(Pump(1, self.bus).status['rpm'], 3000)
+        self.assertEqual(self.simulator.requests, 0)
+        self.bus.cache.invalidate(0x60)
+        Pump(1, self.bus).watts
+        self.assertEqual(self.simulator.requests, 1)
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from pypentair import ACTIONS, Packet, Pump
+from pypentair.capture import MAGIC, RECORD, RX, TX, Capture, Recorder, files
+from pypentair.simulator import Simulator
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'bus.cap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        packet = Packet(dst=0x60, action=ACTIONS['PUMP_STATUS'])
+        with Recorder(self.path) as recorder:
+            recorder.record(TX, packet.raw)
+            recorder.record(RX, b'\x01\x02')
+        with Capture(self.path) as capture:
+            records = [(timestamp, direction, bytes(frame)) for timestamp, direction, frame in capture]
+        self.assertEqual([(direction, frame) for timestamp, direction, frame in records], [(TX, packet.raw), (RX, b'\x01\x02')])
+        self.assertLessEqual(records[0][0], records[1][0])
+        self.assertEqual(os.path.getsize(self.path), len(MAGIC) + 2 * RECORD.size + len(packet.raw) + 2)
+
+    def test_zero_copy(self):
+        with Recorder(self.path) as recorder:
+            recorder.record(RX, b'frame')
+        capture = Capture(self.path)
+        timestamp, direction, frame = next(iter(capture))
+        self.assertIsInstance(frame, memoryview)
+        self.assertEqual(frame.tobytes(), b'frame')
+        frame.release()
+        capture.close()
+
+    def test_truncated(self):
+        with Recorder(self.path) as recorder:
+            recorder.record(RX, b'whole')
+            recorder.record(RX, b'partial')
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        with Capture(self.path) as capture:
+            self.assertEqual([bytes(frame) for timestamp, direction, frame in capture], [b'whole'])
+
+    def test_empty_and_foreign(self):
+        open(self.path, 'wb').close()
+        with Capture(self.path) as capture:
+            self.assertEqual(list(capture), [])
+        with open(self.path, 'wb') as f:
+            f.write(b'not a capture')
+        with self.assertRaises(ValueError):
+            Capture(self.path)
+
+    def test_rotation(self):
+        with Recorder(self.path, max_bytes=len(MAGIC) + 2 * (RECORD.size + 10), backups=2) as recorder:
+            for index in range(7):
+                recorder.record(RX, bytes([index]) * 10)
+        self.assertEqual(recorder.rotations, 3)
+        self.assertEqual(files(self.path), [self.path + '.2', self.path + '.1', self.path])
+        frames = []
+        for path in files(self.path):
+            with Capture(path) as capture:
+                frames.extend(bytes(frame)[0] for timestamp, direction, frame in capture)
+        self.assertEqual(frames, [2, 3, 4, 5, 6])
+
+    def test_bus(self):
+        with Simulator() as simulator:
+            bus = simulator.bus()
+            bus.recorder = Recorder(self.path)
+            status = Pump(1, bus).refresh()
+            bus.recorder.close()
+        with Capture(self.path) as capture:
+            packets = [(direction, Packet(frame)) for timestamp, direction, frame in capture]
+        self.assertEqual([direction for direction, packet in packets], [TX, RX])
+        self.assertEqual(packets[0][1].action, ACTIONS['PUMP_STATUS'])
+        self.assertEqual(Pump.decode_status(packets[1][1]), status)
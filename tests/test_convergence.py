@@ -0,0 +1,72 @@
+import asyncio
+import time
+import unittest
+from pypentair import Pump
+from pypentair.convergence import MAX_INTERVAL, MIN_INTERVAL, backoff, converge, converge_async, ramping
+from pypentair.simulator import Simulator
+
+class TestConverge(unittest.TestCase):
+
+    def test_resolves_when_reached(self):
+        values = iter(range(10))
+        seen = []
+        future = converge(lambda: next(values), lambda value: value == 3, lambda value: 0, progress=seen.append)
+        self.assertEqual(future.result(timeout=1), 3)
+        self.assertEqual(future.polls, 4)
+        self.assertEqual(seen, [0, 1, 2, 3])
+
+    def test_deadline(self):
+        future = converge(lambda: 0, lambda value: False, lambda value: 0.01, timeout=0.05)
+        with self.assertRaises(ValueError):
+            future.result(timeout=1)
+        self.assertGreater(future.polls, 1)
+
+    def test_poll_errors(self):
+        future = converge(lambda: 1 / 0, lambda value: True)
+        with self.assertRaises(ZeroDivisionError):
+            future.result(timeout=1)
+
+    def test_async(self):
+        values = iter(range(10))
+        async def poll():
+            return next(values)
+        self.assertEqual(asyncio.run(converge_async(poll, lambda value: value == 2, lambda value: 0)), 2)
+
+    def test_intervals(self):
+        interval = backoff()
+        self.assertEqual([interval(None) for x in range(3)], [MIN_INTERVAL, 2 * MIN_INTERVAL, 4 * MIN_INTERVAL])
+        self.assertEqual([interval(None) for x in range(10)][-1], MAX_INTERVAL)
+        interval = ramping(3000, 100)
+        self.assertEqual(interval({'rpm': 1000}), MAX_INTERVAL)
+        self.assertEqual(interval({'rpm': 2980}), 0.1)
+        self.assertEqual(interval({'rpm': 3000}), MIN_INTERVAL)
+
+class TestPumpConvergence(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Simulator(ramp=4000).start()
+        self.pump = Pump(1, self.simulator.bus())
+        self.pump.ramp = 4000
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_rpm(self):
+        start = time.monotonic()
+        requests = self.simulator.requests
+        self.pump.rpm = 1000
+        self.assertEqual(self.pump.rpm, 1000)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertLess(self.simulator.requests - requests, 15)
+
+    def test_progress(self):
+        seen = []
+        future = self.pump.set_rpm(2000, progress=seen.append)
+        self.assertEqual(future.result(timeout=5)['rpm'], 2000)
+        self.assertEqual(seen[-1]['rpm'], 2000)
+        self.assertEqual(future.polls, len(seen))
+
+    def test_power(self):
+        self.pump.power = False
+        self.assertFalse(self.pump.power)
+        self.assertTrue(self.pump.set_power(True).result(timeout=5)['run'] == 0x0A)
@@ -0,0 +1,53 @@
+import unittest
+from pypentair import Decoder
+
+DST             = 0x60
+GET_PUMP_STATUS = 0x07
+PUMP_PROGRAM    = 0x01
+
+STATUS_REQUEST  = bytes([0xFF, 0x00, 0xFF, 0xA5, 0x00, DST, 0x21, GET_PUMP_STATUS, 0, 1, 45])
+RPM_REQUEST     = bytes([0xFF, 0x00, 0xFF, 0xA5, 0x00, DST, 0x21, PUMP_PROGRAM, 4, 0x02, 0xC4, 5, 220, 2, 210])
+
+class TestDecoderMethods(unittest.TestCase):
+
+    def test_single_frame(self):
+        decoder = Decoder()
+        packets = list(decoder.decode(STATUS_REQUEST))
+        self.assertEqual(len(packets), 1)
+        self.assertEqual(packets[0].bytes, list(STATUS_REQUEST))
+        self.assertEqual(decoder.frames, 1)
+
+    def test_back_to_back_frames(self):
+        decoder = Decoder()
+        packets = list(decoder.decode(STATUS_REQUEST + RPM_REQUEST + STATUS_REQUEST))
+        self.assertEqual([packet.action for packet in packets], [GET_PUMP_STATUS, PUMP_PROGRAM, GET_PUMP_STATUS])
+
+    def test_frame_split_across_reads(self):
+        decoder = Decoder()
+        packets = []
+        for byte in RPM_REQUEST:
+            packets.extend(decoder.decode(bytes([byte])))
+        self.assertEqual(len(packets), 1)
+        self.assertEqual(packets[0].data, [0x02, 0xC4, 5, 220])
+
+    def test_line_noise_is_skipped(self):
+        decoder = Decoder()
+        packets = list(decoder.decode(b'\x00\xFF\x13\xFF\x00' + STATUS_REQUEST))
+        self.assertEqual(len(packets), 1)
+        self.assertEqual(decoder.skipped, 5)
+        self.assertEqual(decoder.dropped, 0)
+
+    def test_resync_after_bad_checksum(self):
+        decoder = Decoder()
+        corrupt = RPM_REQUEST[:-1] + bytes([211])
+        packets = list(decoder.decode(corrupt + STATUS_REQUEST))
+        self.assertEqual(len(packets), 1)
+        self.assertEqual(packets[0].action, GET_PUMP_STATUS)
+        self.assertEqual(decoder.corrupt, 1)
+        self.assertEqual(decoder.dropped, 1)
+
+    def test_partial_frame_is_held(self):
+        decoder = Decoder()
+        self.assertEqual(list(decoder.decode(STATUS_REQUEST[:6])), [])
+        self.assertEqual(decoder.pop(), None)
+        self.assertEqual(len(list(decoder.decode(STATUS_REQUEST[6:]))), 1)
@@ -0,0 +1,66 @@
+import unittest
+from pypentair import ACTIONS, BROADCAST_ACTIONS, Bus, Demultiplexer, LoopbackTransport, Packet, Pump
+
+CONTROLLER      = 0x10
+DST             = 0x60
+SRC             = 0x21
+
+STATUS_REQUEST  = Packet(dst=DST, action=ACTIONS['PUMP_STATUS'])
+RAMP_REQUEST    = Packet(dst=DST, action=ACTIONS['GET'], data=[0x02, 0xD1])
+RAMP_REPLY      = Packet(src=DST, dst=SRC, action=ACTIONS['GET'], data=[0x00, 0x64])
+ERROR_REPLY     = Packet(src=DST, dst=SRC, action=ACTIONS['ERROR'], data=[25])
+BROADCAST       = Packet(src=CONTROLLER, dst=0x0F, action=BROADCAST_ACTIONS['DATE_TIME'], data=[15, 34, 1, 10, 7, 16, 0, 1])
+FOREIGN_REPLY   = Packet(src=DST, dst=CONTROLLER, action=ACTIONS['GET'], data=[0x01, 0x00])
+
+class TestDemultiplexer(unittest.TestCase):
+
+    def test_reply_is_matched(self):
+        demux = Demultiplexer()
+        future = demux.expect(RAMP_REQUEST)
+        demux.feed(BROADCAST)
+        demux.feed(FOREIGN_REPLY)
+        self.assertFalse(future.done())
+        demux.feed(RAMP_REPLY)
+        self.assertEqual(future.result(), RAMP_REPLY)
+        self.assertEqual(list(demux.backlog), [BROADCAST, FOREIGN_REPLY])
+        self.assertEqual(demux.pending, {})
+
+    def test_error_answers_pending_request(self):
+        demux = Demultiplexer()
+        status = demux.expect(STATUS_REQUEST)
+        demux.feed(ERROR_REPLY)
+        self.assertEqual(status.result(), ERROR_REPLY)
+
+    def test_subscribers_see_everything(self):
+        demux = Demultiplexer()
+        seen = []
+        demux.subscribe(seen.append)
+        demux.expect(RAMP_REQUEST)
+        demux.feed(BROADCAST)
+        demux.feed(RAMP_REPLY)
+        self.assertEqual(seen, [BROADCAST, RAMP_REPLY])
+
+    def test_backlog_is_bounded(self):
+        demux = Demultiplexer(backlog=4)
+        for x in range(10):
+            demux.feed(BROADCAST)
+        self.assertEqual(len(demux.backlog), 4)
+        self.assertEqual(demux.unmatched, 10)
+
+    def test_cancel(self):
+        demux = Demultiplexer()
+        future = demux.expect(RAMP_REQUEST)
+        demux.cancel(future)
+        demux.feed(RAMP_REPLY)
+        self.assertFalse(future.done())
+        self.assertEqual(list(demux.backlog), [RAMP_REPLY])
+
+class TestSharedBus(unittest.TestCase):
+
+    def test_foreign_traffic_before_reply(self):
+        transport = LoopbackTransport()
+        bus = Bus(transport).open()
+        transport.peer.write(BROADCAST.raw + FOREIGN_REPLY.raw + RAMP_REPLY.raw)
+        self.assertEqual(Pump(1, bus).ramp, 100)
+        self.assertEqual(list(bus.demux.backlog), [BROADCAST, FOREIGN_REPLY])
+        bus.close()
@@ -0,0 +1,41 @@
+import unittest
+from pypentair.fleet import Fleet, poll_all
+from pypentair.simulator import Simulator
+
+class TestFleet(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = Simulator(addresses=range(0x60, 0x70)).start()
+        self.spa = Simulator(addresses=[0x60, 0x61]).start()
+        self.buses = {'pool': self.pool.bus(), 'spa': self.spa.bus()}
+
+    def tearDown(self):
+        self.pool.stop()
+        self.spa.stop()
+
+    def test_poll_all(self):
+        results = poll_all(self.buses, pumps={'spa': [1, 2]})
+        self.assertEqual(len(results), 18)
+        for key, result in results.items():
+            with self.subTest(key=key):
+                self.assertIsNone(result['error'])
+                self.assertEqual(result['status']['rpm'], 1100)
+                self.assertGreater(result['latency'], 0)
+
+    def test_missing_pumps_time_out(self):
+        fleet = Fleet(self.buses, timeout=0.05, depth=None)
+        results = fleet.poll_all()
+        fleet.close()
+        self.assertIsNone(results[('spa', 2)]['error'])
+        self.assertIsInstance(results[('spa', 3)]['error'], TimeoutError)
+        self.assertIsNone(results[('spa', 3)]['status'])
+        self.assertEqual(sum(1 for result in results.values() if result['error']), 14)
+        # Every missing pump on the spa bus times out at the same time
+        self.assertLess(fleet.elapsed, 0.5)
+
+    def test_later_sweeps_are_clean(self):
+        fleet = Fleet(self.buses, timeout=0.05, depth=4)
+        fleet.poll_all()
+        results = fleet.poll_all()
+        fleet.close()
+        self.assertEqual(results[('pool', 16)]['status']['rpm'], 1100)
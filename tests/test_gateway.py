@@ -0,0 +1,157 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pypentair import Bus, GatewayTransport, Packet, Pump
+from pypentair.gateway import Gateway, address
+from pypentair.transport import GATEWAY_HEADER, GATEWAY_SUBSCRIBE
+from pypentair.simulator import Simulator
+
+class TestGateway(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Simulator(addresses=range(0x60, 0x64)).start()
+        self.gateway = Gateway(self.simulator.bus(), ('127.0.0.1', 0)).start()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.gateway.stop()
+        self.gateway.bus.close()
+        self.simulator.stop()
+
+    def client(self, subscribe=False, path=None):
+        bus = Bus(GatewayTransport(path or self.gateway.address, subscribe=subscribe))
+        self.clients.append(bus)
+        return bus
+
+    def test_address(self):
+        self.assertEqual(address('localhost:4815'), ('localhost', 4815))
+        self.assertEqual(address(':4815'), ('127.0.0.1', 4815))
+        self.assertEqual(address('/run/pypentair.sock'), '/run/pypentair.sock')
+
+    def test_pump_through_gateway(self):
+        bus = self.client()
+        Pump(1, bus).ramp = 150
+        self.assertEqual(Pump(1, bus).ramp, 150)
+        self.assertEqual(Pump(1, bus).max_speed, 3450)
+        self.assertEqual(self.gateway.stats()['replies'], 3)
+
+    def test_many_clients(self):
+        buses = [self.client() for _ in range(6)]
+        self.simulator.latency = 0.02
+        errors = []
+        def hammer(bus, index):
+            try:
+                for _ in range(5):
+                    self.assertEqual(Pump(index, bus).max_speed, 3450)
+                    self.assertEqual(Pump(index, bus).refresh()['run'], 0x0A)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=hammer, args=(bus, index % 4 + 1)) for index, bus in enumerate(buses)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = self.gateway.stats()
+        self.assertEqual(stats['failures'], 0)
+        self.assertEqual(stats['requests'], 60)
+        self.assertEqual(self.simulator.requests, 60 - stats['coalesced'])
+
+    def test_broadcasts(self):
+        listener = self.client(subscribe=True).open()
+        while not self.gateway.subscribers:
+            time.sleep(0.001)
+        Pump(1, self.client()).ramp
+        broadcast = Packet(src=0x10, dst=0x0F, action=0x02, data=[0] * 4)
+        self.simulator.transport.write(broadcast.raw)
+        self.assertEqual(listener.listen(1).raw, broadcast.raw)    # but not the other client's reply
+        self.assertEqual(self.gateway.stats()['broadcasts'], 1)
+
+    def test_unanswered_frames(self):
+        heard = []
+        handle = self.simulator.handle
+        self.simulator.handle = lambda packet: heard.append(packet) or handle(packet)
+        transport = self.client().open().transport
+        broadcast = Packet(src=0x10, dst=0x0F, action=0x02, data=[0] * 4)
+        transport.write(broadcast.raw)
+        transport.write(Packet(dst=0x10, action=0x01).raw)
+        while len(heard) < 2:
+            time.sleep(0.001)
+        self.assertEqual(heard[0].raw, broadcast.raw)
+        stats = self.gateway.stats()
+        self.assertEqual((stats['forwarded'], stats['requests'], stats['failures']), (2, 0, 0))
+
+    def test_client_priority(self):
+        submitted = []
+        submit = self.gateway.bus.submit
+        self.gateway.bus.submit = lambda packet, priority=None, *args: submitted.append(priority) or submit(packet, priority, *args)
+        bus = Bus(GatewayTransport(self.gateway.address, priority='BACKGROUND'))
+        self.clients.append(bus)
+        Pump(1, bus).ramp
+        Pump(1, bus).ramp = 150
+        Pump(1, self.client()).ramp
+        self.assertEqual(submitted, ['BACKGROUND', 'CONTROL', 'USER'])
+
+    def test_stalled_subscriber(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pypentair.sock')
+            with Gateway(self.gateway.bus, path) as gateway:
+                stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                stalled.connect(path)
+                stalled.sendall(GATEWAY_HEADER.pack(GATEWAY_SUBSCRIBE, 0))     # and never reads again
+                while not gateway.subscribers:
+                    time.sleep(0.001)
+                broadcast = Packet(src=0x10, dst=0x0F, action=0x02, data=[0] * 4).raw
+                flood = threading.Thread(target=lambda: [self.simulator.transport.write(broadcast * 100) for _ in range(500)])
+                flood.start()
+                bus = self.client(path=path)
+                while flood.is_alive():
+                    self.assertEqual(Pump(1, bus).max_speed, 3450)
+                flood.join()
+                deadline = time.monotonic() + 5
+                while gateway.stats()['cut_off'] == 0 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(gateway.stats()['cut_off'], 1)
+                self.assertEqual(gateway.stats()['subscribers'], 0)
+                self.assertEqual(Pump(1, bus).max_speed, 3450)
+                stalled.close()
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pypentair.sock')
+            with Gateway(self.gateway.bus, path):
+                self.assertEqual(Pump(1, self.client(path=path)).max_speed, 3450)
+            self.assertFalse(os.path.exists(path))
+
+    def test_unix_socket_in_use(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pypentair.sock')
+            with open(path, 'w') as file:
+                file.write('not a socket')
+            with self.assertRaises(OSError):
+                Gateway(self.gateway.bus, path).start()
+            self.assertTrue(os.path.isfile(path))
+            os.remove(path)
+            with Gateway(self.gateway.bus, path):
+                with self.assertRaises(OSError):
+                    Gateway(self.gateway.bus, path).start()
+                self.assertEqual(Pump(1, self.client(path=path)).max_speed, 3450)
+
+    def test_stale_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pypentair.sock')
+            dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            dead.bind(path)
+            dead.close()    # As a gateway that died would leave it
+            gateway = Gateway(self.gateway.bus, path).start()
+            os.remove(path)
+            replacement = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            replacement.bind(path)
+            gateway.stop()
+            self.assertTrue(os.path.exists(path))   # Not ours to remove
+            replacement.close()
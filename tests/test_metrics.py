@@ -0,0 +1,76 @@
+import unittest
+import urllib.request
+from pypentair import ACTIONS, Bus, LoopbackTransport, Metrics, Packet, Pump
+from pypentair.metrics import Histogram
+from pypentair.simulator import Simulator
+
+class TestHistogram(unittest.TestCase):
+
+    def test_quantile(self):
+        histogram = Histogram((0.01, 0.1, 1))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in [0.005] * 90 + [0.05] * 9 + [5]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [90, 9, 0, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.01)
+        self.assertEqual(histogram.quantile(0.99), 0.1)
+        self.assertEqual(histogram.quantile(1), float('inf'))
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+        self.simulator = Simulator().start()
+        self.bus = self.simulator.bus()
+        self.bus.metrics = self.metrics
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_transactions(self):
+        Pump(1, self.bus).refresh()
+        Pump(1, self.bus).refresh()
+        Pump(1, self.bus).ramp
+        stats = self.metrics.stats()
+        self.assertEqual(stats['transactions'][(0x60, ACTIONS['PUMP_STATUS'])]['count'], 2)
+        self.assertEqual(stats['transactions'][(0x60, ACTIONS['GET'])]['count'], 1)
+        self.assertGreater(stats['transactions'][(0x60, ACTIONS['GET'])]['mean'], 0)
+        self.assertEqual(stats['bytes_sent'], 2 * 11 + 13)
+        self.assertEqual(stats['bytes_received'], 2 * 26 + 13)
+
+    def test_errors_and_timeouts(self):
+        Pump(1, self.bus).send(ACTIONS['GET'], [0x03, 0x36])
+        with self.assertRaises(TimeoutError):
+            self.bus.transact(Packet(dst=0x61, action=ACTIONS['PUMP_STATUS']), timeout=0.05)
+        stats = self.metrics.stats()
+        self.assertEqual(stats['errors'], {(0x60, 25): 1})
+        self.assertEqual(stats['timeouts'], {(0x61, ACTIONS['PUMP_STATUS']): 1})
+
+    def test_checksum_failures(self):
+        self.simulator.transport.write(Packet(src=0x60, dst=0x21, action=ACTIONS['GET'], data=[0, 1]).raw[:-1] + b'\x00')
+        Pump(1, self.bus).refresh()
+        self.assertEqual(self.metrics.stats()['checksum_failures'], 1)
+        self.assertEqual(self.metrics.stats()['dropped_frames'], 1)
+
+    def test_render(self):
+        Pump(1, self.bus).refresh()
+        text = self.metrics.render()
+        self.assertIn('pypentair_transaction_seconds_count{address="INTELLIFLO_PUMP_1",action="PUMP_STATUS"} 1', text)
+        self.assertIn('pypentair_transaction_seconds_bucket{address="INTELLIFLO_PUMP_1",action="PUMP_STATUS",le="+Inf"} 1', text)
+        self.assertIn('pypentair_bytes_total{direction="sent"} 11', text)
+        self.assertIn('# TYPE pypentair_timeouts_total counter', text)
+        self.assertIn('pypentair_coalesced_total 0', text)
+
+    def test_serve(self):
+        server = self.metrics.serve(0)
+        try:
+            Pump(1, self.bus).refresh()
+            with urllib.request.urlopen('http://127.0.0.1:{}/metrics'.format(server.server_address[1])) as response:
+                self.assertEqual(response.read().decode(), self.metrics.render())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_disabled(self):
+        bus = Bus(LoopbackTransport())
+        self.assertIsNone(bus.metrics)
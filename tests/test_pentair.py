@@ -1,7 +1,10 @@
+import os
 import unittest
 import random
 from nose.plugins.attrib import attr
-from pypentair import Packet, Pump
+import pypentair
+from pypentair import Bus, Packet, Pump
+from pypentair.simulator import Simulator
 
 PAYLOAD_HEADER  = 0xA5
 SRC             = 0x21
@@ -14,6 +17,21 @@ SET             = 0x02
 RPM             = 0xC4
 VERSION         = 0x00
 
+# Set PYPENTAIR_PORT to run against real hardware instead of the simulator
+SIMULATOR       = None
+
+def setUpModule():
+    global SIMULATOR
+    if 'PYPENTAIR_PORT' in os.environ:
+        pypentair.RS485 = Bus(os.environ['PYPENTAIR_PORT'])
+    else:
+        SIMULATOR = Simulator().start()
+        pypentair.RS485 = SIMULATOR.bus()
+
+def tearDownModule():
+    if SIMULATOR is not None:
+        SIMULATOR.stop()
+
 class TestPumpMethods(unittest.TestCase):
 
     @attr('messy')
@@ -484,3 +502,101 @@ class TestPacketMethods(unittest.TestCase):
     def test_byte_construction_with_header_multiple_data_bytes_invalid_checksum(self):
         with self.assertRaises(ValueError):
             Packet([0xFF, 0x00, 0xFF, PAYLOAD_HEADER, VERSION, DST, SRC, PUMP_PROGRAM, 4, SET, RPM, 5, 220, 2, 211])
+
+### Immutable wire image
+
+    def test_raw(self):
+        packet = Packet(dst=DST, action=PUMP_PROGRAM, data=[SET, RPM, 5, 220])
+        self.assertEqual(packet.raw, bytes([0xFF, 0x00, 0xFF, PAYLOAD_HEADER, VERSION, DST, SRC, PUMP_PROGRAM, 4, SET, RPM, 5, 220, 2, 210]))
+        self.assertEqual(bytes(packet.data_view), bytes([SET, RPM, 5, 220]))
+
+    def test_immutable(self):
+        packet = Packet(dst=DST, action=GET_PUMP_STATUS)
+        with self.assertRaises(AttributeError):
+            packet.dst = 0x61
+        with self.assertRaises(AttributeError):
+            packet.extra = True
+
+    def test_equality(self):
+        self.assertEqual(Packet(dst=DST, action=REMOTE_CONTROL, data=ON), Packet([DST, SRC, REMOTE_CONTROL, 1, ON]))
+        self.assertNotEqual(Packet(dst=DST, action=REMOTE_CONTROL, data=ON), Packet(dst=DST, action=REMOTE_CONTROL, data=0))
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_snapshot(self):
+        Pump(1).ramp = 150
+        Pump(1).speed(3).schedule_start = [7, 30]
+        Pump(1).program(2).rpm = 2200
+        snapshot = Pump(1).snapshot()
+        self.assertEqual(snapshot.ramp, 150)
+        self.assertEqual(snapshot.speeds[2].index, 3)
+        self.assertEqual(snapshot.speeds[2].schedule_start, (7, 30))
+        self.assertEqual(snapshot.programs[1].rpm, 2200)
+        self.assertEqual(snapshot.max_speed, Pump(1).max_speed)
+        self.assertEqual(snapshot.ampm, Pump(1).ampm)
+        self.assertEqual(snapshot.speeds[0].mode, Pump(1).speed(1).mode)
+        self.assertGreater(snapshot.elapsed, 0)
+        with self.assertRaises(AttributeError):
+            snapshot.ramp = 100
+        Pump(1).ramp = 200
+        Pump(1).speed(3).schedule_start = [0, 0]
+        Pump(1).program(2).rpm = 1100
+
+class TestConfigure(unittest.TestCase):
+
+    PROFILE = {
+        'ramp':         150,
+        'quick_timer':  (1, 30),
+        'ampm':         False,
+        'programs':     {2: {'rpm': 2200}},
+        'speeds':       {3: {'rpm': 1800, 'schedule_start': [7, 30], 'mode': 'SCHEDULE'}},
+    }
+
+    def setUp(self):
+        self.original = Pump(1).snapshot()
+
+    def tearDown(self):
+        Pump(1).configure({
+            'ramp':         self.original.ramp,
+            'quick_timer':  self.original.quick_timer,
+            'ampm':         self.original.ampm,
+            'programs':     {2: {'rpm': self.original.programs[1].rpm}},
+            'speeds':       {3: {field: getattr(self.original.speeds[2], field) for field in ['rpm', 'schedule_start', 'mode']}},
+        })
+
+    def test_configure(self):
+        report = Pump(1).configure(self.PROFILE)
+        self.assertEqual(report['failed'], {})
+        self.assertEqual(report['reads'], 7)
+        self.assertEqual(report['changed'][('speeds', 3, 'schedule_start')][1], (7, 30))
+        self.assertEqual(len(report['changed']) + len(report['unchanged']), 7)
+        self.assertEqual(Pump(1).speed(3).schedule_start, [7, 30])
+        self.assertEqual(Pump(1).quick_timer, [1, 30])
+        self.assertEqual(Pump(1).program(2).rpm, 2200)
+        self.assertEqual(Pump(1).speed(3).mode, 'SCHEDULE')
+
+    def test_conforming_pump_only_reads(self):
+        Pump(1).configure(self.PROFILE)
+        report = Pump(1).configure(self.PROFILE)
+        self.assertEqual(report['writes'], 0)
+        self.assertEqual(report['changed'], {})
+        self.assertEqual(report['unchanged'][(None, None, 'ramp')], 150)
+
+    def test_cached_reads(self):
+        bus = pypentair.RS485
+        bus.cache = pypentair.RegisterCache()
+        try:
+            Pump(1).configure(self.PROFILE)
+            report = Pump(1).configure(self.PROFILE)
+            self.assertEqual(report['reads'], 0)
+            self.assertEqual(report['writes'], 0)
+        finally:
+            bus.cache = None
+
+    def test_bad_fields(self):
+        with self.assertRaises(ValueError):
+            Pump(1).configure({'rpm': 2000})
+        with self.assertRaises(ValueError):
+            Pump(1).configure({'colour': 'blue'})
+        with self.assertRaises(ValueError):
+            Pump(1).configure({'speeds': {9: {'rpm': 2000}}})
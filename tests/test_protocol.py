@@ -0,0 +1,29 @@
+import unittest
+from pypentair import ACTIONS, ADDRESSES, BROADCAST_ACTIONS, PUMP_POWER, SPEED_MODES, lookup
+
+class TestCodes(unittest.TestCase):
+
+    def test_forward(self):
+        self.assertEqual(ACTIONS['PUMP_STATUS'], 0x07)
+        self.assertEqual(ACTIONS.PUMP_STATUS, 0x07)
+        self.assertEqual(ADDRESSES['INTELLIFLO_PUMP_16'], 0x6F)
+
+    def test_reverse(self):
+        self.assertEqual(ADDRESSES.name(0x60), 'INTELLIFLO_PUMP_1')
+        self.assertEqual(ACTIONS.table[0xFF], 'ERROR')
+        self.assertEqual(SPEED_MODES.name(0), 'MANUAL')
+
+    def test_unknown_code(self):
+        self.assertEqual(ACTIONS.name(0x42), 0x42)
+        self.assertEqual(ACTIONS.name(-1), -1)
+        self.assertEqual(ACTIONS.name(None), None)
+
+    def test_duplicate_name_keeps_both_codes(self):
+        self.assertEqual(BROADCAST_ACTIONS.name(0x10), 'HEATER_PUMP_STATUS')
+        self.assertEqual(BROADCAST_ACTIONS.name(0x22), 'HEATER_PUMP_STATUS')
+        self.assertEqual(BROADCAST_ACTIONS.codes['HEATER_PUMP_STATUS'], [0x10, 0x22])
+
+    def test_lookup(self):
+        self.assertEqual(lookup(SPEED_MODES, 2), 'SCHEDULE')
+        self.assertEqual(lookup(SPEED_MODES, 9), 9)
+        self.assertEqual(lookup(PUMP_POWER, 0x0A), True)
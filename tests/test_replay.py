@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+import unittest
+from pypentair import ACTIONS, Bus, Packet
+from pypentair.capture import MAGIC, RECORD, RX, TX
+from pypentair.replay import BYTE_NS, Replay, records
+from pypentair.sniffer import Sniffer
+from pypentair.transport import PtyTransport
+
+REQUEST = Packet(src=0x10, dst=0x60, action=ACTIONS['PUMP_STATUS'])
+STATUS  = Packet(src=0x60, dst=0x10, action=ACTIONS['PUMP_STATUS'], data=[0x0A, 0x00, 0x02, 0x01, 0x2C, 0x0B, 0xB8, 0x00, 0x00, 0x00, 0x00, 0x00, 0x05, 0x0C, 0x1E])
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.capture = os.path.join(self.directory.name, 'bus.cap')
+        # Ten request/reply pairs, 10ms apart
+        with open(self.capture, 'wb') as f:
+            f.write(MAGIC)
+            for index in range(10):
+                for direction, packet in [(TX, REQUEST), (RX, STATUS)]:
+                    f.write(RECORD.pack(10**9 + index * 10**7, direction, len(packet.raw)))
+                    f.write(packet.raw)
+        self.dump = os.path.join(self.directory.name, 'bus.raw')
+        with open(self.dump, 'wb') as f:
+            f.write(b'\x00\x13' + (REQUEST.raw + STATUS.raw) * 3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_records(self):
+        self.assertEqual(len(list(records(self.capture))), 20)
+        timestamps = [timestamp for timestamp, direction, data in records(self.dump)]
+        self.assertEqual(timestamps[1] - timestamps[0], 32 * BYTE_NS)
+        self.assertEqual(b''.join(data for timestamp, direction, data in records(self.dump)), open(self.dump, 'rb').read())
+
+    def test_decodes_into_sniffer(self):
+        sniffer = Sniffer(None)
+        stats = Replay(self.capture, speed=None).run(sniffer.feed)
+        self.assertEqual(stats['frames'], 20)
+        self.assertEqual(stats['corrupt'], 0)
+        self.assertEqual(sniffer.states[0x60].status['watts'], 300)
+        self.assertEqual(sniffer.states[0x10].frames, 10)
+
+    def test_raw_dump(self):
+        stats = Replay(self.dump, speed=None).run()
+        self.assertEqual(stats['frames'], 6)
+
+    def test_speed(self):
+        for speed, low, high in [(1, 0.09, 0.5), (10, 0.009, 0.05), (None, 0, 0.02)]:
+            stats = Replay(self.capture, speed=speed).run()
+            self.assertGreaterEqual(stats['elapsed'], low)
+            self.assertLess(stats['elapsed'], high)
+
+    def test_directions(self):
+        replay = Replay(self.capture, speed=None, directions=(RX,))
+        self.assertEqual([packet for timestamp, direction, packet in replay.packets()], [STATUS] * 10)
+
+    def test_pty(self):
+        pty = PtyTransport()
+        bus = Bus(pty.name)
+        bus.open()
+        replay = Replay(self.capture, speed=10)
+        thread = threading.Thread(target=replay.serve, args=(pty,))
+        thread.start()
+        heard = [bus.listen(1) for index in range(10)]
+        thread.join()
+        bus.close()
+        pty.close()
+        self.assertEqual(heard, [STATUS] * 10)
@@ -0,0 +1,130 @@
+import time
+import unittest
+import pypentair
+from pypentair import (
+    ACTIONS, ChecksumError, ErrorResponse, Metrics, Packet, PentairError, Pump, ResponseMismatch, ResponseTimeout, Retry, getResponse
+)
+from pypentair.simulator import Simulator
+
+class FlakySimulator(Simulator):
+    # Ignores the first `drops` requests
+    drops = 0
+
+    def handle(self, packet):
+        if self.drops:
+            self.drops -= 1
+            return None
+        return super().handle(packet)
+
+class TestRetry(unittest.TestCase):
+
+    def test_succeeds_after_failures(self):
+        failures = [ResponseTimeout(), ChecksumError()]
+        retried = []
+        def attempt(timeout):
+            if failures:
+                raise failures.pop(0)
+            return 'ok'
+        self.assertEqual(Retry(attempts=3, backoff=0.001).run(attempt, on_retry=retried.append), 'ok')
+        self.assertEqual(len(retried), 2)
+
+    def test_gives_up(self):
+        calls = []
+        def attempt(timeout):
+            calls.append(timeout)
+            raise ResponseTimeout()
+        with self.assertRaises(ResponseTimeout):
+            Retry(attempts=3, timeout=0.5, backoff=0.001).run(attempt)
+        self.assertEqual(calls, [0.5] * 3)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+        def attempt(timeout):
+            calls.append(timeout)
+            raise KeyError()
+        with self.assertRaises(KeyError):
+            Retry().run(attempt)
+        self.assertEqual(len(calls), 1)
+
+    def test_deadline(self):
+        calls = []
+        def attempt(timeout):
+            calls.append(timeout)
+            time.sleep(timeout)
+            raise ResponseTimeout()
+        start = time.monotonic()
+        with self.assertRaises(ResponseTimeout):
+            Retry(attempts=100, timeout=0.05, backoff=0.01, cap=0.01).run(attempt, deadline=0.2)
+        self.assertLess(time.monotonic() - start, 0.3)
+        self.assertLessEqual(max(calls), 0.05)
+
+    def test_jitter(self):
+        retry = Retry(backoff=0.1, cap=1, jitter=0.5)
+        for attempt in range(10):
+            self.assertTrue(0.05 * 2**min(attempt, 3) <= retry.delay(attempt) <= 1.5)
+
+class TestErrors(unittest.TestCase):
+
+    def test_hierarchy(self):
+        for error, builtin in [(ResponseTimeout, TimeoutError), (ChecksumError, ValueError), (ResponseMismatch, ValueError), (ErrorResponse, ValueError)]:
+            self.assertTrue(issubclass(error, PentairError))
+            self.assertTrue(issubclass(error, builtin))
+
+    def test_bad_checksum(self):
+        with self.assertRaises(ChecksumError):
+            Packet(Packet(dst=0x60, action=ACTIONS['PUMP_STATUS']).raw[:-1] + b'\x00')
+
+    def test_mismatch(self):
+        with self.assertRaises(ResponseMismatch):
+            Packet(dst=0x60, action=ACTIONS['GET']).accept(Packet(src=0x60, dst=0x21, action=ACTIONS['PUMP_STATUS']))
+
+    def test_error_response(self):
+        pypentair.RAISE_PACKET_ERRORS = True
+        try:
+            with self.assertRaises(ErrorResponse) as context:
+                Packet(dst=0x60, action=ACTIONS['GET']).accept(Packet(src=0x60, dst=0x21, action=ACTIONS['ERROR'], data=[25]))
+            self.assertEqual(context.exception.code, 25)
+        finally:
+            pypentair.RAISE_PACKET_ERRORS = False
+
+class TestPumpRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = FlakySimulator().start()
+        self.bus = self.simulator.bus()
+        self.bus.metrics = Metrics()
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_recovers(self):
+        self.simulator.drops = 2
+        pump = Pump(1, self.bus, retry=Retry(timeout=0.05, backoff=0.001))
+        self.assertEqual(pump.max_speed, 3450)
+        self.assertEqual(self.bus.metrics.stats()['retries'], {(0x60, ACTIONS['GET']): 2})
+
+    def test_coalesced_read_keeps_its_retries(self):
+        self.simulator.drops = 1
+        self.bus.submit(Packet(dst=0x60, action=ACTIONS['PUMP_STATUS']), 'BACKGROUND', timeout=0.1)
+        pump = Pump(1, self.bus, retry=Retry(timeout=0.05, backoff=0.001))
+        self.assertEqual(pump.submit(ACTIONS['PUMP_STATUS']).result(timeout=2).src, 0x60)
+        self.assertEqual(self.bus.coalesced, 1)
+
+    def test_dead_pump_is_bounded(self):
+        start = time.monotonic()
+        with self.assertRaises(ResponseTimeout):
+            Pump(2, self.bus, retry=Retry(timeout=0.05, deadline=0.3)).max_speed
+        self.assertLess(time.monotonic() - start, 0.5)
+        with self.assertRaises(ResponseTimeout):
+            Pump(2, self.bus).send(ACTIONS['GET'], [0x02, 0xD1], timeout=0.1)
+        self.assertLess(time.monotonic() - start, 0.7)
+
+    def test_checksum_error(self):
+        # All that comes back is damaged
+        self.simulator.transport.write(Packet(src=0x61, dst=0x21, action=ACTIONS['PUMP_STATUS']).raw[:-1] + b'\x00')
+        with self.assertRaises(ChecksumError):
+            self.bus.transact(Packet(dst=0x61, action=ACTIONS['PUMP_STATUS']), timeout=0.05)
+
+    def test_get_response(self):
+        with self.assertRaises(ResponseTimeout):
+            getResponse(self.bus, timeout=0.05)
@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from pypentair import ACTIONS, Packet, Pump, Scheduler
+from pypentair.simulator import Simulator
+
+class GatedBus():
+    # Holds every transaction until released, recording the order they ran in
+    def __init__(self):
+        self.gate   = threading.Event()
+        self.order  = []
+
+    def transact(self, packet, priority=None, timeout=None):
+        self.gate.wait()
+        self.order.append(packet.dst)
+        return packet
+
+def request(dst):
+    return Packet(dst=dst, action=ACTIONS['PUMP_STATUS'])
+
+class TestScheduler(unittest.TestCase):
+
+    def test_priority_order(self):
+        bus = GatedBus()
+        scheduler = Scheduler(bus)
+        first = scheduler.submit(request(0x60), 'BACKGROUND')
+        while scheduler.depth:
+            time.sleep(0.001)   # Wait until the worker is stuck on the first job
+        futures = [
+            scheduler.submit(request(0x61), 'BACKGROUND'),
+            scheduler.submit(request(0x62), 'USER'),
+            scheduler.submit(request(0x63), 'CONTROL'),
+            scheduler.submit(request(0x64), 'USER'),
+        ]
+        self.assertEqual(scheduler.depth, 4)
+        bus.gate.set()
+        for future in [first] + futures:
+            future.result(timeout=1)
+        self.assertEqual(bus.order, [0x60, 0x63, 0x62, 0x64, 0x61])
+        self.assertEqual(scheduler.stats()['completed'], 5)
+
+    def test_cancel_and_deadline(self):
+        bus = GatedBus()
+        scheduler = Scheduler(bus)
+        first = scheduler.submit(request(0x60))
+        while scheduler.depth:
+            time.sleep(0.001)
+        cancelled = scheduler.submit(request(0x61))
+        expired = scheduler.submit(request(0x62), timeout=0)
+        self.assertTrue(cancelled.cancel())
+        bus.gate.set()
+        first.result(timeout=1)
+        with self.assertRaises(TimeoutError):
+            expired.result(timeout=1)
+        stats = scheduler.stats()
+        self.assertEqual(stats['cancelled'], 1)
+        self.assertEqual(stats['expired'], 1)
+        self.assertEqual(bus.order, [0x60])
+
+    def test_control_gets_between_batch_frames(self):
+        class GatedPipelineBus(GatedBus):
+            entered = threading.Event()
+            def pipeline(self, packets, priority=None, timeout=None, depth=1):
+                self.entered.set()
+                return [Future() for packet in packets if self.transact(packet) is not None]
+        bus = GatedPipelineBus()
+        scheduler = Scheduler(bus)
+        batch = threading.Thread(target=scheduler.pipeline, args=([request(0x60), request(0x61), request(0x62)],))
+        batch.start()
+        bus.entered.wait(1)
+        while scheduler.depth < 2:
+            time.sleep(0.001)   # The first frame's job is running; the rest are queued
+        control = scheduler.submit(request(0x63), 'CONTROL')
+        bus.gate.set()
+        control.result(timeout=1)
+        batch.join()
+        self.assertEqual(bus.order, [0x60, 0x63, 0x61, 0x62])
+
+    def test_pump_through_scheduler(self):
+        with Simulator() as simulator:
+            scheduler = Scheduler(simulator.bus())
+            Pump(1, scheduler).ramp = 150
+            self.assertEqual(Pump(1, scheduler).ramp, 150)
+            Pump(1, scheduler).power = False
+            self.assertEqual(Pump(1, scheduler).power, False)
+            self.assertEqual(scheduler.stats()['depth'], 0)
+
+    def test_priority_and_deadline_reach_the_bus(self):
+        calls = []
+        class RecordingBus():
+            def transact(self, packet, priority=None, timeout=None):
+                calls.append((priority, timeout))
+                return packet
+            def pipeline(self, packets, priority=None, timeout=None, depth=1):
+                calls.append((priority, timeout))
+                return []
+        scheduler = Scheduler(RecordingBus())
+        scheduler.submit(request(0x60), 'CONTROL').result(timeout=1)
+        scheduler.pipeline([request(0x60)], timeout=5)
+        self.assertEqual(calls[0], ('CONTROL', None))
+        self.assertEqual(calls[1][0], 'BACKGROUND')
+        self.assertTrue(0 < calls[1][1] <= 5)
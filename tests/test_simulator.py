@@ -0,0 +1,58 @@
+import time
+import unittest
+from pypentair import ACTIONS, SETTING, Packet, PtyTransport, Pump, bytelist
+from pypentair.simulator import ERRORS, SimulatedPump, Simulator
+
+class TestSimulatedPump(unittest.TestCase):
+
+    def test_error_on_read_only_register(self):
+        pump = SimulatedPump(0x60)
+        request = Packet(dst=0x60, action=ACTIONS['SET'], data=SETTING['SOFT_PRIME_COUNTER'] + bytelist(1))
+        self.assertEqual(pump.handle(request), (ACTIONS['ERROR'], [ERRORS['READ_ONLY']]))
+
+    def test_error_on_unknown_register(self):
+        pump = SimulatedPump(0x60)
+        request = Packet(dst=0x60, action=ACTIONS['GET'], data=[0x03, 0x36])
+        self.assertEqual(pump.handle(request), (ACTIONS['ERROR'], [ERRORS['BAD_REGISTER']]))
+
+    def test_ramp(self):
+        pump = SimulatedPump(0x60, ramp=10000)
+        pump.set(tuple(SETTING['TARGET_RPM']), 3000)
+        self.assertLess(pump.rpm, 3000)
+        time.sleep(0.2)
+        self.assertEqual(pump.rpm, 3000)
+
+class TestSimulator(unittest.TestCase):
+
+    def test_full_bus(self):
+        with Simulator(addresses=range(0x60, 0x70)) as simulator:
+            bus = simulator.bus()
+            for index in range(1, 17):
+                Pump(index, bus).ramp = index
+            self.assertEqual([Pump(index, bus).ramp for index in range(1, 17)], list(range(1, 17)))
+
+    def test_error_reply(self):
+        with Simulator() as simulator:
+            self.assertEqual(Pump(1, simulator.bus()).soft_prime_counter, 10)
+            response = Pump(1, simulator.bus()).send(ACTIONS['SET'], SETTING['SOFT_PRIME_COUNTER'] + bytelist(1))
+            self.assertEqual(response.action, ACTIONS['ERROR'])
+            self.assertEqual(response.data, [ERRORS['READ_ONLY']])
+
+    def test_power(self):
+        with Simulator() as simulator:
+            pump = Pump(1, simulator.bus())
+            pump.power = False
+            self.assertEqual(pump.status['rpm'], 0)
+            pump.power = True
+            self.assertEqual(pump.status['rpm'], 1100)
+
+    def test_missing_pump_stays_quiet(self):
+        with Simulator() as simulator:
+            simulator.handle(Packet(dst=0x61, action=ACTIONS['PUMP_STATUS']))
+            self.assertEqual(simulator.requests, 0)
+
+    def test_pty(self):
+        with Simulator(PtyTransport()) as simulator:
+            bus = simulator.bus()
+            self.assertEqual(Pump(1, bus).max_speed, 3450)
+            bus.close()
@@ -0,0 +1,88 @@
+import time
+import unittest
+from pypentair import ACTIONS, ADDRESSES, BROADCAST_ACTIONS, SETTING, Packet, Pump, RegisterCache, bytelist
+from pypentair.simulator import Simulator
+from pypentair.sniffer import Sniffer
+
+CONTROLLER  = ADDRESSES['EASYTOUCH']
+PUMP        = ADDRESSES['INTELLIFLO_PUMP_1']
+STATUS      = [0x0A, 0x00, 0x02, 0x01, 0x2C, 0x0B, 0xB8, 0x00, 0x00, 0x00, 0x00, 0x00, 0x05, 0x0C, 0x1E]
+
+class TestSniffer(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = Simulator().start()
+        self.bus = self.simulator.bus()
+        self.bus.cache = RegisterCache()
+        self.sniffer = Sniffer(self.bus)
+
+    def tearDown(self):
+        self.sniffer.stop()
+        self.simulator.stop()
+
+    def test_status(self):
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['PUMP_STATUS'], data=STATUS))
+        state = self.sniffer.states[PUMP]
+        self.assertEqual(state.name, 'INTELLIFLO_PUMP_1')
+        self.assertEqual(state.status['watts'], 300)
+        self.assertEqual(state.status['rpm'], 3000)
+        self.assertEqual(state.frames, 1)
+
+    def test_short_status(self):
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['PUMP_STATUS'], data=[10, 0]))
+        self.assertIsNone(self.sniffer.states[PUMP].status)
+
+    def test_registers(self):
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['GET'], data=SETTING['RAMP']))
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['GET'], data=bytelist(150)))
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['SET'], data=SETTING['CONTRAST'] + bytelist(2)))
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['SET'], data=bytelist(2)))
+        self.assertEqual(self.sniffer.states[PUMP].registers, {tuple(SETTING['RAMP']): 150, tuple(SETTING['CONTRAST']): 2})
+        self.assertEqual(Pump(1, self.bus).ramp, 150)
+        self.assertEqual(Pump(1, self.bus).contrast, 2)
+        self.assertEqual(self.simulator.requests, 0)
+
+    def test_errors_and_unasked_replies(self):
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['GET'], data=SETTING['RAMP']))
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['ERROR'], data=[25]))
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['GET'], data=bytelist(150)))
+        self.assertEqual(self.sniffer.states[PUMP].registers, {})
+        self.assertEqual(self.sniffer.stats()['pending'], 0)
+
+    def test_broadcasts(self):
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=ADDRESSES['BROADCAST'], action=BROADCAST_ACTIONS['DATE_TIME'], data=[15, 34, 1, 10, 7, 16, 0, 1]))
+        self.assertEqual(self.sniffer.states[CONTROLLER].broadcasts['DATE_TIME'], [15, 34, 1, 10, 7, 16, 0, 1])
+
+    def test_control_invalidates(self):
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['PUMP_STATUS'], data=STATUS))
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['PUMP_POWER'], data=[0x04]))
+        self.assertIsNone(self.bus.cache.status(PUMP))
+
+    def test_control_keeps_configuration(self):
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['GET'], data=SETTING['RAMP']))
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['GET'], data=bytelist(150)))
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['PUMP_SPEED'], data=[0x21]))
+        self.assertEqual(Pump(1, self.bus).ramp, 150)
+        self.assertEqual(self.simulator.requests, 0)
+
+    def test_repeated_remote_control(self):
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['REMOTE_CONTROL'], data=[0xFF]))
+        self.sniffer.feed(Packet(src=PUMP, dst=CONTROLLER, action=ACTIONS['PUMP_STATUS'], data=STATUS))
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['REMOTE_CONTROL'], data=[0xFF]))
+        self.assertIsNotNone(self.bus.cache.status(PUMP))
+        self.sniffer.feed(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['REMOTE_CONTROL'], data=[0x00]))
+        self.assertIsNone(self.bus.cache.status(PUMP))
+
+    def test_listen_only(self):
+        writes = []
+        self.bus.write = writes.append
+        self.sniffer.start()
+        # Stand in for a controller polling the pump; we only hear the reply
+        self.bus.open().transport.write(Packet(src=CONTROLLER, dst=PUMP, action=ACTIONS['PUMP_STATUS']).raw)
+        deadline = time.monotonic() + 1
+        while PUMP not in self.sniffer.states and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.sniffer.states[PUMP].status['run'], 0x0A)
+        self.assertEqual(Pump(1, self.bus).watts, self.sniffer.states[PUMP].status['watts'])
+        self.assertEqual(self.simulator.requests, 1)
+        self.assertEqual(writes, [])
@@ -0,0 +1,81 @@
+import unittest
+from pypentair import ACTIONS, Packet, Pump
+from pypentair.simulator import Simulator
+from pypentair import telemetry
+from pypentair.telemetry import Series, Telemetry
+
+def status(watts, rpm=2000, timer=[1, 30]):
+    return {'run': 0x0A, 'mode': 0, 'watts': watts, 'rpm': rpm, 'timer': timer, 'time': [12, 0]}
+
+def values(sequence):
+    return [float(value) for value in sequence]
+
+class TestSeries(unittest.TestCase):
+
+    def test_append_and_wrap(self):
+        series = Series(capacity=4)
+        for second in range(6):
+            series.append(1000 + second, status(100 * second))
+        self.assertEqual(len(series), 4)
+        self.assertEqual(values(series.column('watts')), [200, 300, 400, 500])
+        self.assertEqual(values(series.column('timestamp')), [1002, 1003, 1004, 1005])
+        self.assertEqual(values(series.column('timer')), [90] * 4)
+        self.assertEqual(series.columns['watts'].buffer_info()[1], 4)
+
+    def test_partial(self):
+        series = Series(capacity=10)
+        self.assertEqual(len(series.column('rpm')), 0)
+        series.append(1000, status(100, rpm=1100))
+        self.assertEqual(values(series.column('rpm')), [1100])
+
+    def test_downsample(self):
+        series = Series(capacity=100)
+        for second in range(20):
+            series.append(1000 + second, status(second))
+        starts, lows, highs, means = series.downsample(10)
+        self.assertEqual(values(starts), [1000, 1010])
+        self.assertEqual(values(lows), [0, 10])
+        self.assertEqual(values(highs), [9, 19])
+        self.assertEqual(values(means), [4.5, 14.5])
+        self.assertEqual(values(series.downsample(10, 'rpm')[3]), [2000, 2000])
+
+    def test_kwh(self):
+        series = Series(capacity=10000)
+        for second in range(0, 3601, 10):
+            series.append(second, status(1000))
+        self.assertAlmostEqual(series.kwh(), 1.0)
+        self.assertAlmostEqual(series.kwh(since=1800), 0.5)
+        # The pump was unplugged (or we were) for an hour; don't make that up
+        series.append(7200, status(1000))
+        self.assertAlmostEqual(series.kwh(), 1.0)
+        self.assertAlmostEqual(series.kwh(max_gap=3600), 2.0)
+
+class TestSeriesWithoutNumpy(TestSeries):
+
+    def setUp(self):
+        self.numpy, telemetry.numpy = telemetry.numpy, None
+
+    def tearDown(self):
+        telemetry.numpy = self.numpy
+
+class TestTelemetry(unittest.TestCase):
+
+    def test_bus(self):
+        with Simulator(addresses=[0x60, 0x61]) as simulator:
+            bus = simulator.bus()
+            collector = Telemetry(bus)
+            first = Pump(1, bus).refresh()
+            Pump(1, bus).refresh()
+            Pump(2, bus).refresh()
+            Pump(2, bus).ramp
+            collector.close()
+            Pump(2, bus).refresh()
+        self.assertEqual(sorted(collector.series), [0x60, 0x61])
+        self.assertEqual(len(collector.series[0x60]), 2)
+        self.assertEqual(len(collector.series[0x61]), 1)
+        self.assertEqual(values(collector.series[0x60].column('watts')), [first['watts']] * 2)
+
+    def test_ignores_requests(self):
+        collector = Telemetry()
+        collector.feed(Packet(dst=0x60, action=ACTIONS['PUMP_STATUS']))
+        self.assertEqual(collector.series, {})
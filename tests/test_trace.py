@@ -0,0 +1,73 @@
+import io
+import unittest
+import time
+from pypentair import ACTIONS, Bus, LoopbackTransport, Packet, Pump, Retry, Trace
+from pypentair.simulator import Simulator
+from pypentair.trace import describe
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.output = io.StringIO()
+        self.simulator = Simulator().start()
+        self.bus = self.simulator.bus()
+        self.bus.trace = Trace(size=4, output=self.output, on_failure=lambda trace: trace.dump())
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_ring(self):
+        for x in range(6):
+            Pump(1, self.bus).refresh()
+        entries = self.bus.trace.entries()
+        self.assertEqual([entry[0] for entry in entries], [2, 3, 4, 5])
+        sequence, sent, request, latency, response, error = entries[-1]
+        self.assertEqual(Packet(request).action, ACTIONS['PUMP_STATUS'])
+        self.assertEqual(Packet(response).src, 0x60)
+        self.assertGreater(latency, 0)
+        self.assertIsNone(error)
+        self.assertEqual(self.output.getvalue(), '')
+
+    def test_dumped_on_timeout(self):
+        Pump(1, self.bus).refresh()
+        with self.assertRaises(TimeoutError):
+            Pump(2, self.bus, retry=Retry(attempts=1, timeout=0.05)).refresh()
+        lines = self.output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('INTELLIFLO_PUMP_1 <- REMOTE_CONTROLLER PUMP_STATUS []  ->  REMOTE_CONTROLLER <- INTELLIFLO_PUMP_1 PUMP_STATUS', lines[0])
+        self.assertIn('!! ResponseTimeout', lines[1])
+
+    def test_probes_are_not_dumped(self):
+        with self.assertRaises(TimeoutError):
+            self.bus.transact(Packet(dst=0x61, action=ACTIONS['PUMP_STATUS']), timeout=0.05)
+        self.bus.pipeline([Packet(dst=0x62, action=ACTIONS['PUMP_STATUS'])], 'BACKGROUND', timeout=0.05)
+        self.assertEqual(self.output.getvalue(), '')
+
+    def test_default_dump_is_rate_limited(self):
+        self.bus.trace = Trace(output=self.output)
+        for address in (2, 3):
+            with self.assertRaises(TimeoutError):
+                Pump(address, self.bus, retry=Retry(attempts=1, timeout=0.05)).refresh()
+        deadline = time.monotonic() + 1
+        while not self.output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(self.output.getvalue().count('!!'), 1)
+
+    def test_dumped_on_error(self):
+        Pump(1, self.bus).send(ACTIONS['GET'], [0x03, 0x36])
+        self.assertIn('ERROR [25]', self.output.getvalue())
+
+    def test_dump_only_whats_new(self):
+        Pump(1, self.bus).refresh()
+        self.assertEqual(len(self.bus.trace.dump()), 1)
+        self.assertEqual(self.bus.trace.dump(), [])
+        Pump(1, self.bus).refresh()
+        self.assertEqual(len(self.bus.trace.dump()), 1)
+
+    def test_default(self):
+        self.assertIsInstance(Bus(LoopbackTransport()).trace, Trace)
+        self.assertIsNone(Bus(LoopbackTransport(), trace=False).trace)
+
+    def test_describe(self):
+        self.assertEqual(describe(Packet(dst=0x60, action=ACTIONS['GET'], data=[2, 209]).raw), 'INTELLIFLO_PUMP_1 <- REMOTE_CONTROLLER GET [2, 209]')